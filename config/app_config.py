@@ -0,0 +1,87 @@
+# 应用配置
+
+# 各运动计数器的判定参数，可用 tools/tune_counters.py 调优后填入
+COUNTER_CONFIG = {
+    "深蹲": {
+        "stand_angle": 160,       # 大于该膝关节角度视为站立
+        "squat_angle": 90,        # 小于该膝关节角度视为蹲下
+        "stable_angle": 15,       # 防抖动的角度变化阈值
+    },
+    "俯卧撑": {
+        "up_angle": 160,          # 大于该肘关节角度视为手臂伸直
+        "down_angle": 90,         # 小于该肘关节角度视为手臂弯曲
+    },
+    "平板支撑": {
+        "body_tolerance": 30,     # 身体偏离水平的最大角度
+        "leg_tolerance": 30,      # 腿部偏离水平的最大角度
+        "arm_angle_min": 75,
+        "arm_angle_max": 105,
+    },
+    "跳绳": {
+        "min_height_change": 0.02,  # 判定起跳/落地的最小高度变化
+        "min_jump_interval": 0.15,  # 两次跳跃的最小间隔（秒）
+    },
+}
+
+# 姿势检测后端配置
+POSE_CONFIG = {
+    "backend": "solutions",       # solutions: 旧版同步API；tasks: MediaPipe Tasks PoseLandmarker
+    "running_mode": "live_stream",  # tasks后端的运行模式：video 或 live_stream
+    "model_path": "models/pose_landmarker_lite.task",
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5,
+}
+
+# 离线批量处理（归档视频）使用的姿势检测后端配置
+OFFLINE_POSE_CONFIG = {
+    "backend": "onnx_batch",      # 也可使用 solutions 或 tasks（video模式）
+    "model_path": "models/movenet_singlepose_lightning.onnx",
+    "input_size": 192,
+    "input_dtype": "int32",
+    "batch_size": 16,
+    "intra_op_threads": 0,        # 0表示由onnxruntime自动决定
+}
+
+# 运动记录后台写入配置
+RECORD_WRITER_CONFIG = {
+    "journal_path": "journal/pending_records.jsonl",  # 数据库不可写时的待写入日志
+    "batch_size": 32,             # 单个事务最多合并的记录数
+    "replay_interval": 30.0,      # 空闲时重试重放日志的间隔（秒）
+    "metrics_interval": 300.0,    # 定期记录队列深度和写入延迟的间隔（秒）
+}
+
+# 数据库后台备份配置
+BACKUP_CONFIG = {
+    "backup_dir": "backups",
+    "interval": 6 * 3600,         # 运行期间的备份间隔（秒）
+    "startup_delay": 10.0,        # 启动后延迟备份，避免与界面初始化争用磁盘
+    "pages_per_step": 256,        # 在线备份每步复制的页数
+    "step_pause": 0.005,          # 每步之间的休眠（秒）
+    "keep_last": 5,               # 至少保留最近的备份数
+    "keep_daily": 14,             # 最近N天每天保留一份
+    "compress": True,             # 将最新一份以外的备份压缩为 .gz
+}
+
+# 向总部服务器增量同步运动记录的配置
+SYNC_CONFIG = {
+    "enabled": False,
+    "endpoint": "http://127.0.0.1:8765/api/records",  # 可用 python -m tools.sync_server 启动本地测试服务器
+    "kiosk_id": None,             # 本机标识，未指定时使用主机名
+    "batch_size": 500,            # 每个请求推送的记录数
+    "interval": 60.0,             # 追上进度后的检查间隔（秒）
+    "timeout": 10.0,              # 单个请求超时（秒）
+    "initial_backoff": 2.0,       # 失败后首次重试等待（秒），之后按指数增长
+    "max_backoff": 600.0,         # 最长重试等待（秒）
+}
+
+# 会员成就里程碑阈值
+MILESTONE_CONFIG = {
+    "sessions": (1, 10, 50, 100, 500, 1000),    # 累计训练次数
+    "streak": (3, 7, 14, 30, 100, 365),          # 连续运动天数
+    "total": {                                   # 各运动累计次数（平板支撑为秒）
+        "深蹲": (100, 500, 1000, 5000, 10000),
+        "俯卧撑": (100, 500, 1000, 5000, 10000),
+        "平板支撑": (600, 1800, 3600, 18000, 36000),
+        "跳绳": (1000, 5000, 10000, 50000, 100000),
+    },
+}
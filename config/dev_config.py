@@ -5,4 +5,5 @@ DEV_MODE = True  # 在发行版中设置为False
 DEV_CONFIG = {
     "generate_test_data": False,  # 是否生成测试数据
     "debug_logging": True,       # 是否启用调试日志
+    "database_path": None,       # 指定后使用该数据库，例如用 benchmark_data.db 测试大数据量下的界面
 } 
\ No newline at end of file
@@ -1,5 +1,8 @@
 from src.ui.main_window import MainWindow
-from src.core.database import DatabaseManager
+from src.core.database import db_manager
+from src.core.record_writer import record_writer
+from src.core.backup import create_backup_service
+from src.core.sync_agent import create_sync_agent
 import customtkinter as ctk
 from config.dev_config import DEV_MODE, DEV_CONFIG
 import sys
@@ -25,10 +28,16 @@ def main():
         # 设置错误日志
         setup_error_logging()
         
+        # 开发模式：可切换到基准数据库
+        if DEV_MODE and DEV_CONFIG.get("database_path"):
+            db_manager.db_path = DEV_CONFIG["database_path"]
+        
         # 初始化数据库
-        db_manager = DatabaseManager()
         db_manager.init_database()
         
+        # 启动后台记录写入线程（同时重放未写入的日志）
+        record_writer.start()
+        
         # 开发模式：生成测试数据
         if DEV_MODE and DEV_CONFIG["generate_test_data"]:
             try:
@@ -37,10 +46,15 @@ def main():
             except ImportError:
                 print("开发工具未找到，跳过测试数据生成")
         
-        # 创建数据库备份
-        success, backup_result = db_manager.backup_database()
-        if not success:
-            print(f"数据库备份失败: {backup_result}")
+        # 后台在线备份数据库，不阻塞启动
+        backup_service = create_backup_service(db_manager.db_path)
+        backup_service.start()
+        
+        # 向总部服务器增量同步（配置中启用时），新记录写入后提前触发
+        sync_agent = create_sync_agent(db_manager)
+        if sync_agent:
+            record_writer.add_listener(sync_agent.wake)
+            sync_agent.start()
         
         # 设置全局样式
         ctk.set_appearance_mode("dark")
@@ -69,6 +83,19 @@ def main():
         
         app.window.mainloop()
         
+        # 写入剩余记录后关闭数据库连接
+        backup_service.close()
+        record_writer.close()
+        if sync_agent:
+            sync_agent.close()
+        record_writer.log_metrics()
+        stats = db_manager.stats.snapshot()
+        logger.info(f"数据库查询 {stats['count']} 次，耗时 {stats['total_time'] * 1000:.1f} 毫秒")
+        cache_stats = db_manager.cache.snapshot()
+        logger.info(f"查询缓存命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次，"
+                    f"命中率 {cache_stats['hit_rate']:.1%}，失效 {cache_stats['invalidated']} 条")
+        db_manager.close()
+        
     except Exception as e:
         logger.error(f"应用启动失败: {str(e)}", exc_info=True)
         raise
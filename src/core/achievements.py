@@ -0,0 +1,164 @@
+import itertools
+from collections import namedtuple
+
+from config.app_config import MILESTONE_CONFIG
+
+# 以时长计的运动，成绩和累计量的单位为秒
+DURATION_EXERCISES = frozenset(("平板支撑",))
+
+# 主界面展示的会员成就：bests 为 {运动类型: (单次最佳, 日序号)}，
+# milestones 为 [(里程碑名称, 达成日序号)]，最新达成的在前
+MemberAchievements = namedtuple(
+    "MemberAchievements", ["bests", "current_streak", "longest_streak", "sessions", "milestones"]
+)
+
+
+def milestone_label(name):
+    """里程碑名称转换为显示文本，如 milestone:total:深蹲:1000 -> 深蹲累计1000次"""
+    parts = name.split(":")
+    threshold = int(parts[-1])
+    if parts[1] == "sessions":
+        return f"累计训练{threshold}次"
+    if parts[1] == "streak":
+        return f"连续运动{threshold}天"
+    exercise_type = parts[2]
+    if exercise_type in DURATION_EXERCISES:
+        return f"{exercise_type}累计{threshold // 60}分钟"
+    return f"{exercise_type}累计{threshold}次"
+
+
+class AchievementState:
+    """一位会员的成就状态 {名称: (数值, 日序号)}
+
+    名称包括 best:运动类型（单次最佳）、total:运动类型（累计量）、sessions（累计次数）、
+    streak（当前连续天数，日序号为最近运动的日期）、longest_streak 和 milestone:...。
+    按日期顺序逐条 add 的结果与从每日汇总重新计算的结果一致。
+    """
+
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.changed = set()
+
+    def get(self, name, default=0):
+        return self.values.get(name, (default, None))[0]
+
+    def _set(self, name, value, day):
+        self.values[name] = (value, day)
+        self.changed.add(name)
+
+    def add(self, day, exercise_type, count, value_sum, value_max):
+        """计入一天中某运动的 count 条记录；日期早于最近运动日期时返回False，需要重新计算"""
+        last_day = self.values.get("streak", (0, None))[1]
+        if last_day is not None and day < last_day:
+            return False
+
+        best = f"best:{exercise_type}"
+        if value_max > self.get(best):
+            self._set(best, value_max, day)
+        self._accumulate("sessions", count, day, MILESTONE_CONFIG["sessions"])
+        self._accumulate(f"total:{exercise_type}", value_sum, day,
+                         MILESTONE_CONFIG["total"].get(exercise_type, ()))
+        if day != last_day:
+            self._advance_streak(day, last_day)
+        return True
+
+    def _accumulate(self, name, amount, day, thresholds):
+        before = self.get(name)
+        after = before + amount
+        self._set(name, after, day)
+        for threshold in thresholds:
+            if before < threshold <= after:
+                self._set(f"milestone:{name}:{threshold}", threshold, day)
+
+    def _advance_streak(self, day, last_day):
+        streak = self.get("streak") + 1 if last_day is not None and day == last_day + 1 else 1
+        self._set("streak", streak, day)
+        if streak > self.get("longest_streak"):
+            self._set("longest_streak", streak, day)
+        # 中断后再次达到同样天数时保留首次达成的日期
+        milestone = f"milestone:streak:{streak}"
+        if streak in MILESTONE_CONFIG["streak"] and milestone not in self.values:
+            self._set(milestone, streak, day)
+
+
+def compute_state(rollup_rows):
+    """由按日期排序的每日汇总 (日序号, 运动类型, 记录数, 总量, 最大值) 计算成就状态"""
+    state = AchievementState()
+    for row in rollup_rows:
+        state.add(*row)
+    return state
+
+
+def _load_state(conn, user_id):
+    rows = conn.execute(
+        "SELECT name, value, day FROM member_achievements WHERE user_id = ?", (user_id,)
+    ).fetchall()
+    return AchievementState({name: (value, day) for name, value, day in rows})
+
+
+def _save_state(conn, user_id, state, names):
+    conn.executemany("""
+        INSERT INTO member_achievements (user_id, name, value, day) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, name) DO UPDATE SET value = excluded.value, day = excluded.day
+    """, [(user_id, name) + state.values[name] for name in names])
+
+
+def apply_record(conn, user_id, day, exercise_type, value):
+    """在写入记录的事务中增量更新会员成就，只读写该会员的几十行"""
+    apply_rows(conn, [(user_id, day, exercise_type, 1, value, value)])
+
+
+def apply_rows(conn, rows):
+    """按新写入记录的汇总 (会员, 日序号, 运动类型, 记录数, 总量, 最大值) 增量更新成就
+
+    rows 需按(会员, 日期)排序。补录了更早日期的会员无法增量维护连续天数，
+    改为从每日汇总重新计算（每日汇总须已包含新记录）。
+    """
+    stale = []
+    for user_id, member_rows in itertools.groupby(rows, key=lambda row: row[0]):
+        state = _load_state(conn, user_id)
+        if all(state.add(*row[1:]) for row in member_rows):
+            _save_state(conn, user_id, state, state.changed)
+        else:
+            stale.append(user_id)
+    refresh_members(conn, stale)
+
+
+def refresh_members(conn, user_ids):
+    """从每日汇总重新计算指定会员的成就（用于补录和删除）"""
+    for user_id in user_ids:
+        rows = conn.execute("""
+            SELECT day, exercise_type, record_count, value_sum, value_max
+            FROM daily_rollups WHERE user_id = ? ORDER BY day
+        """, (user_id,)).fetchall()
+        conn.execute("DELETE FROM member_achievements WHERE user_id = ?", (user_id,))
+        state = compute_state(rows)
+        _save_state(conn, user_id, state, state.values)
+
+
+def rebuild_achievements(conn):
+    """从每日汇总重新生成所有会员的成就"""
+    conn.execute("DELETE FROM member_achievements")
+    # 按主键顺序流式读取，不一次载入全部汇总
+    rows = conn.execute("""
+        SELECT user_id, day, exercise_type, record_count, value_sum, value_max
+        FROM daily_rollups ORDER BY user_id, day
+    """)
+    for user_id, member_rows in itertools.groupby(rows, key=lambda row: row[0]):
+        state = compute_state(row[1:] for row in member_rows)
+        _save_state(conn, user_id, state, state.values)
+
+
+def summarize(rows, today):
+    """将成就表中一位会员的行 (名称, 数值, 日序号) 整理为 MemberAchievements"""
+    values = {name: (value, day) for name, value, day in rows}
+    bests = {name[5:]: entry for name, entry in values.items() if name.startswith("best:")}
+    streak, last_day = values.get("streak", (0, None))
+    # 今天或昨天运动过，连续天数才未中断
+    current_streak = streak if last_day is not None and last_day >= today - 1 else 0
+    milestones = sorted(
+        ((name, day) for name, (_, day) in values.items() if name.startswith("milestone:")),
+        key=lambda item: item[1], reverse=True
+    )
+    return MemberAchievements(bests, current_streak, values.get("longest_streak", (0, None))[0],
+                              values.get("sessions", (0, None))[0], milestones)
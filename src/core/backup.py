@@ -0,0 +1,215 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+
+from config.app_config import BACKUP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = "exercise_data_"
+BACKUP_TIME_FORMAT = "%Y%m%d_%H%M%S"
+STATE_FILE = "backup_state.json"
+
+# 用于判断数据库自上次备份后是否变化的查询，表不存在时跳过
+FINGERPRINT_QUERIES = (
+    "PRAGMA user_version",
+    "SELECT COUNT(*), MAX(id) FROM exercise_records",
+    "SELECT COUNT(*), MAX(id) FROM users",
+    "SELECT TOTAL(record_count), TOTAL(value_sum), TOTAL(time_sum) FROM daily_rollups",
+    "SELECT COUNT(*), MAX(record_id) FROM rep_metrics",
+    "SELECT COUNT(*), MAX(record_id) FROM sessions",
+)
+
+
+class BackupAborted(Exception):
+    """备份服务停止时中断正在进行的备份"""
+
+
+class BackupService:
+    """后台在线备份
+
+    使用 SQLite 在线备份API按页分步复制，步间让出CPU，备份期间
+    其他连接可以正常读写。数据库未变化时跳过，按保留策略轮转旧备份，
+    并可将较早的快照压缩为 .gz。
+    """
+
+    def __init__(self, db_path, backup_dir="backups", interval=6 * 3600, startup_delay=10.0,
+                 pages_per_step=256, step_pause=0.005, keep_last=5, keep_daily=14,
+                 compress=True):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.interval = interval
+        self.startup_delay = startup_delay
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self.compress = compress
+        self.thread = None
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+
+    def start(self):
+        """启动后台备份线程"""
+        if self.thread and self.thread.is_alive():
+            return
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name="db-backup", daemon=True)
+        self.thread.start()
+
+    def close(self, timeout=5.0):
+        """停止后台线程，正在进行的备份会被中断"""
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _run(self):
+        if self._stop.wait(self.startup_delay):
+            return
+        while True:
+            success, result = self.run_backup()
+            if not success:
+                logger.error(f"数据库备份失败: {result}")
+            if self._stop.wait(self.interval):
+                return
+
+    def fingerprint(self, conn):
+        """计算数据库内容指纹"""
+        digest = hashlib.sha1()
+        for sql in FINGERPRINT_QUERIES:
+            try:
+                row = conn.execute(sql).fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            digest.update(repr(row).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _load_state(self):
+        try:
+            with open(os.path.join(self.backup_dir, STATE_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        path = os.path.join(self.backup_dir, STATE_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def _progress(self, status, remaining, total):
+        if self._stop.is_set():
+            raise BackupAborted()
+        # 每步之间短暂休眠，避免长时间占用磁盘和GIL
+        if self.step_pause:
+            time.sleep(self.step_pause)
+
+    def run_backup(self, force=False):
+        """执行一次备份，返回 (是否成功, 备份路径或原因)"""
+        with self._run_lock:
+            os.makedirs(self.backup_dir, exist_ok=True)
+            source = sqlite3.connect(self.db_path, timeout=5.0)
+            temp_path = None
+            try:
+                fingerprint = self.fingerprint(source)
+                state = self._load_state()
+                last_path = state.get("path")
+                if (not force and state.get("fingerprint") == fingerprint
+                        and last_path and os.path.exists(last_path)):
+                    logger.info("数据库自上次备份后未变化，跳过备份")
+                    return True, last_path
+
+                name = f"{BACKUP_PREFIX}{datetime.now().strftime(BACKUP_TIME_FORMAT)}.db"
+                backup_path = os.path.join(self.backup_dir, name)
+                temp_path = backup_path + ".tmp"
+                start = time.perf_counter()
+                target = sqlite3.connect(temp_path)
+                try:
+                    source.backup(target, pages=self.pages_per_step, progress=self._progress)
+                    # 备份文件独立使用，不需要WAL
+                    target.execute("PRAGMA journal_mode = DELETE")
+                finally:
+                    target.close()
+                os.replace(temp_path, backup_path)
+            except BackupAborted:
+                self._remove(temp_path)
+                return False, "备份已中断"
+            except (sqlite3.Error, OSError) as e:
+                if temp_path:
+                    self._remove(temp_path)
+                return False, str(e)
+            finally:
+                source.close()
+
+            self._save_state({"fingerprint": fingerprint, "path": backup_path,
+                              "time": datetime.now().isoformat()})
+            logger.info(f"数据库已备份到 {backup_path}，耗时 {time.perf_counter() - start:.2f} 秒")
+            self.rotate()
+            return True, backup_path
+
+    def list_backups(self):
+        """按时间从新到旧列出 (时间, 路径)"""
+        backups = []
+        for name in os.listdir(self.backup_dir):
+            if not name.startswith(BACKUP_PREFIX):
+                continue
+            stem = name[len(BACKUP_PREFIX):]
+            for suffix in (".db", ".db.gz"):
+                if stem.endswith(suffix):
+                    try:
+                        created = datetime.strptime(stem[:-len(suffix)], BACKUP_TIME_FORMAT)
+                    except ValueError:
+                        break
+                    backups.append((created, os.path.join(self.backup_dir, name)))
+                    break
+        backups.sort(reverse=True)
+        return backups
+
+    def rotate(self):
+        """按保留策略删除旧备份，并压缩最新一份以外的快照"""
+        backups = self.list_backups()
+        keep = set(path for _, path in backups[:self.keep_last])
+        # 最近 keep_daily 天内每天保留最新的一份
+        oldest_day = datetime.now().date() - timedelta(days=self.keep_daily)
+        seen_days = set()
+        for created, path in backups:
+            day = created.date()
+            if day > oldest_day and day not in seen_days:
+                seen_days.add(day)
+                keep.add(path)
+
+        for index, (_, path) in enumerate(backups):
+            if path not in keep:
+                self._remove(path)
+                logger.info(f"删除过期备份: {path}")
+            elif self.compress and index > 0 and path.endswith(".db"):
+                self._compress(path)
+
+    @staticmethod
+    def _compress(path):
+        try:
+            with open(path, "rb") as src, gzip.open(path + ".gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(path + ".gz.tmp", path + ".gz")
+            os.remove(path)
+        except OSError as e:
+            logger.error(f"压缩备份失败 {path}: {str(e)}")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def create_backup_service(db_path):
+    """根据配置创建备份服务"""
+    return BackupService(db_path, **BACKUP_CONFIG)
@@ -0,0 +1,205 @@
+from collections import namedtuple
+
+import numpy as np
+
+# 图表中运动的固定顺序
+EXERCISE_ORDER = ("深蹲", "俯卧撑", "平板支撑", "跳绳")
+# 按当天最长时间显示趋势的运动，其他运动按当天总次数
+PEAK_EXERCISES = frozenset(("平板支撑",))
+
+# 日序号以1970-01-01为0，与 numpy 的日期零点相同
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+# 每日汇总的列式表示，codes 为运动在 exercises 中的下标
+RollupColumns = namedtuple("RollupColumns", ["exercises", "codes", "days", "counts", "totals", "maxima"])
+
+# 一条趋势线：日期(datetime64[D])和对应的数值
+TrendLine = namedtuple("TrendLine", ["exercise", "dates", "values"])
+
+# 分段对比：分段粒度、各段起始日期、运动列表和 [运动, 段] 的运动量矩阵
+PeriodTotals = namedtuple("PeriodTotals", ["bucket", "starts", "exercises", "values"])
+
+# 时间分段粒度及每段的平均天数，按从细到粗排列
+BUCKET_DAYS = {"day": 1, "week": 7, "month": 30.44, "year": 365.25}
+BUCKET_LABELS = {"day": "按日", "week": "按周", "month": "按月", "year": "按年"}
+
+
+def days_to_dates(days):
+    """日序号数组转换为 datetime64[D] 数组"""
+    return _EPOCH + np.asarray(days, dtype=np.int64).astype("timedelta64[D]")
+
+
+def to_columns(rows):
+    """将 get_daily_rollups 的结果 (运动类型, 日序号, 记录数, 总量, 最大值) 转换为列式数组"""
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return RollupColumns((), empty, empty, empty, empty, empty)
+    count = len(rows)
+    types = [row[0] for row in rows]
+    present = set(types)
+    exercises = tuple(name for name in EXERCISE_ORDER if name in present)
+    exercises += tuple(sorted(present.difference(exercises)))
+    index = {name: i for i, name in enumerate(exercises)}
+
+    def column(i):
+        # 逐列取值比 zip(*rows) 转置快得多
+        return np.fromiter((row[i] for row in rows), dtype=np.int64, count=count)
+
+    return RollupColumns(
+        exercises,
+        np.fromiter(map(index.__getitem__, types), dtype=np.int64, count=count),
+        column(1), column(2), column(3), column(4),
+    )
+
+
+def slice_days(columns, start_day=None, end_day=None):
+    """截取日序号在 [start_day, end_day) 内的行，运动列表只保留截取后仍有记录的运动"""
+    mask = np.ones(len(columns.days), dtype=bool)
+    if start_day is not None:
+        mask &= columns.days >= start_day
+    if end_day is not None:
+        mask &= columns.days < end_day
+    codes = columns.codes[mask]
+    # 保持原有顺序，重新编号
+    present = np.unique(codes)
+    remap = np.zeros(len(columns.exercises), dtype=np.int64)
+    remap[present] = np.arange(len(present))
+    exercises = tuple(columns.exercises[i] for i in present.tolist())
+    return RollupColumns(exercises, remap[codes], *(column[mask] for column in columns[2:]))
+
+
+def bucket_days(days, bucket):
+    """日序号映射为所在分段的起始日序号（周一、每月1日或每年1月1日）"""
+    if bucket == "week":
+        # 1970-01-01 是周四，(day + 3) % 7 即星期几（周一为0）
+        return days - (days + 3) % 7
+    if bucket in ("month", "year"):
+        starts = days_to_dates(days).astype("datetime64[M]" if bucket == "month" else "datetime64[Y]")
+        return (starts.astype("datetime64[D]") - _EPOCH).astype(np.int64)
+    return days
+
+
+def choose_bucket(columns, max_buckets, buckets=tuple(BUCKET_DAYS)):
+    """选择使分段数不超过 max_buckets 的最细粒度，都超过时返回最粗的粒度"""
+    if not len(columns.days):
+        return buckets[0]
+    span = int(columns.days.max()) - int(columns.days.min()) + 1
+    for bucket in buckets:
+        if span / BUCKET_DAYS[bucket] <= max_buckets:
+            return bucket
+    return buckets[-1]
+
+
+def lttb(x, y, threshold):
+    """最大三角形三桶（LTTB）降采样，保留首尾点和形状特征，返回选中点的下标"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # 除首尾外的点均分为 threshold - 2 个桶
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个桶的平均点（最后一个桶取末点）
+        if i + 2 < len(edges):
+            next_end = edges[i + 2]
+            avg_x = x[end:next_end].mean()
+            avg_y = y[end:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        # 选出与上一个选中点、下一个桶平均点组成三角形面积最大的点
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def _daily_grid(columns):
+    """按(运动, 日期)合并为稠密矩阵，返回 (起始日序号, 记录数, 总量, 最大值)，矩阵形状为 [运动, 天]"""
+    first_day = int(columns.days.min())
+    span = int(columns.days.max()) - first_day + 1
+    shape = (len(columns.exercises), span)
+    key = columns.codes * span + (columns.days - first_day)
+    size = shape[0] * span
+    counts = np.bincount(key, weights=columns.counts, minlength=size).reshape(shape)
+    totals = np.bincount(key, weights=columns.totals, minlength=size).reshape(shape)
+    maxima = np.zeros(size, dtype=np.int64)
+    np.maximum.at(maxima, key, columns.maxima)
+    return first_day, counts, totals, maxima.reshape(shape)
+
+
+def moving_average(values, window=3):
+    """滑动平均（累加和实现），长度减少 window - 1"""
+    cumsum = np.cumsum(np.concatenate(([0.0], values)))
+    return (cumsum[window:] - cumsum[:-window]) / window
+
+
+def trend_lines(columns, window=3, bucket="day", max_points=None):
+    """每种运动一条趋势线：只包含有记录的分段，超过 window 个点时做滑动平均，
+    指定 max_points 时再用 LTTB 降采样到不超过该点数"""
+    if not len(columns.days):
+        return []
+    if bucket != "day":
+        # 同一分段内的多天在网格中合并：次数和总量相加，最大值取最大
+        columns = columns._replace(days=bucket_days(columns.days, bucket))
+    first_day, counts, totals, maxima = _daily_grid(columns)
+    lines = []
+    for code, exercise in enumerate(columns.exercises):
+        offsets = np.flatnonzero(counts[code])
+        if not len(offsets):
+            continue
+        source = maxima if exercise in PEAK_EXERCISES else totals
+        values = source[code, offsets].astype(np.float64)
+        dates = days_to_dates(offsets + first_day)
+        if len(values) > window:
+            values = moving_average(values, window)
+            trim = (window - 1) // 2
+            dates = dates[trim:trim + len(values)]
+        if max_points and len(values) > max_points:
+            keep = lttb(dates.astype(np.int64), values, max_points)
+            dates, values = dates[keep], values[keep]
+        lines.append(TrendLine(exercise, dates, values))
+    return lines
+
+
+def trend_ylabel(lines):
+    """根据趋势线包含的运动确定纵轴标签"""
+    peaks = [line.exercise in PEAK_EXERCISES for line in lines]
+    if all(peaks):
+        return "时长(秒)"
+    if any(peaks):
+        return "次数 / 时长(秒)"
+    return "次数"
+
+
+def exercise_stats(columns):
+    """各运动的总量和每次平均值，返回 (运动列表, 总量数组, 平均值数组)"""
+    n = len(columns.exercises)
+    counts = np.bincount(columns.codes, weights=columns.counts, minlength=n)
+    totals = np.bincount(columns.codes, weights=columns.totals, minlength=n)
+    averages = np.divide(totals, counts, out=np.zeros(n), where=counts > 0)
+    return columns.exercises, totals, averages
+
+
+def period_totals(columns, bucket="week"):
+    """按周（周一开始）、月或年汇总各运动的运动量，只保留有记录的分段"""
+    if not len(columns.days):
+        return PeriodTotals(bucket, days_to_dates([]), columns.exercises, np.zeros((len(columns.exercises), 0)))
+    starts = bucket_days(columns.days, bucket)
+    # 先按起始日编号，再压缩掉没有记录的分段
+    unique_starts, period_index = np.unique(starts, return_inverse=True)
+    n_periods = len(unique_starts)
+    n = len(columns.exercises)
+    key = columns.codes * n_periods + period_index
+    values = np.bincount(key, weights=columns.totals, minlength=n * n_periods).reshape(n, n_periods)
+    return PeriodTotals(bucket, days_to_dates(unique_starts), columns.exercises, values)
+
+
+def weekly_totals(columns):
+    """按周（周一开始）汇总各运动的运动量，只保留有记录的周"""
+    return period_totals(columns, "week")
@@ -0,0 +1,220 @@
+import matplotlib
+import matplotlib.dates as mdates
+import numpy as np
+from matplotlib.figure import Figure
+
+from . import chart_data
+
+# 全局颜色方案
+COLOR_SCHEME = {
+    "深蹲": "#FF6B6B",    # 红色
+    "俯卧撑": "#4ECDC4",  # 青色
+    "平板支撑": "#45B7D1", # 蓝色
+    "跳绳": "#FFB347",    # 橙色
+    "总计": "#98D8AA",    # 绿色
+    "平均": "#4A90E2"     # 蓝色
+}
+BACKGROUND_COLOR = "#2b2b2b"
+FOREGROUND_COLOR = "#666666"
+BAR_WIDTH = 0.35
+# 绘图区约占 Figure 宽度的比例，用于估算可用像素
+PLOT_WIDTH_RATIO = 0.8
+# 趋势线每个点至少占的像素，超出时降采样
+POINT_SPACING = 3
+# 趋势线按日分段时最多的段数，超过则改为按周、按月
+TREND_MAX_BUCKETS = 400
+# 对比图每根柱子至少占的像素
+BAR_SPACING = 12
+# 点数不超过该值时才画圆点标记
+MARKER_LIMIT = 60
+# 对比图柱宽（天）和日期格式
+PERIOD_BAR_WIDTH = {"week": 5, "month": 20, "year": 240}
+DATE_FORMATS = {"day": "%Y-%m-%d", "week": "%Y-%m-%d", "month": "%Y-%m", "year": "%Y"}
+PERIOD_TITLES = {"week": ("每周运动对比", "周次"), "month": ("每月运动对比", "月份"), "year": ("每年运动对比", "年份")}
+
+CHART_TYPES = ("趋势图", "统计图", "对比图")
+
+# 日期轴至少显示的跨度，避免只有一两天时出现按小时的刻度
+MIN_DATE_SPAN = np.timedelta64(2, "D")
+
+
+def configure_matplotlib():
+    """设置matplotlib中文字体"""
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
+    matplotlib.rcParams['axes.unicode_minus'] = False     # 用来正常显示负号
+
+
+def date_locator():
+    """日期刻度：数据最细到天，允许较少的刻度以免退到按小时划分"""
+    return mdates.AutoDateLocator(minticks=2, maxticks=10)
+
+
+class ChartPainter:
+    """在一个长期存在的 Figure 上绘制数据分析图表
+
+    Figure 不经过 pyplot 创建，不会被 pyplot 持有，也不依赖界面，可直接用 Agg 离屏渲染。
+    切换选项时，若图表类型和运动种类不变则原地更新折线和柱子的数据，否则清空坐标轴后重画，
+    不创建新的 Figure 或画布。传入 ax 时在已有 Figure 的该坐标轴上绘制（如多图报告）。
+    """
+
+    def __init__(self, figure=None, figsize=(10, 6), ax=None):
+        if ax is not None:
+            figure = ax.figure
+        self.figure = figure or Figure(figsize=figsize, constrained_layout=True)
+        self.figure.patch.set_facecolor(BACKGROUND_COLOR)
+        self.ax = ax if ax is not None else self.figure.add_subplot()
+        self.chart_type = None
+        self.exercises = ()
+        self.artists = {}
+        self._reset(None)
+
+    def _reset(self, chart_type, exercises=()):
+        """清空坐标轴并恢复样式"""
+        ax = self.ax
+        ax.clear()
+        ax.set_axis_on()
+        ax.set_facecolor(BACKGROUND_COLOR)
+        for spine in ax.spines.values():
+            spine.set_color(FOREGROUND_COLOR)
+        ax.tick_params(colors=FOREGROUND_COLOR)
+        ax.yaxis.label.set_color(FOREGROUND_COLOR)
+        ax.xaxis.label.set_color(FOREGROUND_COLOR)
+        ax.title.set_color(FOREGROUND_COLOR)
+        self.chart_type = chart_type
+        self.exercises = tuple(exercises)
+        self.artists = {}
+
+    def _reusable(self, chart_type, exercises):
+        return self.chart_type == chart_type and self.exercises == tuple(exercises)
+
+    def plot_width(self):
+        """绘图区的大致像素宽度"""
+        width = self.figure.get_figwidth() * self.figure.dpi * PLOT_WIDTH_RATIO
+        # 与其他图共用 Figure 时按坐标轴所占的列数估算
+        spec = self.ax.get_subplotspec()
+        if spec is not None:
+            width *= len(spec.colspan) / spec.get_gridspec().ncols
+        return width
+
+    def paint(self, chart_type, columns):
+        """根据图表类型绘制列式汇总数据（chart_data.RollupColumns）"""
+        if not len(columns.days):
+            self.paint_no_data()
+        elif chart_type == "趋势图":
+            self.paint_trend(columns)
+        elif chart_type == "统计图":
+            self.paint_stats(columns)
+        else:
+            self.paint_comparison(columns)
+
+    def paint_no_data(self):
+        """显示无数据提示"""
+        self._reset("无数据")
+        self.ax.set_axis_off()
+        self.ax.text(0.5, 0.5, "暂无数据", ha="center", va="center", fontsize=24,
+                     color=FOREGROUND_COLOR, transform=self.ax.transAxes)
+
+    def paint_trend(self, columns):
+        ax = self.ax
+        # 历史越长分段越粗，再按像素宽度降采样，点数与历史长度无关
+        bucket = chart_data.choose_bucket(columns, TREND_MAX_BUCKETS)
+        max_points = max(int(self.plot_width() / POINT_SPACING), 10)
+        lines = chart_data.trend_lines(columns, bucket=bucket, max_points=max_points)
+        exercises = [line.exercise for line in lines]
+
+        if self._reusable("趋势图", exercises):
+            # 运动种类不变时只替换折线数据
+            for line in lines:
+                self.artists[line.exercise].set_data(line.dates, line.values)
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+        else:
+            self._reset("趋势图", exercises)
+            for line in lines:
+                self.artists[line.exercise], = ax.plot(
+                    line.dates, line.values,
+                    label=line.exercise,
+                    color=COLOR_SCHEME[line.exercise],
+                    linewidth=2,
+                    markersize=6
+                )
+            ax.set_xlabel("日期")
+            ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+            ax.grid(True, color=FOREGROUND_COLOR, alpha=0.3)
+            ax.tick_params(axis='x', labelrotation=45)
+
+        for line in lines:
+            # 点很密时只画折线
+            self.artists[line.exercise].set_marker('o' if len(line.values) <= MARKER_LIMIT else '')
+        ax.set_title(f"运动趋势分析（{chart_data.BUCKET_LABELS[bucket]}）")
+        ax.xaxis.set_major_locator(date_locator())
+        ax.xaxis.set_major_formatter(mdates.DateFormatter(DATE_FORMATS[bucket]))
+        ax.set_ylabel(chart_data.trend_ylabel(lines))
+        # 设置合适的日期范围（按周、按月时首个点是分段起始日，可能早于第一条记录）
+        first = min(line.dates[0] for line in lines)
+        last = max(line.dates[-1] for line in lines)
+        if last - first < MIN_DATE_SPAN:
+            first, last = first - MIN_DATE_SPAN / 2, last + MIN_DATE_SPAN / 2
+        ax.set_xlim(first, last)
+
+    def paint_stats(self, columns):
+        ax = self.ax
+        exercises, totals, averages = chart_data.exercise_stats(columns)
+
+        if self._reusable("统计图", exercises):
+            # 运动种类不变时只修改柱高和数值标签
+            for bar, label, v in zip(self.artists["totals"], self.artists["total_labels"], totals):
+                bar.set_height(v)
+                label.set_y(v)
+                label.set_text(str(int(v)))
+            for bar, label, v in zip(self.artists["averages"], self.artists["average_labels"], averages):
+                bar.set_height(v)
+                label.set_y(v)
+                label.set_text(f"{v:.1f}")
+            ax.relim()
+            ax.autoscale_view()
+            return
+
+        self._reset("统计图", exercises)
+        x = np.arange(len(exercises))
+        # 创建双柱状图
+        self.artists["totals"] = ax.bar(x - BAR_WIDTH/2, totals, BAR_WIDTH, label='总计', color='#FF6B6B')
+        self.artists["averages"] = ax.bar(x + BAR_WIDTH/2, averages, BAR_WIDTH, label='平均', color='#4ECDC4')
+
+        ax.set_title("运动统计分析")
+        ax.set_xticks(x)
+        ax.set_xticklabels(exercises)
+        ax.legend()
+
+        # 添加数值标签
+        self.artists["total_labels"] = [
+            ax.text(i - BAR_WIDTH/2, v, str(int(v)), ha='center', va='bottom') for i, v in enumerate(totals)
+        ]
+        self.artists["average_labels"] = [
+            ax.text(i + BAR_WIDTH/2, v, f"{v:.1f}", ha='center', va='bottom') for i, v in enumerate(averages)
+        ]
+
+    def paint_comparison(self, columns):
+        # 段数随时间范围变化，堆叠柱状图清空后重画
+        ax = self.ax
+        # 周数超过可用宽度时改为按月、按年对比，柱子数量有上限
+        max_bars = max(int(self.plot_width() / BAR_SPACING), 4)
+        bucket = chart_data.choose_bucket(columns, max_bars, buckets=("week", "month", "year"))
+        periods = chart_data.period_totals(columns, bucket)
+        self._reset("对比图", periods.exercises)
+
+        bottom = np.zeros(len(periods.starts))
+        for exercise, values in zip(periods.exercises, periods.values):
+            ax.bar(periods.starts, values, width=PERIOD_BAR_WIDTH[bucket], bottom=bottom,
+                   label=exercise, color=COLOR_SCHEME.get(exercise))
+            bottom += values
+
+        title, xlabel = PERIOD_TITLES[bucket]
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel("运动量")
+        ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+        ax.xaxis.set_major_locator(date_locator())
+        ax.xaxis.set_major_formatter(mdates.DateFormatter(DATE_FORMATS[bucket]))
+        # 自动旋转日期标签
+        ax.tick_params(axis='x', labelrotation=45)
@@ -1,100 +1,976 @@
 import sqlite3
-import json
-import os
-from datetime import datetime
-import shutil
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+import logging
+from .rep_metrics import pack_events, unpack_events
+from .session_series import decode_series
+from .query_cache import QueryCache, CacheScope
+from . import achievements
+
+logger = logging.getLogger(__name__)
+
+# 连接级别的性能参数
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",      # 约16MB页缓存
+    "PRAGMA mmap_size = 134217728",    # 128MB内存映射
+    "PRAGMA busy_timeout = 5000",
+)
+STATEMENT_CACHE_SIZE = 256
+
+# 一次写入涉及的会员超过该数量时直接清空查询缓存
+CACHE_CLEAR_MEMBERS = 64
+
+# 升级前的记录和未选择会员时的记录都属于默认会员
+DEFAULT_USER_ID = 1
+DEFAULT_USER_NAME = "默认会员"
+
+# 日序号：本地日期距1970-01-01的天数
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def local_day(value=None):
+    """将本地日期/时间转换为日序号，默认今天"""
+    if value is None:
+        value = date.today()
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def day_to_date(day):
+    """将日序号转换回日期"""
+    return date.fromordinal(day + EPOCH_ORDINAL)
+
+
+def day_start_epoch(day):
+    """日序号对应本地零点的UTC时间戳"""
+    return int(datetime.combine(day_to_date(day), datetime.min.time()).timestamp())
+
+
+def week_start_day(day):
+    """日序号所在周（周一开始）的第一天"""
+    return day - day_to_date(day).weekday()
+
+
+def time_range_start(time_range):
+    """时间范围选项对应的起始日序号，“全部”返回None"""
+    today = date.today()
+    if time_range == "今天":
+        return local_day(today)
+    elif time_range == "本周":
+        return local_day(today - timedelta(days=today.weekday()))
+    elif time_range == "本月":
+        return local_day(today.replace(day=1))
+    return None
+
+
+def _migrate_base_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            exercise_type TEXT NOT NULL,
+            count_or_duration INTEGER NOT NULL,
+            exercise_time INTEGER NOT NULL,
+            notes TEXT
+        )
+    ''')
+
+    # 每次运动的质量指标，以紧凑的二进制格式存储
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rep_metrics (
+            record_id INTEGER PRIMARY KEY REFERENCES exercise_records(id),
+            events BLOB NOT NULL
+        )
+    ''')
+
+
+def _migrate_epoch_day(conn):
+    """增加整数时间戳和本地日序号列，并建立索引"""
+    conn.execute("ALTER TABLE exercise_records ADD COLUMN ts_epoch INTEGER")
+    conn.execute("ALTER TABLE exercise_records ADD COLUMN day INTEGER")
+    # timestamp 为本地时间的ISO文本，'utc' 修饰符将其换算为UTC时间戳
+    conn.execute("""
+        UPDATE exercise_records SET
+            ts_epoch = CAST(strftime('%s', timestamp, 'utc') AS INTEGER),
+            day = CAST(julianday(date(timestamp)) - 2440587.5 AS INTEGER)
+    """)
+    # 附带数值列使按类型/日期的聚合只需扫描索引
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_records_type_day
+        ON exercise_records(exercise_type, day, count_or_duration, exercise_time)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_records_day ON exercise_records(day)")
+    # 按时间排序的列表查询使用时间戳索引，范围条件也用时间戳表达
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_records_ts ON exercise_records(ts_epoch)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_records_type_ts ON exercise_records(exercise_type, ts_epoch)")
+
+
+def rebuild_daily_rollups(conn):
+    """根据运动记录重新生成每日汇总表"""
+    conn.execute("DELETE FROM daily_rollups")
+    conn.execute("""
+        INSERT INTO daily_rollups (user_id, day, exercise_type, record_count, value_sum, value_max, time_sum)
+        SELECT user_id, day, exercise_type, COUNT(*), SUM(count_or_duration),
+               MAX(count_or_duration), SUM(exercise_time)
+        FROM exercise_records
+        GROUP BY user_id, day, exercise_type
+    """)
+
+
+def _rebuild_rollups_by_day(conn):
+    """版本3至5的每日汇总表（不区分会员）"""
+    conn.execute("DELETE FROM daily_rollups")
+    conn.execute("""
+        INSERT INTO daily_rollups (day, exercise_type, record_count, value_sum, value_max, time_sum)
+        SELECT day, exercise_type, COUNT(*), SUM(count_or_duration),
+               MAX(count_or_duration), SUM(exercise_time)
+        FROM exercise_records
+        GROUP BY day, exercise_type
+    """)
+
+
+def _migrate_daily_rollups(conn):
+    """增加按(日期, 运动类型)的每日汇总表"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            day INTEGER NOT NULL,
+            exercise_type TEXT NOT NULL,
+            record_count INTEGER NOT NULL,
+            value_sum INTEGER NOT NULL,
+            value_max INTEGER NOT NULL,
+            time_sum INTEGER NOT NULL,
+            PRIMARY KEY (day, exercise_type)
+        ) WITHOUT ROWID
+    ''')
+    _rebuild_rollups_by_day(conn)
+
+
+def _migrate_dedup_index(conn):
+    """按(时间戳, 运动类型, 数值)建立唯一索引，用于导入和日志重放去重"""
+    # 已存在的重复记录（同一秒内类型和数值相同）保留最早写入的一条，其余连同质量指标
+    # 移入 duplicate_records 备查，不直接删除
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS duplicate_records (
+            id INTEGER PRIMARY KEY,
+            kept_id INTEGER NOT NULL,
+            timestamp TEXT NOT NULL,
+            exercise_type TEXT NOT NULL,
+            count_or_duration INTEGER NOT NULL,
+            exercise_time INTEGER NOT NULL,
+            notes TEXT,
+            ts_epoch INTEGER,
+            day INTEGER,
+            events BLOB
+        )
+    ''')
+    moved = conn.execute("""
+        INSERT INTO duplicate_records
+            (id, kept_id, timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch, day, events)
+        SELECT r.id, k.kept_id, r.timestamp, r.exercise_type, r.count_or_duration, r.exercise_time,
+               r.notes, r.ts_epoch, r.day, m.events
+        FROM exercise_records r
+        JOIN (
+            SELECT MIN(id) AS kept_id, ts_epoch, exercise_type, count_or_duration
+            FROM exercise_records
+            GROUP BY ts_epoch, exercise_type, count_or_duration
+            HAVING COUNT(*) > 1
+        ) k ON k.ts_epoch IS r.ts_epoch AND k.exercise_type = r.exercise_type
+           AND k.count_or_duration = r.count_or_duration AND r.id > k.kept_id
+        LEFT JOIN rep_metrics m ON m.record_id = r.id
+    """).rowcount
+    if moved:
+        conn.execute("DELETE FROM rep_metrics WHERE record_id IN (SELECT id FROM duplicate_records)")
+        conn.execute("DELETE FROM exercise_records WHERE id IN (SELECT id FROM duplicate_records)")
+        _rebuild_rollups_by_day(conn)
+        logger.warning(f"{moved} 条重复记录已移入 duplicate_records 表")
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_records_dedup
+        ON exercise_records(ts_epoch, exercise_type, count_or_duration)
+    """)
+
+
+def _migrate_sessions(conn):
+    """增加运动会话表和逐帧时序数据表"""
+    # 会话概要与记录一一对应，时序数据单独存放，避免扫描会话时读取大字段
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            record_id INTEGER PRIMARY KEY REFERENCES exercise_records(id),
+            value_name TEXT NOT NULL,
+            start_epoch REAL NOT NULL,
+            end_epoch REAL NOT NULL,
+            frame_count INTEGER NOT NULL,
+            rep_count INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_series (
+            record_id INTEGER PRIMARY KEY REFERENCES sessions(record_id),
+            data BLOB NOT NULL
+        )
+    ''')
+
+
+def _migrate_members(conn):
+    """增加会员表，运动记录和每日汇总按会员分区"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            created_at TEXT NOT NULL
+        )
+    ''')
+    # 已有记录归入默认会员
+    conn.execute(
+        "INSERT OR IGNORE INTO users (id, name, created_at) VALUES (?, ?, ?)",
+        (DEFAULT_USER_ID, DEFAULT_USER_NAME, datetime.now().isoformat())
+    )
+    conn.execute(f"ALTER TABLE exercise_records ADD COLUMN user_id INTEGER NOT NULL DEFAULT {DEFAULT_USER_ID}")
+
+    # 界面查询都限定在一位会员内，索引以 user_id 开头；
+    # 按日期的统计已由汇总表承担，旧的按日期索引不再需要
+    for name in ("idx_records_type_day", "idx_records_day", "idx_records_type_ts", "idx_records_dedup"):
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.execute("CREATE INDEX idx_records_user_ts ON exercise_records(user_id, ts_epoch)")
+    conn.execute("CREATE INDEX idx_records_user_type_ts ON exercise_records(user_id, exercise_type, ts_epoch)")
+    # 不同会员可能在同一秒完成相同的运动
+    conn.execute("""
+        CREATE UNIQUE INDEX idx_records_dedup
+        ON exercise_records(user_id, ts_epoch, exercise_type, count_or_duration)
+    """)
+
+    conn.execute("DROP TABLE daily_rollups")
+    conn.execute('''
+        CREATE TABLE daily_rollups (
+            user_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            exercise_type TEXT NOT NULL,
+            record_count INTEGER NOT NULL,
+            value_sum INTEGER NOT NULL,
+            value_max INTEGER NOT NULL,
+            time_sum INTEGER NOT NULL,
+            PRIMARY KEY (user_id, day, exercise_type)
+        ) WITHOUT ROWID
+    ''')
+    rebuild_daily_rollups(conn)
+
+
+def _migrate_sync_state(conn):
+    """增加同步进度表，记录每个同步目标已推送的最大记录ID"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            target TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+
+
+def _migrate_achievements(conn):
+    """增加会员成就表（个人最佳、连续天数、里程碑），并由每日汇总生成"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS member_achievements (
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            value INTEGER NOT NULL,
+            day INTEGER,
+            PRIMARY KEY (user_id, name)
+        ) WITHOUT ROWID
+    ''')
+    achievements.rebuild_achievements(conn)
+
+
+# 数据库结构迁移：(版本号, 说明, 迁移函数)，按版本顺序执行
+MIGRATIONS = [
+    (1, "基础表结构", _migrate_base_schema),
+    (2, "整数时间戳和日序号列", _migrate_epoch_day),
+    (3, "每日汇总表", _migrate_daily_rollups),
+    (4, "记录去重唯一索引", _migrate_dedup_index),
+    (5, "运动会话和逐帧时序数据", _migrate_sessions),
+    (6, "会员表和按会员分区", _migrate_members),
+    (7, "同步进度表", _migrate_sync_state),
+    (8, "会员成就表", _migrate_achievements),
+]
+
+
+# 待写入的运动记录，metrics 为已打包的质量指标，series 为逐帧数据记录器（SeriesRecorder）
+ExerciseRecord = namedtuple(
+    "ExerciseRecord",
+    ["timestamp", "exercise_type", "count_or_duration", "exercise_time", "notes", "metrics", "series",
+     "user_id"],
+    defaults=(None, DEFAULT_USER_ID)
+)
+
+
+def make_record(exercise_type, count_or_duration, exercise_time, notes="", metric_events=None, timestamp=None,
+                series=None, user_id=DEFAULT_USER_ID):
+    """创建运动记录，时间默认为当前时间"""
+    return ExerciseRecord(
+        timestamp or datetime.now(),
+        exercise_type,
+        count_or_duration,
+        exercise_time,
+        notes,
+        pack_events(metric_events) if metric_events else None,
+        series if series is not None and len(series) else None,
+        user_id
+    )
+
+
+class QueryStats:
+    """线程安全的查询次数和耗时统计"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.count = 0
+            self.total_time = 0.0
+            self.by_query = {}
+
+    def record(self, sql, elapsed):
+        key = " ".join(sql.split())[:80]
+        with self.lock:
+            self.count += 1
+            self.total_time += elapsed
+            count, total = self.by_query.get(key, (0, 0.0))
+            self.by_query[key] = (count + 1, total + elapsed)
+
+    def snapshot(self):
+        """返回当前统计的副本"""
+        with self.lock:
+            return {
+                "count": self.count,
+                "total_time": self.total_time,
+                "by_query": dict(self.by_query),
+            }
+
 
 class DatabaseManager:
-    def __init__(self, db_path='exercise_data.db'):
+    def __init__(self, db_path='exercise_data.db', cache_size=256):
         self.db_path = db_path
-        self.backup_dir = 'backups'
-        if not os.path.exists(self.backup_dir):
-            os.makedirs(self.backup_dir)
-    
-    def init_database(self):
-        """初始化数据库"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS exercise_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                exercise_type TEXT NOT NULL,
-                count_or_duration INTEGER NOT NULL,
-                exercise_time INTEGER NOT NULL,
-                notes TEXT
+
+        # 每个线程持有一个长连接，避免每次查询重新打开数据库
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.stats = QueryStats()
+        # 统计和图表查询结果缓存，写入提交后按会员、日期和运动类型失效
+        self.cache = QueryCache(cache_size)
+
+    def get_connection(self):
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=5.0,
+                isolation_level=None,  # 显式管理事务
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
             )
-        ''')
-        
-        conn.commit()
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def execute(self, sql, params=()):
+        """执行SQL并记录耗时，返回游标"""
+        start = time.perf_counter()
+        try:
+            return self.get_connection().execute(sql, params)
+        finally:
+            self.stats.record(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_params):
+        start = time.perf_counter()
+        try:
+            return self.get_connection().executemany(sql, seq_of_params)
+        finally:
+            self.stats.record(sql, time.perf_counter() - start)
+
+    def fetchone(self, sql, params=()):
+        start = time.perf_counter()
+        try:
+            return self.get_connection().execute(sql, params).fetchone()
+        finally:
+            self.stats.record(sql, time.perf_counter() - start)
+
+    def fetchall(self, sql, params=()):
+        start = time.perf_counter()
+        try:
+            return self.get_connection().execute(sql, params).fetchall()
+        finally:
+            self.stats.record(sql, time.perf_counter() - start)
+
+    def fetch_value(self, sql, params=(), default=None):
+        """查询单个值，结果为空时返回默认值"""
+        row = self.fetchone(sql, params)
+        if row is None or row[0] is None:
+            return default
+        return row[0]
+
+    @contextmanager
+    def transaction(self):
+        """在当前线程的连接上开启写事务"""
+        conn = self.get_connection()
+        if conn.in_transaction:
+            # 嵌套调用时并入外层事务
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.invalidations = []
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            self._local.invalidations = []
+            raise
+        else:
+            conn.execute("COMMIT")
+            # 提交后再使缓存失效，避免其他线程在提交前读到旧数据并重新缓存
+            invalidations, self._local.invalidations = self._local.invalidations, []
+            for args in invalidations:
+                if args is None:
+                    self.cache.clear()
+                else:
+                    self.cache.invalidate(*args)
+
+    def _invalidate(self, user_id=None, start_day=None, end_day=None, exercise_types=None):
+        """登记当前事务影响的数据范围，提交后使相关缓存失效"""
+        self._local.invalidations.append((user_id, start_day, end_day, exercise_types))
+
+    def _invalidate_all(self):
+        self._local.invalidations.append(None)
+
+    def _invalidate_rows(self, rows):
+        """按会员合并写入行 (user_id, day, exercise_type) 的范围后登记失效"""
+        changes = {}
+        for user_id, day, exercise_type in rows:
+            change = changes.get(user_id)
+            if change is None:
+                changes[user_id] = [day, day, {exercise_type}]
+            else:
+                change[0] = min(change[0], day)
+                change[1] = max(change[1], day)
+                change[2].add(exercise_type)
+        if len(changes) > CACHE_CLEAR_MEMBERS:
+            self._invalidate_all()
+            return
+        for user_id, (start_day, end_day, exercise_types) in changes.items():
+            self._invalidate(user_id, start_day, end_day, frozenset(exercise_types))
+
+    def close(self):
+        """关闭所有线程的连接"""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+    def release_connection(self):
+        """关闭当前线程的连接，供退出前的后台线程调用"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._connections_lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
         conn.close()
-    
-    def save_exercise_record(self, exercise_type, count_or_duration, exercise_time, notes=""):
-        """保存运动记录"""
+
+    def init_database(self):
+        """初始化数据库，执行尚未应用的结构迁移"""
+        version = self.fetch_value("PRAGMA user_version", default=0)
+        for target, description, migrate in MIGRATIONS:
+            if target <= version:
+                continue
+            logger.info(f"数据库迁移到版本 {target}: {description}")
+            with self.transaction() as conn:
+                migrate(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+            version = target
+        self.cache.clear()
+        self.execute("PRAGMA optimize")
+
+    def insert_records(self, records):
+        """在一个事务中批量写入运动记录并更新每日汇总，返回记录ID列表
+
+        与已有记录重复（同一会员、同一秒、同类型、同数值）的记录被忽略，对应ID为None。
+        """
+        record_ids = []
+        with self.transaction():
+            for record in records:
+                timestamp = record.timestamp
+                day = local_day(timestamp)
+                cursor = self.execute('''
+                    INSERT OR IGNORE INTO exercise_records
+                    (timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch, day, user_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (timestamp.isoformat(), record.exercise_type, record.count_or_duration,
+                      record.exercise_time, record.notes, int(timestamp.timestamp()), day, record.user_id))
+                if cursor.rowcount == 0:
+                    record_ids.append(None)
+                    continue
+                record_id = cursor.lastrowid
+                record_ids.append(record_id)
+                self._invalidate(record.user_id, day, day, frozenset((record.exercise_type,)))
+
+                # 在同一事务中更新每日汇总
+                self.execute('''
+                    INSERT INTO daily_rollups
+                    (user_id, day, exercise_type, record_count, value_sum, value_max, time_sum)
+                    VALUES (?, ?, ?, 1, ?, ?, ?)
+                    ON CONFLICT(user_id, day, exercise_type) DO UPDATE SET
+                        record_count = record_count + 1,
+                        value_sum = value_sum + excluded.value_sum,
+                        value_max = MAX(value_max, excluded.value_max),
+                        time_sum = time_sum + excluded.time_sum
+                ''', (record.user_id, day, record.exercise_type, record.count_or_duration,
+                      record.count_or_duration, record.exercise_time))
+                achievements.apply_record(self, record.user_id, day, record.exercise_type,
+                                          record.count_or_duration)
+
+                # 保存动作质量指标
+                if record.metrics:
+                    self.execute(
+                        "INSERT INTO rep_metrics (record_id, events) VALUES (?, ?)",
+                        (record_id, record.metrics)
+                    )
+
+                # 保存逐帧时序数据
+                if record.series is not None:
+                    self._insert_session(record_id, record.series)
+        return record_ids
+
+    def _insert_session(self, record_id, series):
+        timestamps = series.timestamps
+        self.execute('''
+            INSERT INTO sessions (record_id, value_name, start_epoch, end_epoch, frame_count, rep_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (record_id, series.value_name, timestamps[0], timestamps[-1],
+              len(timestamps), len(series.rep_times)))
+        self.execute(
+            "INSERT INTO session_series (record_id, data) VALUES (?, ?)",
+            (record_id, series.encode())
+        )
+
+    def bulk_insert_rows(self, rows):
+        """在一个事务中用 executemany 批量导入已规范化的记录，返回实际写入的行数
+
+        rows 的每项为 (timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch, day, user_id)，
+        重复记录由唯一索引忽略，每日汇总和会员成就按新写入的记录一次性更新。
+        """
+        with self.transaction():
+            last_id = self.fetch_value("SELECT MAX(id) FROM exercise_records", default=0)
+            inserted = self.executemany('''
+                INSERT OR IGNORE INTO exercise_records
+                (timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch, day, user_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows).rowcount
+            if inserted > 0:
+                self._invalidate_rows((row[7], row[6], row[1]) for row in rows)
+                self.execute('''
+                    INSERT INTO daily_rollups
+                    (user_id, day, exercise_type, record_count, value_sum, value_max, time_sum)
+                    SELECT user_id, day, exercise_type, COUNT(*), SUM(count_or_duration),
+                           MAX(count_or_duration), SUM(exercise_time)
+                    FROM exercise_records
+                    WHERE id > ?
+                    GROUP BY user_id, day, exercise_type
+                    ON CONFLICT(user_id, day, exercise_type) DO UPDATE SET
+                        record_count = record_count + excluded.record_count,
+                        value_sum = value_sum + excluded.value_sum,
+                        value_max = MAX(value_max, excluded.value_max),
+                        time_sum = time_sum + excluded.time_sum
+                ''', (last_id,))
+                achievements.apply_rows(self, self.fetchall('''
+                    SELECT user_id, day, exercise_type, COUNT(*), SUM(count_or_duration), MAX(count_or_duration)
+                    FROM exercise_records
+                    WHERE id > ?
+                    GROUP BY user_id, day, exercise_type
+                    ORDER BY user_id, day
+                ''', (last_id,)))
+        return max(inserted, 0)
+
+    def save_exercise_record(self, exercise_type, count_or_duration, exercise_time, notes="", metric_events=None,
+                             user_id=DEFAULT_USER_ID):
+        """保存运动记录，返回记录ID"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO exercise_records 
-                (timestamp, exercise_type, count_or_duration, exercise_time, notes)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (datetime.now().isoformat(), exercise_type, count_or_duration, exercise_time, notes))
-            
-            conn.commit()
-            
+            record = make_record(exercise_type, count_or_duration, exercise_time, notes, metric_events,
+                                 user_id=user_id)
+            return self.insert_records([record])[0]
+
         except sqlite3.Error as e:
             logger.error(f"数据库错误: {str(e)}")
             raise
-            
-        finally:
-            if 'conn' in locals():
-                conn.close()
-    
-    def backup_database(self):
-        """创建数据库备份"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_path = os.path.join(self.backup_dir, f'exercise_data_{timestamp}.db')
-        
+
+    def add_user(self, name):
+        """添加会员，名称已存在时返回已有会员的ID"""
+        name = name.strip()
+        if not name:
+            raise ValueError("会员名称不能为空")
+        with self.transaction():
+            self.execute(
+                "INSERT OR IGNORE INTO users (name, created_at) VALUES (?, ?)",
+                (name, datetime.now().isoformat())
+            )
+            return self.fetch_value("SELECT id FROM users WHERE name = ?", (name,))
+
+    def find_user(self, name):
+        """按名称查找会员ID，不存在时返回None"""
+        return self.fetch_value("SELECT id FROM users WHERE name = ?", (name.strip(),))
+
+    def get_user_name(self, user_id):
+        return self.fetch_value("SELECT name FROM users WHERE id = ?", (user_id,))
+
+    def search_users(self, prefix="", limit=20):
+        """按名称前缀查找会员，返回 [(id, 名称)]，使用名称唯一索引做范围查询"""
+        if not prefix:
+            return self.fetchall("SELECT id, name FROM users ORDER BY name LIMIT ?", (limit,))
+        return self.fetchall(
+            "SELECT id, name FROM users WHERE name >= ? AND name < ? ORDER BY name LIMIT ?",
+            (prefix, prefix + "\U0010ffff", limit)
+        )
+
+    def get_session(self, record_id):
+        """获取会话概要 (value_name, start_epoch, end_epoch, frame_count, rep_count)"""
+        return self.fetchone('''
+            SELECT value_name, start_epoch, end_epoch, frame_count, rep_count
+            FROM sessions WHERE record_id = ?
+        ''', (record_id,))
+
+    def load_session_series(self, record_id):
+        """载入会话的逐帧数据，返回 numpy 数组组成的 SessionSeries，无数据时返回None"""
+        data = self.fetch_value("SELECT data FROM session_series WHERE record_id = ?", (record_id,))
+        return decode_series(data) if data else None
+
+    def get_metric_events(self, record_id):
+        """读取一条运动记录的质量指标事件"""
+        row = self.fetchone(
+            "SELECT events FROM rep_metrics WHERE record_id = ?", (record_id,)
+        )
+        return unpack_events(row[0]) if row else []
+
+    def delete_records(self, record_ids):
+        """删除运动记录及其质量指标和逐帧数据，并重新汇总受影响的日期，返回删除的记录数"""
+        record_ids = list(record_ids)
+        if not record_ids:
+            return 0
+        placeholders = ", ".join("?" * len(record_ids))
+        with self.transaction():
+            groups = self.fetchall(f"""
+                SELECT DISTINCT user_id, day, exercise_type FROM exercise_records
+                WHERE id IN ({placeholders})
+            """, record_ids)
+            for table in ("rep_metrics", "session_series", "sessions"):
+                self.execute(f"DELETE FROM {table} WHERE record_id IN ({placeholders})", record_ids)
+            deleted = self.execute(
+                f"DELETE FROM exercise_records WHERE id IN ({placeholders})", record_ids
+            ).rowcount
+
+            # 最大值无法增量扣除，按(会员, 日期, 运动类型)从记录重新汇总；
+            # 时间戳范围只用于走索引，前后各放宽一天（时区或夏令时变化时 day 与时间戳可能不一致），
+            # 汇总哪些记录只由 day 决定，与删除的分组完全对应
+            for user_id, day, exercise_type in groups:
+                self.execute(
+                    "DELETE FROM daily_rollups WHERE user_id = ? AND day = ? AND exercise_type = ?",
+                    (user_id, day, exercise_type)
+                )
+                self.execute("""
+                    INSERT INTO daily_rollups
+                    (user_id, day, exercise_type, record_count, value_sum, value_max, time_sum)
+                    SELECT user_id, day, exercise_type, COUNT(*), SUM(count_or_duration),
+                           MAX(count_or_duration), SUM(exercise_time)
+                    FROM exercise_records
+                    WHERE user_id = ? AND exercise_type = ? AND ts_epoch >= ? AND ts_epoch < ? AND day = ?
+                    GROUP BY user_id, day, exercise_type
+                """, (user_id, exercise_type, day_start_epoch(day) - 86400, day_start_epoch(day + 1) + 86400, day))
+            self._refresh_achievements({group[0] for group in groups})
+            self._invalidate_rows(groups)
+        return deleted
+
+    def rebuild_rollups(self):
+        """重建每日汇总表，并在同一事务中重建由汇总得出的会员成就"""
+        with self.transaction() as conn:
+            rebuild_daily_rollups(conn)
+            achievements.rebuild_achievements(conn)
+            self._invalidate_all()
+
+    def _refresh_achievements(self, user_ids):
+        """删除记录后重新计算受影响会员的成就，会员较多时整表重建"""
+        if len(user_ids) > CACHE_CLEAR_MEMBERS:
+            achievements.rebuild_achievements(self.get_connection())
+        else:
+            achievements.refresh_members(self, sorted(user_ids))
+
+    def rebuild_achievements(self):
+        """由每日汇总重建所有会员的成就"""
+        with self.transaction() as conn:
+            achievements.rebuild_achievements(conn)
+            self._invalidate_all()
+
+    def get_achievements(self, user_id):
+        """会员的个人最佳、连续天数和里程碑（achievements.MemberAchievements），按主键读取预先维护的结果"""
+        today = local_day()
+        return self.cache.load(
+            ("achievements", user_id, today), CacheScope(user_id, None, None, None),
+            lambda: achievements.summarize(self.fetchall(
+                "SELECT name, value, day FROM member_achievements WHERE user_id = ?", (user_id,)
+            ), today)
+        )
+
+    def get_today_summary(self, user_id):
+        """会员今日运动次数和总时长（秒）"""
+        today = local_day()
+
+        def load():
+            row = self.fetchone("""
+                SELECT SUM(record_count), SUM(time_sum) FROM daily_rollups
+                WHERE user_id = ? AND day = ?
+            """, (user_id, today))
+            return row[0] or 0, row[1] or 0
+
+        # 键中包含日期，跨过零点后自然查询新的一天
+        return self.cache.load(("today_summary", user_id, today), CacheScope(user_id, today, today, None), load)
+
+    def get_total_exercise_time(self, user_id):
+        """会员累计运动总时长（秒）"""
+        return self.cache.load(
+            ("total_time", user_id), CacheScope(user_id, None, None, None),
+            lambda: self.fetch_value("SELECT SUM(time_sum) FROM daily_rollups WHERE user_id = ?",
+                                     (user_id,), default=0)
+        )
+
+    def get_exercise_summaries(self, user_id):
+        """会员各运动类型的今日和累计次数/时长，返回 {运动类型: (今日, 累计)}"""
+        today = local_day()
+
+        def load():
+            rows = self.fetchall("""
+                SELECT exercise_type,
+                       SUM(CASE WHEN day = ? THEN value_sum ELSE 0 END),
+                       SUM(value_sum)
+                FROM daily_rollups
+                WHERE user_id = ?
+                GROUP BY exercise_type
+            """, (today, user_id))
+            return {row[0]: (row[1] or 0, row[2] or 0) for row in rows}
+
+        return self.cache.load(("exercise_summaries", user_id, today), CacheScope(user_id, None, None, None), load)
+
+    @staticmethod
+    def _record_filters(start_day=None, end_day=None, exercise_type="全部", user_id=None):
+        """构造运动记录的筛选条件，日期范围按 ts_epoch 过滤以使用时间索引
+
+        user_id 为None时不限会员（仅用于管理工具的全库导出）。
+        """
+        where_clause = []
+        params = []
+
+        if user_id is not None:
+            where_clause.append("user_id = ?")
+            params.append(user_id)
+
+        if start_day is not None:
+            where_clause.append("ts_epoch >= ?")
+            params.append(day_start_epoch(start_day))
+        if end_day is not None:
+            where_clause.append("ts_epoch < ?")
+            params.append(day_start_epoch(end_day + 1))
+
+        if exercise_type != "全部":
+            where_clause.append("exercise_type = ?")
+            params.append(exercise_type)
+
+        return (" WHERE " + " AND ".join(where_clause) if where_clause else ""), params
+
+    def get_history(self, user_id, time_range="全部", exercise_type="全部"):
+        """按时间范围和运动类型查询会员的历史记录"""
+        where, params = self._record_filters(time_range_start(time_range), None, exercise_type, user_id)
+        query = """
+            SELECT id, timestamp, exercise_type, count_or_duration, exercise_time, notes
+            FROM exercise_records
+        """ + where + " ORDER BY ts_epoch DESC, id DESC"
+
+        return self.fetchall(query, params)
+
+    def get_history_page(self, user_id, start_day=None, end_day=None, exercise_type="全部", before=None, offset=0,
+                         limit=50):
+        """按时间倒序分页读取会员的历史记录（键集分页）
+
+        before 为 (ts_epoch, id)，只返回排在其后（更早）的记录；offset 只用于在同一天内定位，很小。
+        每行为 (id, timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch)
+        """
+        where, params = self._record_filters(start_day, end_day, exercise_type, user_id)
+        if before is not None:
+            # 行值比较可直接在 (user_id, ts_epoch) 索引上定位，按索引顺序读取无需排序
+            where += (" AND " if where else " WHERE ") + "(ts_epoch, id) < (?, ?)"
+            params.extend(before)
+        query = """
+            SELECT id, timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch
+            FROM exercise_records
+        """ + where + " ORDER BY ts_epoch DESC, id DESC LIMIT ? OFFSET ?"
+        return self.fetchall(query, params + [limit, offset])
+
+    def get_history_rows(self, record_ids):
+        """按ID读取历史记录，行格式与 get_history_page 相同，顺序不定"""
+        record_ids = list(record_ids)
+        if not record_ids:
+            return []
+        return self.fetchall(f"""
+            SELECT id, timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch
+            FROM exercise_records
+            WHERE id IN ({','.join('?' * len(record_ids))})
+        """, record_ids)
+
+    def get_history_columns(self, user_id):
+        """按时间倒序逐行返回会员全部记录的 (id, day, exercise_type, notes)，用于建立内存检索快照"""
+        return self.execute("""
+            SELECT id, day, exercise_type, notes
+            FROM exercise_records
+            WHERE user_id = ?
+            ORDER BY ts_epoch DESC, id DESC
+        """, (user_id,))
+
+    def get_day_counts(self, user_id, start_day=None, end_day=None, exercise_type="全部"):
+        """会员每天的记录数 [(日序号, 记录数)]，按日期倒序，由每日汇总得出"""
+        where_clause = ["user_id = ?"]
+        params = [user_id]
+        if start_day is not None:
+            where_clause.append("day >= ?")
+            params.append(start_day)
+        if end_day is not None:
+            where_clause.append("day <= ?")
+            params.append(end_day)
+        if exercise_type != "全部":
+            where_clause.append("exercise_type = ?")
+            params.append(exercise_type)
+        return self.cache.load(
+            ("day_counts", user_id, start_day, end_day, exercise_type),
+            CacheScope(user_id, start_day, end_day, None if exercise_type == "全部" else exercise_type),
+            lambda: self.fetchall(f"""
+                SELECT day, SUM(record_count) FROM daily_rollups
+                WHERE {' AND '.join(where_clause)}
+                GROUP BY day
+                ORDER BY day DESC
+            """, params)
+        )
+
+    def iter_records(self, start_day=None, end_day=None, exercise_type="全部", chunk_size=5000, user_id=None):
+        """分块读取运动记录，每次返回最多 chunk_size 行，内存占用与总行数无关
+
+        每行为 (id, timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch, user_id)
+        """
+        where, params = self._record_filters(start_day, end_day, exercise_type, user_id)
+        query = """
+            SELECT id, timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch, user_id
+            FROM exercise_records
+        """ + where + " ORDER BY ts_epoch DESC, id DESC"
+
+        cursor = self.execute(query, params)
         try:
-            shutil.copy2(self.db_path, backup_path)
-            return True, backup_path
-        except Exception as e:
-            return False, str(e)
-    
-    def export_to_json(self, filepath):
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+
+    def count_records(self, start_day=None, end_day=None, exercise_type="全部", user_id=None):
+        """根据每日汇总统计记录数"""
+        return self.cache.load(
+            ("count_records", start_day, end_day, exercise_type, user_id),
+            CacheScope(user_id, start_day, end_day, None if exercise_type == "全部" else exercise_type),
+            lambda: self._count_records(start_day, end_day, exercise_type, user_id)
+        )
+
+    def _count_records(self, start_day, end_day, exercise_type, user_id):
+        where_clause = []
+        params = []
+        if user_id is not None:
+            where_clause.append("user_id = ?")
+            params.append(user_id)
+        if start_day is not None:
+            where_clause.append("day >= ?")
+            params.append(start_day)
+        if end_day is not None:
+            where_clause.append("day <= ?")
+            params.append(end_day)
+        if exercise_type != "全部":
+            where_clause.append("exercise_type = ?")
+            params.append(exercise_type)
+        query = "SELECT SUM(record_count) FROM daily_rollups"
+        if where_clause:
+            query += " WHERE " + " AND ".join(where_clause)
+        return self.fetch_value(query, params, default=0)
+
+    def get_daily_rollups(self, user_id, start_date, exercise_type="全部"):
+        """查询图表所需的每日汇总：(运动类型, 日序号, 记录数, 总量, 最大值)
+
+        user_id 为None时在SQL中按(日期, 运动类型)合并所有会员，结果行数只与天数有关；
+        start_date 为None时不限起始日期。
+        """
+        start_day = local_day(start_date) if start_date is not None else None
+        return self.cache.load(
+            ("daily_rollups", user_id, start_day, exercise_type),
+            CacheScope(user_id, start_day, None, None if exercise_type == "全部" else exercise_type),
+            lambda: self._get_daily_rollups(user_id, start_day, exercise_type)
+        )
+
+    def _get_daily_rollups(self, user_id, start_day, exercise_type):
+        where_clause = []
+        params = []
+
+        if user_id is not None:
+            where_clause.append("user_id = ?")
+            params.append(user_id)
+        if start_day is not None:
+            where_clause.append("day >= ?")
+            params.append(start_day)
+        if exercise_type != "全部":
+            where_clause.append("exercise_type = ?")
+            params.append(exercise_type)
+
+        where = " WHERE " + " AND ".join(where_clause) if where_clause else ""
+        if user_id is not None:
+            # 单个会员的汇总已按(日期, 运动类型)唯一
+            return self.fetchall(f"""
+                SELECT exercise_type, day, record_count, value_sum, value_max
+                FROM daily_rollups{where}
+                ORDER BY day
+            """, params)
+        return self.fetchall(f"""
+            SELECT exercise_type, day, SUM(record_count), SUM(value_sum), MAX(value_max)
+            FROM daily_rollups{where}
+            GROUP BY day, exercise_type
+            ORDER BY day
+        """, params)
+
+    def export_to_json(self, filepath, user_id=None):
         """导出数据为JSON格式"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, timestamp, exercise_type, count_or_duration, notes
-            FROM exercise_records
-            ORDER BY timestamp DESC
-        """)
-        
-        records = cursor.fetchall()
-        conn.close()
-        
-        # 转换为字典列表
-        data = []
-        for record in records:
-            data.append({
-                'id': record[0],
-                'timestamp': record[1],
-                'exercise_type': record[2],
-                'count_or_duration': record[3],
-                'notes': record[4]
-            })
-        
-        # 写入JSON文件
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        from .exporter import export_records
+        return export_records(self, filepath, "json", user_id=user_id)
 
 # 创建全局数据库管理器实例
 db_manager = DatabaseManager()
 
-def save_exercise_record(exercise_type, count_or_duration, exercise_time, notes=""):
+def save_exercise_record(exercise_type, count_or_duration, exercise_time, notes="", metric_events=None,
+                         user_id=DEFAULT_USER_ID):
     """全局保存运动记录函数"""
-    db_manager.save_exercise_record(exercise_type, count_or_duration, exercise_time, notes) 
\ No newline at end of file
+    return db_manager.save_exercise_record(exercise_type, count_or_duration, exercise_time, notes, metric_events,
+                                           user_id)
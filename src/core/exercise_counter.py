@@ -1,11 +1,24 @@
 import mediapipe as mp
 import numpy as np
+import time
+from .session_series import SeriesRecorder
 
 class ExerciseCounter:
+    # 逐帧记录的关键数值名称及存储精度，由子类设置
+    series_name = None
+    series_step = 0.5
+    
     def __init__(self, exercise_name):
         self.exercise_name = exercise_name
         self.counter = 0
         self.mp_pose = mp.solutions.pose
+        # 时钟函数，默认使用系统时间；压力测试时可替换为模拟时钟
+        self.clock = time.time
+        # 动作质量指标跟踪器，由子类按需创建
+        self.metrics = None
+        # 本次运动的逐帧关键数值和动作完成时间
+        self.record_series = True
+        self.series = self.create_series()
         
     def calculate_angle(self, a, b, c):
         """计算三个点形成的角度"""
@@ -25,6 +38,39 @@ class ExerciseCounter:
         """处理姿势数据"""
         raise NotImplementedError("子类必须实现process_pose方法")
         
+    def create_series(self):
+        if self.series_name is None or not self.record_series:
+            return None
+        return SeriesRecorder(self.series_name, self.series_step)
+        
+    def record_value(self, timestamp, value):
+        """记录一帧的关键数值"""
+        if self.series is not None:
+            self.series.append(timestamp, value)
+            
+    def record_rep(self, timestamp):
+        """记录一次动作完成的时间"""
+        if self.series is not None:
+            self.series.add_rep(timestamp)
+        
+    def stop_recording(self):
+        """不再记录逐帧数值和质量指标，只计数（用于长时间的压力测试和离线统计）"""
+        self.record_series = False
+        self.series = None
+        self.metrics = None
+        
+    def get_series(self):
+        """获取本次运动的逐帧数据"""
+        return self.series
+        
+    def get_metric_events(self):
+        """获取本次运动的质量指标事件"""
+        return self.metrics.events if self.metrics else []
+        
     def reset(self):
         """重置计数器"""
-        self.counter = 0 
\ No newline at end of file
+        self.counter = 0
+        if self.metrics:
+            self.metrics.reset()
+        # 新建记录器，已提交保存的数据不受影响
+        self.series = self.create_series() 
\ No newline at end of file
@@ -0,0 +1,316 @@
+import csv
+import json
+import os
+import struct
+import sys
+import threading
+import logging
+from array import array
+
+from .database import local_day
+
+logger = logging.getLogger(__name__)
+
+# 各格式都带会员名称，导出全部会员后可按会员重新导入（导入时识别“会员”列）
+CSV_HEADER = ["时间", "运动类型", "次数/时长(秒)", "运动时长(秒)", "备注", "会员"]
+
+# 列式格式：文件头 + 若干数据块，每块以行数开头，行数为0的块表示结束
+# 版本2增加会员ID列和会员名称字典
+COLUMNAR_MAGIC = b"SXCOL\x02"
+COLUMNAR_MAGIC_V1 = b"SXCOL\x01"
+_BLOCK_HEADER = struct.Struct("<I")
+_TYPE_COUNT = struct.Struct("<B")
+_TYPE_LENGTH = struct.Struct("<H")
+_MEMBER_ENTRY = struct.Struct("<qH")
+
+
+def _pack_array(typecode, values):
+    """按小端字节序打包数值数组"""
+    packed = array(typecode, values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+class ExportCancelled(Exception):
+    """导出被取消"""
+
+
+class CsvExporter:
+    """CSV 格式，带BOM便于 Excel 直接打开"""
+    mode, encoding, newline = "w", "utf-8-sig", ""
+    members = {}  # 会员ID -> 名称，由 export_records 设置
+
+    def begin(self, f):
+        self.writer = csv.writer(f)
+        self.writer.writerow(CSV_HEADER)
+
+    def write(self, f, rows):
+        # timestamp 为 isoformat，截取到秒即可，不必逐行解析
+        self.writer.writerows(
+            (row[1][:19].replace("T", " "), row[2], row[3], row[4], row[5], self.members.get(row[7], ""))
+            for row in rows
+        )
+
+    def end(self, f):
+        pass
+
+
+class JsonLinesExporter:
+    """每行一个JSON对象"""
+    mode, encoding, newline = "w", "utf-8", None
+    members = {}
+
+    def begin(self, f):
+        pass
+
+    def write(self, f, rows):
+        f.writelines(
+            json.dumps({
+                "id": row[0],
+                "timestamp": row[1],
+                "exercise_type": row[2],
+                "count_or_duration": row[3],
+                "exercise_time": row[4],
+                "notes": row[5],
+                "user_id": row[7],
+                "member": self.members.get(row[7], ""),
+            }, ensure_ascii=False) + "\n"
+            for row in rows
+        )
+
+    def end(self, f):
+        pass
+
+
+class JsonExporter(JsonLinesExporter):
+    """JSON 数组，逐块写出而不在内存中构造整个列表"""
+
+    def begin(self, f):
+        self.first = True
+        f.write("[\n")
+
+    def write(self, f, rows):
+        for row in rows:
+            if not self.first:
+                f.write(",\n")
+            self.first = False
+            f.write(json.dumps({
+                "id": row[0],
+                "timestamp": row[1],
+                "exercise_type": row[2],
+                "count_or_duration": row[3],
+                "notes": row[5],
+                "user_id": row[7],
+                "member": self.members.get(row[7], ""),
+            }, ensure_ascii=False))
+
+    def end(self, f):
+        f.write("\n]\n")
+
+
+class ColumnarExporter:
+    """紧凑的列式二进制格式，可用 read_columnar 直接载入为 numpy 数组
+
+    每个数据块依次为：行数、id(int64)、ts_epoch(int64)、count_or_duration(int32)、
+    exercise_time(int32)、运动类型字典及编码(uint8)、备注长度(uint32)及UTF-8数据、
+    user_id(int64)、本块会员名称字典（数量uint32，每项为会员ID、名称长度及UTF-8名称）。
+    """
+    mode, encoding, newline = "wb", None, None
+    members = {}
+
+    def begin(self, f):
+        f.write(COLUMNAR_MAGIC)
+
+    def write(self, f, rows):
+        ids, timestamps, types, values, times, notes, epochs, user_ids = zip(*rows)
+        f.write(_BLOCK_HEADER.pack(len(rows)))
+        f.write(_pack_array("q", ids))
+        f.write(_pack_array("q", epochs))
+        f.write(_pack_array("i", values))
+        f.write(_pack_array("i", times))
+
+        # 运动类型按块字典编码
+        names = sorted(set(types))
+        codes = {name: i for i, name in enumerate(names)}
+        f.write(_TYPE_COUNT.pack(len(names)))
+        for name in names:
+            encoded = name.encode("utf-8")
+            f.write(_TYPE_LENGTH.pack(len(encoded)) + encoded)
+        f.write(bytes(codes[t] for t in types))
+
+        # 备注：长度数组 + 拼接后的UTF-8数据
+        encoded_notes = [(note or "").encode("utf-8") for note in notes]
+        f.write(_pack_array("I", map(len, encoded_notes)))
+        f.write(b"".join(encoded_notes))
+
+        # 会员：ID列 + 本块出现的会员名称
+        f.write(_pack_array("q", user_ids))
+        block_members = sorted(set(user_ids))
+        f.write(_BLOCK_HEADER.pack(len(block_members)))
+        for member_id in block_members:
+            encoded = self.members.get(member_id, "").encode("utf-8")
+            f.write(_MEMBER_ENTRY.pack(member_id, len(encoded)) + encoded)
+
+    def end(self, f):
+        f.write(_BLOCK_HEADER.pack(0))
+
+
+EXPORTERS = {
+    "csv": CsvExporter,
+    "jsonl": JsonLinesExporter,
+    "json": JsonExporter,
+    "columnar": ColumnarExporter,
+}
+
+EXTENSIONS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".json": "json",
+    ".sxcol": "columnar",
+}
+
+
+def detect_format(path):
+    """根据扩展名判断导出格式"""
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"无法根据文件名判断导出格式: {path}")
+    return fmt
+
+
+def export_records(db, path, fmt=None, start_date=None, end_date=None, exercise_type="全部",
+                   chunk_size=5000, progress=None, cancel=None, user_id=None):
+    """按块流式导出运动记录，返回导出的行数
+
+    user_id 指定时只导出该会员的记录，否则导出所有会员。
+
+    progress(已导出行数, 总行数) 在每块写出后调用；cancel() 返回真时中止导出。
+    先写入临时文件，完成后再替换目标文件。
+    """
+    fmt = fmt or detect_format(path)
+    exporter = EXPORTERS[fmt]()
+    exporter.members = dict(db.fetchall("SELECT id, name FROM users"))
+    start_day = local_day(start_date) if start_date else None
+    end_day = local_day(end_date) if end_date else None
+    total = db.count_records(start_day, end_day, exercise_type, user_id)
+
+    temp_path = path + ".part"
+    done = 0
+    try:
+        with open(temp_path, exporter.mode, encoding=exporter.encoding,
+                  newline=exporter.newline) as f:
+            exporter.begin(f)
+            for rows in db.iter_records(start_day, end_day, exercise_type, chunk_size, user_id):
+                if cancel and cancel():
+                    raise ExportCancelled()
+                exporter.write(f, rows)
+                done += len(rows)
+                if progress:
+                    progress(done, max(total, done))
+            exporter.end(f)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    logger.info(f"导出 {done} 条记录到 {path}")
+    return done
+
+
+def read_columnar(path):
+    """读取列式导出文件，返回列名到 numpy 数组的字典
+
+    版本2的文件另有 user_id 和 member（会员名称）两列。
+    """
+    import numpy as np
+
+    columns = {name: [] for name in
+               ("id", "ts_epoch", "count_or_duration", "exercise_time", "exercise_type", "notes")}
+    with open(path, "rb") as f:
+        magic = f.read(len(COLUMNAR_MAGIC))
+        if magic not in (COLUMNAR_MAGIC, COLUMNAR_MAGIC_V1):
+            raise ValueError(f"不是列式导出文件: {path}")
+        with_members = magic == COLUMNAR_MAGIC
+        if with_members:
+            columns["user_id"] = []
+            columns["member"] = []
+        while True:
+            (count,) = _BLOCK_HEADER.unpack(f.read(_BLOCK_HEADER.size))
+            if count == 0:
+                break
+            columns["id"].append(np.frombuffer(f.read(8 * count), dtype="<i8"))
+            columns["ts_epoch"].append(np.frombuffer(f.read(8 * count), dtype="<i8"))
+            columns["count_or_duration"].append(np.frombuffer(f.read(4 * count), dtype="<i4"))
+            columns["exercise_time"].append(np.frombuffer(f.read(4 * count), dtype="<i4"))
+
+            (type_count,) = _TYPE_COUNT.unpack(f.read(_TYPE_COUNT.size))
+            names = []
+            for _ in range(type_count):
+                (length,) = _TYPE_LENGTH.unpack(f.read(_TYPE_LENGTH.size))
+                names.append(f.read(length).decode("utf-8"))
+            codes = np.frombuffer(f.read(count), dtype="u1")
+            columns["exercise_type"].append(np.array(names, dtype=object)[codes])
+
+            lengths = np.frombuffer(f.read(4 * count), dtype="<u4")
+            blob = f.read(int(lengths.sum()))
+            offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+            columns["notes"].append(np.array(
+                [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(count)],
+                dtype=object
+            ))
+
+            if with_members:
+                user_ids = np.frombuffer(f.read(8 * count), dtype="<i8")
+                (member_count,) = _BLOCK_HEADER.unpack(f.read(_BLOCK_HEADER.size))
+                names = {}
+                for _ in range(member_count):
+                    member_id, length = _MEMBER_ENTRY.unpack(f.read(_MEMBER_ENTRY.size))
+                    names[member_id] = f.read(length).decode("utf-8")
+                columns["user_id"].append(user_ids)
+                columns["member"].append(np.array([names[i] for i in user_ids.tolist()], dtype=object))
+
+    return {
+        name: np.concatenate(parts) if parts else np.array([])
+        for name, parts in columns.items()
+    }
+
+
+class ExportJob:
+    """在后台线程中执行导出，界面通过轮询属性获取进度和结果"""
+
+    def __init__(self, db, path, fmt=None, **filters):
+        self.db = db
+        self.path = path
+        self.fmt = fmt
+        self.filters = filters
+        self.done_rows = 0
+        self.total_rows = 0
+        self.result = None
+        self.error = None
+        self.finished = False
+        self._cancel = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="export", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _on_progress(self, done, total):
+        self.done_rows, self.total_rows = done, total
+
+    def _run(self):
+        try:
+            self.result = export_records(self.db, self.path, self.fmt, progress=self._on_progress,
+                                         cancel=self._cancel.is_set, **self.filters)
+        except Exception as e:
+            logger.error(f"导出失败: {str(e)}")
+            self.error = e
+        finally:
+            # 每次导出都在新线程中进行，关闭该线程打开的连接
+            self.db.release_connection()
+            self.finished = True
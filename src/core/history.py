@@ -0,0 +1,212 @@
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .database import day_start_epoch
+
+logger = logging.getLogger(__name__)
+
+# 历史记录一页的行数和内存中最多保留的页数
+PAGE_SIZE = 50
+MAX_PAGES = 16
+# 建立检索快照时每次读取的行数
+SNAPSHOT_CHUNK = 20000
+
+
+class PagedRows:
+    """按行号随机访问历史记录，内存中只保留最近用到的几页
+
+    每行为 (id, timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch)，
+    子类设置 total 并实现 _load_page。
+    """
+
+    def __init__(self, page_size=PAGE_SIZE, max_pages=MAX_PAGES):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = OrderedDict()
+        self.queries = 0
+        self.total = 0
+
+    def __len__(self):
+        return self.total
+
+    def get(self, index):
+        """第 index 行，超出实际行数时返回None"""
+        if not 0 <= index < self.total:
+            return None
+        rows = self._page(index // self.page_size)
+        offset = index % self.page_size
+        return rows[offset] if offset < len(rows) else None
+
+    def _page(self, page):
+        rows = self.pages.get(page)
+        if rows is not None:
+            self.pages.move_to_end(page)
+            return rows
+
+        self.queries += 1
+        rows = self._load_page(page)
+        self.pages[page] = rows
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return rows
+
+    def _load_page(self, page):
+        raise NotImplementedError
+
+
+class HistoryPager(PagedRows):
+    """会员的历史记录（时间倒序），按日期范围和运动类型走索引查询
+
+    总行数来自每日汇总，不扫描记录表。相邻页从上一页的最后一行用 (ts_epoch, id)
+    键集分页继续读取；跳到较远位置时，先按每日记录数定位到所在日期，再从该日期的末尾
+    开始读取，OFFSET 不超过当天的记录数。每日记录数在第一次跳转时才读取。
+    """
+
+    def __init__(self, db, user_id, start_day=None, end_day=None, exercise_type="全部", **kwargs):
+        super().__init__(**kwargs)
+        self.db = db
+        self.user_id = user_id
+        self.start_day = start_day
+        self.end_day = end_day
+        self.exercise_type = exercise_type
+        self.total = db.count_records(start_day, end_day, exercise_type, user_id)
+        self.days = None
+        self.first_rows = None
+
+    def _load_page(self, page):
+        if page == 0:
+            return self._fetch(None, 0)
+        previous = self.pages.get(page - 1)
+        if previous and len(previous) == self.page_size:
+            last = previous[-1]
+            return self._fetch((last[6], last[0]), 0)
+        return self._seek(page * self.page_size)
+
+    def _seek(self, index):
+        """从第 index 行开始读取一页：定位到所在日期，从次日零点之前开始读"""
+        if self.days is None:
+            self._load_days()
+        position = bisect.bisect_right(self.first_rows, index) - 1
+        day = self.days[position]
+        return self._fetch((day_start_epoch(day + 1), 0), index - self.first_rows[position])
+
+    def _load_days(self):
+        day_counts = self.db.get_day_counts(self.user_id, self.start_day, self.end_day, self.exercise_type)
+        self.days = [day for day, _ in day_counts]
+        # first_rows[i] 为第 i 天（倒序）第一行的行号
+        self.first_rows = []
+        total = 0
+        for _, count in day_counts:
+            self.first_rows.append(total)
+            total += count
+
+    def _fetch(self, before, offset):
+        return self.db.get_history_page(self.user_id, self.start_day, self.end_day, self.exercise_type,
+                                        before=before, offset=offset, limit=self.page_size)
+
+
+class HistorySnapshot:
+    """会员全部记录的列式快照（时间倒序），用于在内存中按关键字和条件筛选
+
+    只保存ID、日序号以及运动类型和备注的编码。备注按不同取值去重，
+    关键字只需与每个不同的备注和运动类型各比较一次。
+    """
+
+    def __init__(self, ids, days, type_codes, types, note_codes, notes):
+        self.ids = ids
+        self.days = days
+        self.type_codes = type_codes
+        self.types = types
+        self.note_codes = note_codes
+        self.notes = notes
+
+    @classmethod
+    def load(cls, db, user_id):
+        ids, days, types, notes = [], [], [], []
+        cursor = db.get_history_columns(user_id)
+        while True:
+            rows = cursor.fetchmany(SNAPSHOT_CHUNK)
+            if not rows:
+                break
+            chunk_ids, chunk_days, chunk_types, chunk_notes = zip(*rows)
+            ids.append(np.array(chunk_ids, dtype=np.int64))
+            days.append(np.array(chunk_days, dtype=np.int32))
+            types.extend(chunk_types)
+            notes.extend(note or "" for note in chunk_notes)
+
+        unique_types, type_codes = np.unique(np.array(types, dtype=object), return_inverse=True)
+        unique_notes, note_codes = np.unique(np.array(notes, dtype=object), return_inverse=True)
+        return cls(
+            np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64),
+            np.concatenate(days) if days else np.zeros(0, dtype=np.int32),
+            type_codes.astype(np.int32), list(unique_types),
+            note_codes.astype(np.int32), list(unique_notes)
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select(self, start_day=None, end_day=None, exercise_type="全部", text=""):
+        """符合条件的记录在快照中的位置（时间倒序）
+
+        text 不为空时，备注或运动类型包含该关键字（不区分大小写）的记录才符合。
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+        if start_day is not None:
+            mask &= self.days >= start_day
+        if end_day is not None:
+            mask &= self.days <= end_day
+        if exercise_type != "全部":
+            mask &= self.type_codes == (self.types.index(exercise_type) if exercise_type in self.types else -1)
+        if text:
+            keyword = text.casefold()
+            type_hits = np.array([keyword in name.casefold() for name in self.types], dtype=bool)
+            note_hits = np.array([keyword in note.casefold() for note in self.notes], dtype=bool)
+            mask &= type_hits[self.type_codes] | note_hits[self.note_codes]
+        return np.flatnonzero(mask)
+
+
+class SnapshotPager(PagedRows):
+    """快照筛选结果的分页读取，每页按ID查询一次完整记录"""
+
+    def __init__(self, db, snapshot, positions, **kwargs):
+        super().__init__(**kwargs)
+        self.db = db
+        self.ids = snapshot.ids[positions]
+        self.total = len(self.ids)
+
+    def _load_page(self, page):
+        ids = self.ids[page * self.page_size:(page + 1) * self.page_size].tolist()
+        rows = {row[0]: row for row in self.db.get_history_rows(ids)}
+        # 跳过快照建立后被删除的记录
+        return [rows[record_id] for record_id in ids if record_id in rows]
+
+
+class SnapshotJob:
+    """在后台线程中建立检索快照，界面通过轮询 finished 获取结果"""
+
+    def __init__(self, db, user_id):
+        self.db = db
+        self.user_id = user_id
+        self.result = None
+        self.error = None
+        self.finished = False
+        self.thread = threading.Thread(target=self._run, name="history-snapshot", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.result = HistorySnapshot.load(self.db, self.user_id)
+        except Exception as e:
+            logger.error(f"建立历史记录快照失败: {str(e)}")
+            self.error = e
+        finally:
+            self.db.release_connection()
+            self.finished = True
@@ -0,0 +1,237 @@
+import csv
+import json
+import os
+import time
+import logging
+from collections import namedtuple
+from datetime import datetime
+
+from .database import local_day, DEFAULT_USER_ID
+
+logger = logging.getLogger(__name__)
+
+EXERCISE_TYPES = ("深蹲", "俯卧撑", "平板支撑", "跳绳")
+
+# 其他记录软件中常见的字段名
+FIELD_ALIASES = {
+    "timestamp": ("timestamp", "time", "date", "datetime", "start_time", "时间", "日期"),
+    "exercise_type": ("exercise_type", "type", "exercise", "activity", "运动类型", "运动"),
+    "count_or_duration": ("count_or_duration", "count", "reps", "value", "duration",
+                          "次数/时长(秒)", "次数", "时长"),
+    "exercise_time": ("exercise_time", "elapsed", "elapsed_time", "运动时长(秒)", "运动时长"),
+    "notes": ("notes", "note", "comment", "备注"),
+    "member": ("member", "user", "user_name", "member_name", "会员", "会员名称"),
+}
+
+REQUIRED_FIELDS = frozenset(("timestamp", "exercise_type", "count_or_duration"))
+
+EXERCISE_ALIASES = {
+    "squat": "深蹲", "squats": "深蹲",
+    "pushup": "俯卧撑", "pushups": "俯卧撑", "push-up": "俯卧撑", "push_up": "俯卧撑",
+    "push up": "俯卧撑",
+    "plank": "平板支撑",
+    "rope": "跳绳", "jump rope": "跳绳", "jump_rope": "跳绳", "jumprope": "跳绳",
+    "skipping": "跳绳",
+}
+
+TIMESTAMP_FORMATS = ("%Y/%m/%d %H:%M:%S", "%Y/%m/%d %H:%M", "%Y/%m/%d")
+
+IMPORT_FORMATS = {".csv": "csv", ".json": "json", ".jsonl": "jsonl"}
+
+# 导入结果：读取行数、写入行数、重复行数、无效行数、耗时（秒）
+ImportResult = namedtuple("ImportResult", ["read", "inserted", "duplicates", "rejected", "elapsed"])
+
+
+def _normalize_key(key):
+    return str(key).strip().lstrip("\ufeff").lower()
+
+
+def _build_field_map(keys):
+    """将输入字段名映射到标准字段名"""
+    lookup = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            lookup.setdefault(alias.lower(), field)
+    field_map = {}
+    for key in keys:
+        field = lookup.get(_normalize_key(key))
+        if field and field not in field_map.values():
+            field_map[key] = field
+    return field_map
+
+
+def parse_timestamp(value):
+    """解析ISO文本、常见日期格式或Unix时间戳（秒/毫秒），返回本地时间"""
+    if isinstance(value, str):
+        # 常见情况：不带时区的ISO文本
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            pass
+        else:
+            if parsed.tzinfo is None:
+                return parsed
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.strip().isdigit()):
+        seconds = float(value)
+        if seconds > 1e11:
+            seconds /= 1000
+        return datetime.fromtimestamp(seconds)
+
+    text = str(value).strip()
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        for fmt in TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"无法解析时间: {value}")
+    if parsed.tzinfo is not None:
+        # 带时区的时间转换为本地时间
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def normalize_exercise_type(value):
+    name = str(value).strip()
+    if name in EXERCISE_TYPES:
+        return name
+    name = EXERCISE_ALIASES.get(name.lower())
+    if name is None:
+        raise ValueError(f"未知的运动类型: {value}")
+    return name
+
+
+def normalize_row(row, field_map, user_id=DEFAULT_USER_ID, resolve_member=None):
+    """校验并规范化一行输入，返回可直接写入的记录行
+
+    输入带会员名称列且提供了 resolve_member 时，按名称确定记录所属会员。
+    """
+    values = {field: row.get(key) for key, field in field_map.items()}
+    missing = REQUIRED_FIELDS.difference(values)
+    if missing:
+        raise ValueError(f"缺少必要字段: {', '.join(sorted(missing))}")
+    timestamp = parse_timestamp(values["timestamp"])
+    exercise_type = normalize_exercise_type(values["exercise_type"])
+    count = int(float(values["count_or_duration"]))
+    if count <= 0:
+        raise ValueError(f"次数/时长必须为正数: {count}")
+
+    exercise_time = values.get("exercise_time")
+    if exercise_time in (None, ""):
+        # 平板支撑的运动时长就是持续时间，其他运动未知时记为0
+        exercise_time = count if exercise_type == "平板支撑" else 0
+    exercise_time = int(float(exercise_time))
+    if exercise_time < 0:
+        raise ValueError(f"运动时长不能为负数: {exercise_time}")
+
+    member = values.get("member")
+    if member and resolve_member:
+        user_id = resolve_member(str(member))
+
+    return (timestamp.isoformat(), exercise_type, count, exercise_time, values.get("notes") or "",
+            int(timestamp.timestamp()), local_day(timestamp), user_id)
+
+
+def _iter_json_array(f, buffer_size=1 << 16):
+    """增量解析JSON数组，逐个返回元素而不读入整个文件"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(buffer_size).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("JSON文件必须是记录数组")
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(",").lstrip()
+        if buffer.startswith("]"):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except ValueError:
+            chunk = f.read(buffer_size)
+            if not chunk:
+                raise
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+        if len(buffer) < buffer_size:
+            buffer += f.read(buffer_size)
+
+
+def iter_input_rows(path, fmt=None):
+    """流式读取CSV/JSON/JSON Lines文件中的原始记录（字典）"""
+    fmt = fmt or IMPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+    elif fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif fmt == "json":
+        with open(path, encoding="utf-8") as f:
+            yield from _iter_json_array(f)
+    else:
+        raise ValueError(f"无法判断导入格式: {path}")
+
+
+def import_records(db, path, fmt=None, batch_size=50000, progress=None, max_errors_logged=20,
+                   user_id=DEFAULT_USER_ID):
+    """批量导入历史记录，返回 ImportResult
+
+    每 batch_size 行按时间排序后在一个事务中写入；无效行跳过并计数，
+    与已有记录重复的行由唯一索引忽略。记录归入 user_id 指定的会员，
+    带会员名称列的行归入对应会员（不存在时自动创建）。
+    """
+    start = time.perf_counter()
+    read = inserted = rejected = 0
+    field_maps = {}
+    members = {}
+    batch = []
+
+    def resolve_member(name):
+        member_id = members.get(name)
+        if member_id is None:
+            member_id = members[name] = db.add_user(name)
+        return member_id
+
+    def flush():
+        nonlocal inserted
+        # 按时间顺序写入，索引插入更集中
+        batch.sort(key=lambda row: row[5])
+        inserted += db.bulk_insert_rows(batch)
+        batch.clear()
+        if progress:
+            progress(read, inserted)
+
+    for row in iter_input_rows(path, fmt):
+        read += 1
+        # JSON 记录的字段可能逐行不同，按字段组合缓存映射
+        keys = tuple(row.keys())
+        field_map = field_maps.get(keys)
+        if field_map is None:
+            field_map = field_maps[keys] = _build_field_map(keys)
+        try:
+            batch.append(normalize_row(row, field_map, user_id, resolve_member))
+        except (KeyError, TypeError, ValueError, OverflowError) as e:
+            rejected += 1
+            if rejected <= max_errors_logged:
+                logger.warning(f"第 {read} 行无效: {str(e)}")
+            continue
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    elapsed = time.perf_counter() - start
+    result = ImportResult(read, inserted, read - rejected - inserted, rejected, elapsed)
+    logger.info(f"导入 {path}: 读取 {read} 行，写入 {inserted} 行，"
+                f"重复 {result.duplicates} 行，无效 {rejected} 行，耗时 {elapsed:.2f} 秒")
+    return result
@@ -0,0 +1,167 @@
+import threading
+import logging
+from queue import Queue
+
+import cv2
+import numpy as np
+
+from .pose_backends import PoseBackend, PoseResults, BACKENDS
+
+logger = logging.getLogger(__name__)
+
+# COCO 17 关键点到 MediaPipe 33 关键点编号的映射
+COCO_TO_MEDIAPIPE = [
+    0,   # nose
+    2,   # left_eye
+    5,   # right_eye
+    7,   # left_ear
+    8,   # right_ear
+    11,  # left_shoulder
+    12,  # right_shoulder
+    13,  # left_elbow
+    14,  # right_elbow
+    15,  # left_wrist
+    16,  # right_wrist
+    23,  # left_hip
+    24,  # right_hip
+    25,  # left_knee
+    26,  # right_knee
+    27,  # left_ankle
+    28,  # right_ankle
+]
+NUM_LANDMARKS = 33
+
+
+class BatchedOnnxPoseBackend(PoseBackend):
+    """基于 onnxruntime 的批量推理后端，用于离线处理
+
+    模型输入为 [N, H, W, 3] 的RGB图像，输出为 [N, ..., 17, 3] 的
+    COCO 关键点 (y, x, score)，例如 MoveNet。输出转换为与
+    mp.solutions.pose 相同的 33 点结构，未覆盖的关键点可见性为0。
+    """
+    name = "onnx_batch"
+
+    def __init__(self, model_path, input_size=192, input_dtype="int32", batch_size=16,
+                 intra_op_threads=0, providers=("CPUExecutionProvider",), **_):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=list(providers))
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_size = input_size
+        self.input_dtype = np.dtype(input_dtype)
+        self.batch_size = batch_size
+        # 批次维度固定的模型只能按模型要求的大小分批
+        fixed_batch = model_input.shape[0]
+        self.model_batch = fixed_batch if isinstance(fixed_batch, int) and fixed_batch > 0 else None
+
+    def preprocess(self, image):
+        """将RGB图像缩放为模型输入尺寸"""
+        resized = cv2.resize(image, (self.input_size, self.input_size))
+        return resized.astype(self.input_dtype, copy=False)
+
+    @staticmethod
+    def _to_results(keypoints):
+        from mediapipe.framework.formats import landmark_pb2
+
+        landmark_list = landmark_pb2.NormalizedLandmarkList()
+        points = [landmark_pb2.NormalizedLandmark(visibility=0.0) for _ in range(NUM_LANDMARKS)]
+        for coco_index, (y, x, score) in enumerate(keypoints):
+            point = points[COCO_TO_MEDIAPIPE[coco_index]]
+            point.x, point.y, point.visibility = float(x), float(y), float(score)
+        landmark_list.landmark.extend(points)
+        return PoseResults(landmark_list)
+
+    def _run(self, batch):
+        outputs = self.session.run(None, {self.input_name: batch})[0]
+        return outputs.reshape(len(batch), -1, 3)[:, :17, :]
+
+    def process_batch(self, images, preprocessed=False):
+        """批量推理，返回与输入顺序一致的结果列表"""
+        if not images:
+            return []
+        inputs = images if preprocessed else [self.preprocess(image) for image in images]
+        step = self.model_batch or len(inputs)
+        keypoints = []
+        for start in range(0, len(inputs), step):
+            chunk = np.stack(inputs[start:start + step])
+            if self.model_batch and len(chunk) < self.model_batch:
+                # 固定批次模型：补齐后丢弃多余结果
+                padding = np.zeros((self.model_batch - len(chunk),) + chunk.shape[1:], chunk.dtype)
+                keypoints.extend(self._run(np.concatenate([chunk, padding]))[:len(chunk)])
+            else:
+                keypoints.extend(self._run(chunk))
+        return [self._to_results(points) for points in keypoints]
+
+    def process(self, image, timestamp_ms):
+        results = self.process_batch([image])[0]
+        results.timestamp_ms = timestamp_ms
+        return results
+
+
+BACKENDS[BatchedOnnxPoseBackend.name] = BatchedOnnxPoseBackend
+
+
+def iter_video_poses(video_path, backend, batch_size=None, queue_size=64):
+    """离线处理视频，逐帧返回 (帧序号, 时间戳秒, 检测结果)
+
+    解码在独立线程中进行，通过有界队列与推理线程衔接；
+    支持批量推理的后端按批处理，其余后端逐帧处理。
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    batched = hasattr(backend, "process_batch")
+    batch_size = batch_size or getattr(backend, "batch_size", 1)
+    frames = Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def decode_worker():
+        try:
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                # 在解码线程中完成预处理，减轻推理线程负担
+                frames.put(backend.preprocess(image) if batched else image)
+        except Exception as e:
+            logger.error(f"视频解码错误: {str(e)}")
+        finally:
+            frames.put(None)
+
+    decoder = threading.Thread(target=decode_worker, daemon=True)
+    decoder.start()
+
+    index = 0
+    try:
+        finished = False
+        while not finished:
+            batch = []
+            while len(batch) < batch_size:
+                item = frames.get()
+                if item is None:
+                    finished = True
+                    break
+                batch.append(item)
+            if not batch:
+                break
+            if batched:
+                results = backend.process_batch(batch, preprocessed=True)
+            else:
+                results = [backend.process(image, (index + i) * 1000 / fps)
+                           for i, image in enumerate(batch)]
+            for result in results:
+                yield index, index / fps, result
+                index += 1
+    finally:
+        stop.set()
+        # 清空队列，确保解码线程能够退出
+        while decoder.is_alive():
+            while not frames.empty():
+                frames.get_nowait()
+            decoder.join(timeout=0.1)
+        cap.release()
@@ -0,0 +1,134 @@
+import mediapipe as mp
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PoseResults:
+    """与 mp.solutions.pose 结果相同结构的检测结果"""
+
+    def __init__(self, pose_landmarks=None, timestamp_ms=None):
+        self.pose_landmarks = pose_landmarks
+        self.timestamp_ms = timestamp_ms
+
+
+class PoseBackend:
+    """姿势检测后端接口"""
+    name = None
+
+    def process(self, image, timestamp_ms):
+        """处理一帧RGB图像，返回带 pose_landmarks 属性的结果"""
+        raise NotImplementedError("子类必须实现process方法")
+
+    def close(self):
+        """释放后端资源"""
+        pass
+
+
+class SolutionsPoseBackend(PoseBackend):
+    """旧版 mp.solutions.pose 同步后端"""
+    name = "solutions"
+
+    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5, **_):
+        self.pose = mp.solutions.pose.Pose(
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+
+    def process(self, image, timestamp_ms):
+        return self.pose.process(image)
+
+    def close(self):
+        self.pose.close()
+
+
+class TasksPoseBackend(PoseBackend):
+    """MediaPipe Tasks PoseLandmarker 后端
+
+    VIDEO 模式同步返回当前帧结果；LIVE_STREAM 模式异步推理，
+    process 立即返回最近一次回调的结果，推理与采集并行。
+    """
+    name = "tasks"
+
+    def __init__(self, model_path, running_mode="live_stream", min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5, **_):
+        from mediapipe.tasks import python as mp_tasks
+        from mediapipe.tasks.python import vision
+
+        self.live_stream = running_mode == "live_stream"
+        self.latest = PoseResults()
+        self.lock = threading.Lock()
+        self.last_timestamp_ms = -1
+        # 回调到达时间，用于统计异步结果的延迟
+        self.result_delays = []
+
+        options = vision.PoseLandmarkerOptions(
+            base_options=mp_tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=(vision.RunningMode.LIVE_STREAM if self.live_stream
+                          else vision.RunningMode.VIDEO),
+            num_poses=1,
+            min_pose_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            result_callback=self._on_result if self.live_stream else None
+        )
+        self.landmarker = vision.PoseLandmarker.create_from_options(options)
+
+    @staticmethod
+    def _convert(result, timestamp_ms):
+        """将 Tasks 结果转换为 solutions 的 NormalizedLandmarkList 结构"""
+        from mediapipe.framework.formats import landmark_pb2
+
+        if not result.pose_landmarks:
+            return PoseResults(None, timestamp_ms)
+        landmark_list = landmark_pb2.NormalizedLandmarkList()
+        landmark_list.landmark.extend([
+            landmark_pb2.NormalizedLandmark(
+                x=point.x, y=point.y, z=point.z,
+                visibility=point.visibility or 0.0
+            )
+            for point in result.pose_landmarks[0]
+        ])
+        return PoseResults(landmark_list, timestamp_ms)
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        converted = self._convert(result, timestamp_ms)
+        with self.lock:
+            self.latest = converted
+            if len(self.result_delays) < 10000:
+                self.result_delays.append(time.monotonic() * 1000 - timestamp_ms)
+
+    def process(self, image, timestamp_ms):
+        # Tasks 要求时间戳严格递增
+        timestamp_ms = max(int(timestamp_ms), self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image)
+
+        if self.live_stream:
+            self.landmarker.detect_async(mp_image, timestamp_ms)
+            with self.lock:
+                return self.latest
+        return self._convert(self.landmarker.detect_for_video(mp_image, timestamp_ms), timestamp_ms)
+
+    def close(self):
+        self.landmarker.close()
+
+
+BACKENDS = {
+    SolutionsPoseBackend.name: SolutionsPoseBackend,
+    TasksPoseBackend.name: TasksPoseBackend,
+}
+
+
+def create_backend(config):
+    """根据配置创建姿势检测后端"""
+    config = dict(config)
+    name = config.pop("backend", "solutions")
+    if name == "onnx_batch":
+        # 离线批量后端依赖 onnxruntime，按需导入
+        from . import offline_pose
+    if name not in BACKENDS:
+        raise ValueError(f"未知的姿势检测后端: {name}")
+    logger.info(f"使用姿势检测后端: {name}")
+    return BACKENDS[name](**config)
@@ -1,18 +1,19 @@
 import mediapipe as mp
 import numpy as np
 import cv2
+import time
 import logging
+from .pose_backends import create_backend
+from config.app_config import POSE_CONFIG
 
 logger = logging.getLogger(__name__)
 
 class PoseDetector:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
-        self.pose = self.mp_pose.Pose(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        # 姿势检测后端，未指定时按配置创建
+        self.backend = backend or create_backend(POSE_CONFIG)
         
     def detect(self, frame):
         try:
@@ -22,7 +23,7 @@ class PoseDetector:
             
             image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             image.flags.writeable = False
-            results = self.pose.process(image)
+            results = self.backend.process(image, time.monotonic() * 1000)
             image.flags.writeable = True
             image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
             
@@ -32,8 +33,12 @@ class PoseDetector:
             logger.error(f"姿势检测错误: {str(e)}")
             return None, frame
     
+    def close(self):
+        """释放检测后端"""
+        self.backend.close()
+    
     def draw_landmarks(self, image, results):
-        if results.pose_landmarks:
+        if results and results.pose_landmarks:
             self.mp_drawing.draw_landmarks(
                 image,
                 results.pose_landmarks,
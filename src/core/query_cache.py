@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+# 缓存结果依赖的数据范围：会员、日序号区间（None表示不限）、运动类型（None表示全部）
+CacheScope = namedtuple("CacheScope", ["user_id", "start_day", "end_day", "exercise_type"])
+
+
+def _overlaps(scope, user_id, start_day, end_day, exercise_types):
+    """判断写入的数据范围是否影响缓存结果"""
+    if scope.user_id is not None and user_id is not None and scope.user_id != user_id:
+        return False
+    if scope.end_day is not None and start_day is not None and scope.end_day < start_day:
+        return False
+    if scope.start_day is not None and end_day is not None and scope.start_day > end_day:
+        return False
+    if scope.exercise_type is not None and exercise_types is not None:
+        return scope.exercise_type in exercise_types
+    return True
+
+
+class QueryCache:
+    """按查询和参数缓存结果的LRU缓存
+
+    每个结果记录其依赖的数据范围，写入时只淘汰范围重叠的结果。
+    缓存的结果由多个调用方共享，调用方不应修改。
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (scope, value)
+        # 每次失效都递增，查询期间发生过写入的结果不再放入缓存
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.invalidated = 0
+            self.evicted = 0
+
+    def load(self, key, scope, loader):
+        """读穿缓存：命中时直接返回，否则调用 loader() 查询并缓存结果"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self.generation
+
+        value = loader()
+
+        with self.lock:
+            if generation == self.generation and self.max_entries > 0:
+                self.entries[key] = (scope, value)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.evicted += 1
+        return value
+
+    def invalidate(self, user_id=None, start_day=None, end_day=None, exercise_types=None):
+        """淘汰与写入范围重叠的结果，参数为None表示不限"""
+        with self.lock:
+            self.generation += 1
+            stale = [
+                key for key, (scope, _) in self.entries.items()
+                if _overlaps(scope, user_id, start_day, end_day, exercise_types)
+            ]
+            for key in stale:
+                del self.entries[key]
+            self.invalidated += len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.invalidated += len(self.entries)
+            self.entries.clear()
+
+    def snapshot(self):
+        """返回命中率等统计信息"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "invalidated": self.invalidated,
+                "evicted": self.evicted,
+            }
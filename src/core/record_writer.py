@@ -0,0 +1,347 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime
+from queue import Queue, Empty
+
+from .database import db_manager, make_record, ExerciseRecord, DEFAULT_USER_ID
+from .session_series import SeriesRecorder
+from config.app_config import RECORD_WRITER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_RECORD = "record"
+_FLUSH = "flush"
+_STOP = "stop"
+
+
+def _record_to_json(record):
+    return json.dumps({
+        "timestamp": record.timestamp.isoformat(),
+        "exercise_type": record.exercise_type,
+        "count_or_duration": record.count_or_duration,
+        "exercise_time": record.exercise_time,
+        "notes": record.notes,
+        "metrics": base64.b64encode(record.metrics).decode("ascii") if record.metrics else None,
+        "series": {
+            "value_name": record.series.value_name,
+            "data": base64.b64encode(record.series.encode()).decode("ascii"),
+        } if record.series is not None else None,
+        "user_id": record.user_id,
+    }, ensure_ascii=False)
+
+
+def _record_from_json(line):
+    data = json.loads(line)
+    series = data.get("series")
+    return ExerciseRecord(
+        datetime.fromisoformat(data["timestamp"]),
+        data["exercise_type"],
+        data["count_or_duration"],
+        data["exercise_time"],
+        data.get("notes", ""),
+        base64.b64decode(data["metrics"]) if data.get("metrics") else None,
+        SeriesRecorder.from_bytes(series["value_name"], base64.b64decode(series["data"]))
+        if series else None,
+        data.get("user_id", DEFAULT_USER_ID)
+    )
+
+
+class RecordWriter:
+    """后台批量写入运动记录
+
+    UI线程只负责入队，写入线程将队列中的记录合并到一个事务中提交。
+    数据库被锁定或写入失败时，记录追加到本地日志文件（fsync），
+    数据库恢复可写后再逐条重放，保证记录不丢失。无法解析或始终写入失败的记录
+    移到 .bad 隔离文件，不阻塞其后的记录。
+    """
+
+    def __init__(self, db, journal_path="journal/pending_records.jsonl", batch_size=32,
+                 replay_interval=30.0, metrics_interval=300.0):
+        self.db = db
+        self.journal_path = journal_path
+        self.bad_path = journal_path + ".bad"
+        self.batch_size = batch_size
+        self.replay_interval = replay_interval
+        self.metrics_interval = metrics_interval
+        self.queue = Queue()
+        self.thread = None
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._reset_metrics()
+
+    def _reset_metrics(self):
+        with self._lock:
+            self.written = 0
+            self.batches = 0
+            self.spilled = 0
+            self.replayed = 0
+            self.quarantined = 0
+            self.latency_total = 0.0
+            self.latency_max = 0.0
+            self.latency_last = 0.0
+
+    def add_listener(self, callback):
+        """注册写入完成回调，回调在写入线程中执行"""
+        self.listeners.append(callback)
+
+    def start(self):
+        """启动写入线程"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name="record-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, exercise_type, count_or_duration, exercise_time, notes="", metric_events=None,
+               series=None, user_id=DEFAULT_USER_ID):
+        """提交一条运动记录，立即返回；逐帧数据在写入线程中编码"""
+        record = make_record(exercise_type, count_or_duration, exercise_time, notes, metric_events,
+                             series=series, user_id=user_id)
+        self.start()
+        self.queue.put((_RECORD, record, time.perf_counter()))
+
+    def flush(self, timeout=None):
+        """等待此前提交的记录全部处理完毕"""
+        if not (self.thread and self.thread.is_alive()):
+            return True
+        done = threading.Event()
+        self.queue.put((_FLUSH, done, None))
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        """写入剩余记录并停止写入线程"""
+        if not (self.thread and self.thread.is_alive()):
+            return
+        self.queue.put((_STOP, None, None))
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            logger.error("记录写入线程未能在超时内结束")
+
+    def get_metrics(self):
+        """写入延迟（入队到提交）与队列深度等指标"""
+        with self._lock:
+            return {
+                "queue_depth": self.queue.qsize(),
+                "written": self.written,
+                "batches": self.batches,
+                "spilled": self.spilled,
+                "replayed": self.replayed,
+                "quarantined": self.quarantined,
+                "pending_journal": self.pending_journal(),
+                "latency_last_ms": self.latency_last * 1000,
+                "latency_avg_ms": self.latency_total / self.written * 1000 if self.written else 0.0,
+                "latency_max_ms": self.latency_max * 1000,
+            }
+
+    def log_metrics(self):
+        """将写入指标记入日志"""
+        metrics = self.get_metrics()
+        logger.info(f"后台写入 {metrics['written']} 条记录，队列深度 {metrics['queue_depth']}，"
+                    f"延迟 平均 {metrics['latency_avg_ms']:.1f} / 最大 {metrics['latency_max_ms']:.1f} 毫秒，"
+                    f"转存 {metrics['spilled']} 条，待重放 {metrics['pending_journal']} 条，"
+                    f"隔离 {metrics['quarantined']} 条")
+
+    def pending_journal(self):
+        """日志中等待重放的记录数"""
+        if not os.path.exists(self.journal_path):
+            return 0
+        with open(self.journal_path, encoding="utf-8") as f:
+            return sum(1 for line in f if line.strip())
+
+    def _run(self):
+        self._replay_journal()
+        next_metrics = time.monotonic() + self.metrics_interval
+        while True:
+            # 定期记录队列深度和写入延迟
+            if time.monotonic() >= next_metrics:
+                self.log_metrics()
+                next_metrics = time.monotonic() + self.metrics_interval
+            try:
+                item = self.queue.get(timeout=self.replay_interval)
+            except Empty:
+                self._replay_journal()
+                continue
+
+            # 合并队列中已有的记录，一个事务提交
+            batch, waiters, stop = [], [], False
+            while True:
+                kind, payload, enqueued = item
+                if kind == _RECORD:
+                    batch.append((payload, enqueued))
+                elif kind == _FLUSH:
+                    waiters.append(payload)
+                else:
+                    stop = True
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except Empty:
+                    break
+
+            try:
+                if batch and self._write_batch(batch):
+                    self._replay_journal()
+            except Exception as e:
+                # 写入线程不能退出，否则之后提交的记录都会丢失
+                logger.error(f"处理待写入记录出错: {str(e)}", exc_info=True)
+            finally:
+                for waiter in waiters:
+                    waiter.set()
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        records = [record for record, _ in batch]
+        try:
+            record_ids = self.db.insert_records(records)
+        except sqlite3.Error as e:
+            logger.warning(f"写入运动记录失败，转存到日志: {str(e)}")
+            self._spill(records)
+            return False
+        except Exception as e:
+            # 非数据库错误（如逐帧数据编码失败）同样转存，重放时逐条写入并隔离有问题的记录
+            logger.error(f"写入运动记录出错，转存到日志: {str(e)}", exc_info=True)
+            self._spill(records)
+            return False
+
+        now = time.perf_counter()
+        with self._lock:
+            for _, enqueued in batch:
+                latency = now - enqueued
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+                self.latency_last = latency
+            self.written += len(records)
+            self.batches += 1
+        self._notify(record_ids)
+        return True
+
+    def _spill(self, records):
+        """追加到本地日志并落盘"""
+        lines = []
+        for record in records:
+            try:
+                lines.append(_record_to_json(record))
+            except Exception as e:
+                # 逐帧数据无法编码时去掉逐帧数据，保留记录本身
+                logger.error(f"运动记录无法转存，去掉逐帧数据后转存: {record.exercise_type} "
+                             f"{record.timestamp.isoformat()}: {str(e)}")
+                lines.append(_record_to_json(record._replace(series=None)))
+        self._append_lines(self.journal_path, lines)
+        with self._lock:
+            self.spilled += len(records)
+
+    def _append_lines(self, path, lines):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _quarantine(self, lines, reason):
+        """将无法写入的日志行移到隔离文件，留待人工处理"""
+        logger.error(f"{len(lines)} 条待写入记录移至 {self.bad_path}: {reason}")
+        self._append_lines(self.bad_path, lines)
+        with self._lock:
+            self.quarantined += len(lines)
+
+    def _replay_journal(self):
+        """将日志中的记录写回数据库
+
+        先整体写入；数据库暂时不可写（锁定等）时整份日志稍后重试，其他错误时改为逐条写入，
+        无法解析或写入出错的记录移到隔离文件，日志中只保留仍待写入的记录。
+        """
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                lines = [line.rstrip("\n") for line in f if line.strip()]
+        except OSError as e:
+            logger.error(f"读取待写入日志失败: {str(e)}")
+            return
+
+        entries, bad = [], []
+        for line in lines:
+            try:
+                entries.append((line, _record_from_json(line)))
+            except Exception as e:
+                # 转存时崩溃留下的半行等
+                bad.append(line)
+                logger.error(f"无法解析待写入日志行: {str(e)}")
+        if bad:
+            self._quarantine(bad, "无法解析")
+
+        if entries:
+            entries = self._replay_entries(entries)
+        if entries:
+            self._rewrite_journal([line for line, _ in entries])
+        else:
+            os.remove(self.journal_path)
+
+    def _replay_entries(self, entries):
+        """先在一个事务中整体写入，返回仍需保留在日志中的 (行, 记录)"""
+        records = [record for _, record in entries]
+        try:
+            record_ids = self.db.insert_records(records)
+        except sqlite3.OperationalError as e:
+            # 数据库锁定等暂时性错误，整份日志稍后重试
+            logger.warning(f"重放待写入日志失败，稍后重试: {str(e)}")
+            return entries
+        except Exception as e:
+            logger.warning(f"重放待写入日志失败，改为逐条写入: {str(e)}")
+            return self._replay_one_by_one(entries)
+        with self._lock:
+            self.replayed += len(records)
+        logger.info(f"已重放 {len(records)} 条待写入记录")
+        self._notify(record_ids)
+        return []
+
+    def _replay_one_by_one(self, entries):
+        """逐条重放，返回仍需保留在日志中的 (行, 记录)"""
+        remaining, failed = [], []
+        for line, record in entries:
+            try:
+                record_ids = self.db.insert_records([record])
+            except sqlite3.OperationalError as e:
+                # 数据库锁定、磁盘已满等，稍后重试
+                logger.warning(f"重放待写入记录暂时失败，稍后重试: {str(e)}")
+                remaining.append((line, record))
+                continue
+            except Exception as e:
+                logger.error(f"重放待写入记录出错: {str(e)}")
+                failed.append(line)
+                continue
+            with self._lock:
+                self.replayed += 1
+            self._notify(record_ids)
+        if failed:
+            self._quarantine(failed, "写入出错")
+        return remaining
+
+    def _rewrite_journal(self, lines):
+        """以仍待写入的记录替换日志（先写临时文件再替换）"""
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.journal_path)
+
+    def _notify(self, record_ids):
+        for callback in self.listeners:
+            try:
+                callback(record_ids)
+            except Exception as e:
+                logger.error(f"写入回调错误: {str(e)}")
+
+
+record_writer = RecordWriter(db_manager, **RECORD_WRITER_CONFIG)
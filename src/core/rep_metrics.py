@@ -0,0 +1,134 @@
+import math
+import struct
+from collections import namedtuple
+
+# 单次动作质量指标：序号、完成时间、动作幅度、最低角度、离心/向心时间（秒）、左右差异（度）
+RepEvent = namedtuple(
+    "RepEvent",
+    ["rep", "timestamp", "range_of_motion", "depth", "eccentric_time", "concentric_time", "symmetry"]
+)
+
+# 平板支撑每秒姿势稳定性：第几秒、身体角度平均偏差、角度标准差
+StabilityEvent = namedtuple("StabilityEvent", ["second", "mean_deviation", "std_deviation"])
+
+_REP_STRUCT = struct.Struct("<Iffffff")
+_STABILITY_STRUCT = struct.Struct("<Iff")
+_KIND_REP = 1
+_KIND_STABILITY = 2
+
+
+class RepMetricsTracker:
+    """在计数状态机中逐帧更新的单次动作指标，每次动作只占常量内存"""
+
+    def __init__(self):
+        self.events = []
+        self._reset_window(None)
+
+    def _reset_window(self, timestamp):
+        self.window_start = timestamp
+        self.min_angle = math.inf
+        self.max_angle = -math.inf
+        self.bottom_time = timestamp
+        self.asymmetry_sum = 0.0
+        self.frames = 0
+
+    def at_top(self, timestamp, angle):
+        """处于起始位置时调用，离心阶段从最后一次位于顶端开始计时"""
+        self._reset_window(timestamp)
+        self.max_angle = angle
+
+    def update(self, timestamp, angle, left_angle, right_angle):
+        """动作过程中的每帧更新"""
+        if self.window_start is None:
+            self.window_start = timestamp
+            self.bottom_time = timestamp
+        if angle < self.min_angle:
+            self.min_angle = angle
+            self.bottom_time = timestamp
+        if angle > self.max_angle:
+            self.max_angle = angle
+        self.asymmetry_sum += abs(left_angle - right_angle)
+        self.frames += 1
+
+    def complete(self, rep, timestamp):
+        """完成一次动作，生成指标事件并开始新窗口"""
+        if self.frames == 0 or self.window_start is None:
+            self._reset_window(timestamp)
+            return None
+        event = RepEvent(
+            rep=rep,
+            timestamp=timestamp,
+            range_of_motion=self.max_angle - self.min_angle,
+            depth=self.min_angle,
+            eccentric_time=self.bottom_time - self.window_start,
+            concentric_time=timestamp - self.bottom_time,
+            symmetry=self.asymmetry_sum / self.frames
+        )
+        self.events.append(event)
+        self._reset_window(timestamp)
+        return event
+
+    def reset(self):
+        self.events = []
+        self._reset_window(None)
+
+
+class StabilityTracker:
+    """平板支撑每秒姿势稳定性，使用Welford算法在线计算均值和方差"""
+
+    def __init__(self):
+        self.events = []
+        self._reset_second(None)
+
+    def _reset_second(self, second):
+        self.second = second
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, elapsed, deviation):
+        """elapsed为已坚持的秒数，deviation为身体偏离水平的角度"""
+        second = int(elapsed)
+        if self.second is not None and second != self.second:
+            self.flush()
+        if self.second is None:
+            self.second = second
+        self.count += 1
+        delta = deviation - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (deviation - self.mean)
+
+    def flush(self):
+        """结束当前秒，生成稳定性事件"""
+        if self.second is None or self.count == 0:
+            return None
+        event = StabilityEvent(
+            second=self.second,
+            mean_deviation=self.mean,
+            std_deviation=math.sqrt(self.m2 / self.count)
+        )
+        self.events.append(event)
+        self._reset_second(None)
+        return event
+
+    def reset(self):
+        self.events = []
+        self._reset_second(None)
+
+
+def pack_events(events):
+    """将指标事件打包为紧凑的二进制格式"""
+    if not events:
+        return b""
+    if isinstance(events[0], StabilityEvent):
+        return bytes([_KIND_STABILITY]) + b"".join(_STABILITY_STRUCT.pack(*e) for e in events)
+    return bytes([_KIND_REP]) + b"".join(_REP_STRUCT.pack(*e) for e in events)
+
+
+def unpack_events(data):
+    """解包 pack_events 生成的二进制数据"""
+    if not data:
+        return []
+    if data[0] == _KIND_STABILITY:
+        return [StabilityEvent(*fields) for fields in _STABILITY_STRUCT.iter_unpack(data[1:])]
+    return [RepEvent(*fields) for fields in _REP_STRUCT.iter_unpack(data[1:])]
@@ -0,0 +1,80 @@
+import itertools
+import re
+from collections import namedtuple
+
+from matplotlib.figure import Figure
+
+from . import chart_data
+from .chart_painter import ChartPainter, FOREGROUND_COLOR
+from .database import day_to_date
+
+# 周报中对比图包含的周数（含本周）
+REPORT_WEEKS = 8
+REPORT_FORMATS = ("png", "pdf")
+
+# 一位会员的周报数据，rows 为 (运动类型, 日序号, 记录数, 总量, 最大值, 总时长)，按日期排序
+MemberReport = namedtuple("MemberReport", ["user_id", "name", "rows"])
+
+
+def load_weekly_reports(db, week_start, weeks=REPORT_WEEKS):
+    """一次查询所有会员最近 weeks 周的每日汇总并按会员分组，只返回本周有记录的会员"""
+    first_day = week_start - 7 * (weeks - 1)
+    names = dict(db.fetchall("SELECT id, name FROM users"))
+    rows = db.fetchall("""
+        SELECT user_id, exercise_type, day, record_count, value_sum, value_max, time_sum
+        FROM daily_rollups
+        WHERE day >= ? AND day < ?
+        ORDER BY user_id, day
+    """, (first_day, week_start + 7))
+
+    reports = []
+    for user_id, member_rows in itertools.groupby(rows, key=lambda row: row[0]):
+        member_rows = [row[1:] for row in member_rows]
+        if member_rows[-1][1] >= week_start:
+            reports.append(MemberReport(user_id, names.get(user_id, str(user_id)), member_rows))
+    return reports
+
+
+def report_filename(report, week_start, fmt):
+    """报告文件名：会员ID_会员名称_周一日期.格式"""
+    name = re.sub(r'[\\/:*?"<>|\s]+', "_", report.name)
+    return f"{report.user_id:05d}_{name}_{day_to_date(week_start):%Y%m%d}.{fmt}"
+
+
+class WeeklyReportRenderer:
+    """会员运动周报：本周趋势、本周统计和最近几周对比
+
+    Figure 不依赖界面，用 Agg（PNG）或 PDF 后端离屏保存，多份报告复用同一个 Figure。
+    各报告版式相同，使用固定边距而不是自动布局，省去每份报告的文字尺寸测量。
+    """
+
+    def __init__(self, figsize=(11.69, 8.27), dpi=100):
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        # 右侧留出图例的位置
+        grid = self.figure.add_gridspec(2, 2, left=0.06, right=0.88, top=0.86, bottom=0.12,
+                                        wspace=0.45, hspace=0.6)
+        self.trend = ChartPainter(ax=self.figure.add_subplot(grid[0, 0]))
+        self.stats = ChartPainter(ax=self.figure.add_subplot(grid[0, 1]))
+        self.comparison = ChartPainter(ax=self.figure.add_subplot(grid[1, :]))
+        self.title = self.figure.suptitle("", color=FOREGROUND_COLOR, fontsize=16)
+
+    def render(self, report, week_start, path):
+        """绘制一位会员的周报并保存，格式由扩展名决定"""
+        columns = chart_data.to_columns(report.rows)
+        week = chart_data.slice_days(columns, week_start, week_start + 7)
+        week_rows = [row for row in report.rows if row[1] >= week_start]
+
+        self.trend.paint("趋势图", week)
+        self.stats.paint("统计图", week)
+        self.comparison.paint("对比图", columns)
+
+        sessions = sum(row[2] for row in week_rows)
+        active_days = len({row[1] for row in week_rows})
+        minutes = sum(row[5] for row in week_rows) / 60
+        first, last = day_to_date(week_start), day_to_date(week_start + 6)
+        self.title.set_text(
+            f"{report.name} 运动周报  {first:%Y-%m-%d} ~ {last:%Y-%m-%d}\n"
+            f"训练 {sessions} 次 · 活跃 {active_days} 天 · 总时长 {minutes:.0f} 分钟"
+        )
+        self.figure.savefig(path, facecolor=self.figure.get_facecolor())
+        return path
@@ -0,0 +1,112 @@
+import struct
+import zlib
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+# 一次运动的逐帧关键数值：时间戳（秒）、数值、完成动作的时间戳（秒）
+SessionSeries = namedtuple("SessionSeries", ["timestamps", "values", "rep_times"])
+
+# 版本、开始时间、量化步长、帧数、动作数；版本2在其后增加长间隔数
+_HEADER_V1 = struct.Struct("<Bdfii")
+_HEADER = struct.Struct("<Bdfiii")
+_VERSION = 2
+# uint16 帧间隔的转义值：间隔不小于该值（约65秒，如中途暂停）时，完整间隔另存为int64
+_GAP_ESCAPE = 0xFFFF
+_INT16_MIN, _INT16_MAX = -0x8000, 0x7FFF
+
+
+def _shuffle(values):
+    """按字节平面重排，高位字节集中后更易压缩"""
+    raw = np.ascontiguousarray(values).view(np.uint8).reshape(len(values), values.itemsize)
+    return raw.T.tobytes()
+
+
+def _unshuffle(data, count, dtype):
+    dtype = np.dtype(dtype)
+    planes = np.frombuffer(data, dtype=np.uint8, count=count * dtype.itemsize)
+    return planes.reshape(dtype.itemsize, count).T.copy().view(dtype).ravel()
+
+
+class SeriesRecorder:
+    """在计数过程中逐帧记录关键数值，每帧只追加到紧凑数组"""
+
+    def __init__(self, value_name, step):
+        self.value_name = value_name
+        self.step = step  # 存储时的量化步长
+        self.reset()
+
+    def reset(self):
+        self.timestamps = array("d")
+        self.values = array("f")
+        self.rep_times = array("d")
+
+    def append(self, timestamp, value):
+        self.timestamps.append(timestamp)
+        self.values.append(value)
+
+    def add_rep(self, timestamp):
+        self.rep_times.append(timestamp)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @classmethod
+    def from_bytes(cls, value_name, data):
+        """由编码数据恢复记录器（用于待写入日志的重放）"""
+        series = decode_series(data)
+        recorder = cls(value_name, _HEADER_V1.unpack_from(data)[2])
+        recorder.timestamps = array("d", series.timestamps.tolist())
+        recorder.values = array("f", series.values.tolist())
+        recorder.rep_times = array("d", series.rep_times.tolist())
+        return recorder
+
+    def encode(self):
+        """编码为二进制：时间按毫秒差分(uint16，超长间隔转义)，数值量化后差分(int16)，字节平面重排后压缩"""
+        count = len(self.timestamps)
+        start = self.timestamps[0] if count else (self.rep_times[0] if self.rep_times else 0.0)
+
+        times_ms = np.round((np.frombuffer(self.timestamps, dtype=np.float64) - start) * 1000).astype(np.int64)
+        gaps = np.maximum(np.diff(times_ms, prepend=0), 0)
+        long_gaps = gaps >= _GAP_ESCAPE
+        time_deltas = np.where(long_gaps, _GAP_ESCAPE, gaps).astype("<u2")
+        long_gap_ms = gaps[long_gaps].astype("<i8")
+
+        quantized = np.round(np.frombuffer(self.values, dtype=np.float32) / self.step)
+        quantized = np.clip(quantized, _INT16_MIN, _INT16_MAX).astype(np.int16)
+        # int16 差分溢出时回绕，解码时累加同样回绕，结果不变
+        value_deltas = np.diff(quantized, prepend=np.int16(0)).astype("<i2")
+
+        rep_ms = np.round((np.frombuffer(self.rep_times, dtype=np.float64) - start) * 1000).astype("<i4")
+
+        payload = _shuffle(time_deltas) + _shuffle(value_deltas) + rep_ms.tobytes() + long_gap_ms.tobytes()
+        header = _HEADER.pack(_VERSION, start, self.step, count, len(rep_ms), len(long_gap_ms))
+        return header + zlib.compress(payload, 6)
+
+
+def decode_series(data):
+    """将 SeriesRecorder.encode 的结果解码为 numpy 数组"""
+    version = data[0]
+    if version == 1:
+        # 版本1没有长间隔（超过约65秒的间隔已被截断）
+        _, start, step, count, reps = _HEADER_V1.unpack_from(data)
+        gaps, header_size = 0, _HEADER_V1.size
+    elif version == _VERSION:
+        _, start, step, count, reps, gaps = _HEADER.unpack_from(data)
+        header_size = _HEADER.size
+    else:
+        raise ValueError(f"不支持的时序数据版本: {version}")
+    payload = zlib.decompress(data[header_size:])
+
+    time_deltas = _unshuffle(payload, count, "<u2").astype(np.int64)
+    value_deltas = _unshuffle(payload[2 * count:], count, "<i2")
+    rep_ms = np.frombuffer(payload, dtype="<i4", count=reps, offset=4 * count)
+    if gaps:
+        time_deltas[time_deltas == _GAP_ESCAPE] = np.frombuffer(
+            payload, dtype="<i8", count=gaps, offset=4 * count + 4 * reps)
+
+    timestamps = start + np.cumsum(time_deltas, dtype=np.int64) / 1000.0
+    values = np.cumsum(value_deltas, dtype=np.int16).astype(np.float32) * step
+    rep_times = start + rep_ms / 1000.0
+    return SessionSeries(timestamps, values, rep_times)
@@ -0,0 +1,220 @@
+import gzip
+import http.client
+import json
+import random
+import socket
+import threading
+import logging
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from config.app_config import SYNC_CONFIG
+
+logger = logging.getLogger(__name__)
+
+RECORD_FIELDS = ("id", "timestamp", "exercise_type", "count_or_duration", "exercise_time", "notes",
+                 "ts_epoch", "user_id", "member")
+
+
+class SyncError(Exception):
+    """推送失败，稍后重试"""
+
+
+class SyncAgent:
+    """将本机新增的运动记录增量推送到总部服务器
+
+    以记录ID作为高水位：每批读取ID大于已推送位置的记录，gzip压缩后
+    通过持久HTTP连接POST，服务器按(本机标识, 记录ID)幂等写入，
+    收到成功响应后才推进高水位，因此重试不会产生重复数据。
+    离线期间积压的记录在恢复连接后连续整批推送，直到追上进度；
+    请求失败时按指数退避（带随机抖动）重试。
+    """
+
+    def __init__(self, db, endpoint, kiosk_id=None, batch_size=500, interval=60.0, timeout=10.0,
+                 initial_backoff=2.0, max_backoff=600.0):
+        self.db = db
+        self.endpoint = endpoint
+        url = urlsplit(endpoint)
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"不支持的同步地址: {endpoint}")
+        self.scheme = url.scheme
+        self.netloc = url.netloc
+        self.path = url.path or "/"
+        self.kiosk_id = kiosk_id or socket.gethostname()
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.conn = None
+        self.thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self.pushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.bytes_sent = 0
+        self.last_error = None
+        self.last_success = None
+
+    def start(self):
+        """启动后台同步线程"""
+        if self.thread and self.thread.is_alive():
+            return
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name="sync-agent", daemon=True)
+        self.thread.start()
+
+    def wake(self, *_):
+        """有新记录写入时提前开始同步（可作为 RecordWriter 的监听器）"""
+        self._wake.set()
+
+    def close(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        if self.thread:
+            self.thread.join(timeout)
+        self._close_connection()
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            pushed_before = self.pushed
+            try:
+                self.sync(stop=self._stop)
+                failures = 0
+                wait = self.interval
+            except Exception as e:
+                # 本轮已有进展时从头计算退避，避免追赶积压时偶发失败导致长时间等待
+                failures = 1 if self.pushed > pushed_before else failures + 1
+                wait = self.backoff_delay(failures)
+                logger.warning(f"同步失败（第 {failures} 次），{wait:.0f} 秒后重试: {str(e)}")
+            if failures:
+                # 退避期间不因新记录提前重试
+                self._stop.wait(wait)
+            else:
+                self._wake.wait(wait)
+            self._wake.clear()
+
+    def backoff_delay(self, failures):
+        """第 failures 次失败后的重试等待（秒）"""
+        delay = min(self.initial_backoff * (2 ** (failures - 1)), self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
+
+    def get_high_water_mark(self):
+        """已成功推送的最大记录ID"""
+        return self.db.fetch_value("SELECT last_id FROM sync_state WHERE target = ?", (self.endpoint,), default=0)
+
+    def _set_high_water_mark(self, last_id):
+        with self.db.transaction():
+            self.db.execute("""
+                INSERT INTO sync_state (target, last_id, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(target) DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at
+            """, (self.endpoint, last_id, datetime.now().isoformat()))
+
+    def pending_count(self):
+        """尚未推送的记录数（按主键范围统计）"""
+        return self.db.fetch_value(
+            "SELECT COUNT(*) FROM exercise_records WHERE id > ?", (self.get_high_water_mark(),), default=0
+        )
+
+    def _read_batch(self, after_id):
+        return self.db.fetchall("""
+            SELECT r.id, r.timestamp, r.exercise_type, r.count_or_duration, r.exercise_time, r.notes,
+                   r.ts_epoch, r.user_id, u.name
+            FROM exercise_records r LEFT JOIN users u ON u.id = r.user_id
+            WHERE r.id > ?
+            ORDER BY r.id
+            LIMIT ?
+        """, (after_id, self.batch_size))
+
+    def _encode(self, rows):
+        payload = {
+            "kiosk_id": self.kiosk_id,
+            "records": [dict(zip(RECORD_FIELDS, row)) for row in rows],
+        }
+        return gzip.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"), 6)
+
+    def _connection(self):
+        if self.conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            self.conn = cls(self.netloc, timeout=self.timeout)
+        return self.conn
+
+    def _close_connection(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def _post(self, body, first_id, last_id):
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+            "Idempotency-Key": f"{self.kiosk_id}:{first_id}-{last_id}",
+        }
+        try:
+            conn = self._connection()
+            conn.request("POST", self.path, body=body, headers=headers)
+            response = conn.getresponse()
+            # 读完响应体才能复用连接
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self._close_connection()
+            raise SyncError(f"连接失败: {str(e)}") from e
+        if response.will_close:
+            self._close_connection()
+        if not 200 <= response.status < 300:
+            raise SyncError(f"服务器返回 {response.status}: {data[:200].decode('utf-8', 'replace')}")
+        return data
+
+    def sync(self, stop=None, progress=None):
+        """推送所有未同步的记录，返回本次推送的记录数；失败时抛出 SyncError"""
+        with self._lock:
+            total = 0
+            last_id = self.get_high_water_mark()
+            while not (stop and stop.is_set()):
+                rows = self._read_batch(last_id)
+                if not rows:
+                    break
+                body = self._encode(rows)
+                try:
+                    self._post(body, rows[0][0], rows[-1][0])
+                except SyncError as e:
+                    self.failures += 1
+                    self.last_error = str(e)
+                    raise
+                last_id = rows[-1][0]
+                self._set_high_water_mark(last_id)
+
+                total += len(rows)
+                self.pushed += len(rows)
+                self.batches += 1
+                self.bytes_sent += len(body)
+                self.last_success = datetime.now()
+                if progress:
+                    progress(total, last_id)
+                if len(rows) < self.batch_size:
+                    break
+            if total:
+                logger.info(f"已同步 {total} 条记录到 {self.endpoint}，高水位 {last_id}")
+            return total
+
+    def get_metrics(self):
+        return {
+            "pushed": self.pushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "bytes_sent": self.bytes_sent,
+            "last_error": self.last_error,
+            "last_success": self.last_success,
+            "high_water_mark": self.get_high_water_mark(),
+        }
+
+
+def create_sync_agent(db):
+    """根据配置创建同步代理，未启用时返回None"""
+    config = dict(SYNC_CONFIG)
+    if not config.pop("enabled"):
+        return None
+    return SyncAgent(db, **config)
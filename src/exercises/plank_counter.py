@@ -1,10 +1,13 @@
 from ..core.exercise_counter import ExerciseCounter
+from ..core.rep_metrics import StabilityTracker
 import numpy as np
-import time
 from ..core.logger import logger
 
 class PlankCounter(ExerciseCounter):
-    def __init__(self):
+    series_name = "body_deviation"  # 逐帧记录身体偏离水平的角度
+    
+    def __init__(self, body_tolerance=30, leg_tolerance=30, arm_angle_min=75,
+                 arm_angle_max=105, visibility_threshold=0.5, track_metrics=True):
         super().__init__("平板支撑")
         self.start_time = None
         self.last_valid_time = None
@@ -14,12 +17,24 @@ class PlankCounter(ExerciseCounter):
         self.is_finished = False
         self.debug = True
         
+        # 判定参数
+        self.body_tolerance = body_tolerance  # 身体偏离水平的最大角度
+        self.leg_tolerance = leg_tolerance  # 腿部偏离水平的最大角度
+        self.arm_angle_min = arm_angle_min
+        self.arm_angle_max = arm_angle_max
+        self.visibility_threshold = visibility_threshold
+        
+        # 每秒姿势稳定性
+        self.body_deviation = 0
+        if track_metrics:
+            self.metrics = StabilityTracker()
+        
     def calculate_time(self):
         """计算当前有效时间"""
-        if not self.start_time:
+        if self.start_time is None:
             return 0
         if self.is_valid_pose_flag:
-            return int(time.time() - self.start_time)
+            return int(self.clock() - self.start_time)
         return self.total_time
         
     def process_pose(self, landmarks):
@@ -37,14 +52,16 @@ class PlankCounter(ExerciseCounter):
             debug_info = valid_result[1] if isinstance(valid_result, tuple) else ""
             
             # 更新时间
-            current_time = time.time()
+            current_time = self.clock()
             
             if not is_valid:
                 # 处理无效姿势
                 if self.is_valid_pose_flag:  # 如果之前是有效姿势
                     self.is_valid_pose_flag = False
-                    if self.start_time:
+                    if self.start_time is not None:
                         self.total_time = int(current_time - self.start_time)
+                    if self.metrics:
+                        self.metrics.flush()
                     if self.total_time > 0:
                         self.is_finished = True
                         return None, f"姿势不正确，本次平板支撑结束，坚持了 {self.total_time} 秒", None, True
@@ -60,6 +77,11 @@ class PlankCounter(ExerciseCounter):
             # 计算当前时间
             current_duration = self.calculate_time()
             
+            # 更新姿势稳定性
+            if self.metrics:
+                self.metrics.update(current_time - self.start_time, self.body_deviation)
+            self.record_value(current_time, self.body_deviation)
+            
             # 每5秒播报一次时间
             should_announce = False
             if current_duration >= 5 and (current_duration - self.last_announce_time) >= 5:
@@ -78,8 +100,10 @@ class PlankCounter(ExerciseCounter):
         """处理无效姿势"""
         if self.is_valid_pose_flag:
             self.is_valid_pose_flag = False
-            if self.start_time:
-                self.total_time = int(time.time() - self.start_time)
+            if self.start_time is not None:
+                self.total_time = int(self.clock() - self.start_time)
+            if self.metrics:
+                self.metrics.flush()
                 
     def get_final_time(self):
         """获取最终坚持时间"""
@@ -94,7 +118,10 @@ class PlankCounter(ExerciseCounter):
         self.total_time = 0
         self.is_valid_pose_flag = False
         self.last_announce_time = 0
-        self.is_finished = False 
+        self.is_finished = False
+        if self.metrics:
+            self.metrics.reset()
+        self.series = self.create_series()
         
     def is_valid_pose(self, landmarks):
         """检查是否是有效的平板支撑姿势"""
@@ -107,7 +134,7 @@ class PlankCounter(ExerciseCounter):
             
             # 降低可见性要求
             key_points = [left_shoulder, left_hip, left_ankle, left_elbow]
-            if any(point.visibility < 0.5 for point in key_points):
+            if any(point.visibility < self.visibility_threshold for point in key_points):
                 return False, "关键点不可见"
             
             # 计算身体角度
@@ -129,11 +156,12 @@ class PlankCounter(ExerciseCounter):
             debug_info = (f"身体角度: {body_angle:.1f}° 腿部角度: {leg_angle:.1f}° "
                          f"手臂角度: {arm_angle:.1f}°")
             logger.debug(debug_info)
+            self.body_deviation = abs(180 - body_angle)
             
             # 判断各个部位是否符合要求
-            is_body_straight = abs(180 - body_angle) < 30
-            is_leg_straight = abs(180 - leg_angle) < 30
-            is_arm_valid = 75 < arm_angle < 105
+            is_body_straight = abs(180 - body_angle) < self.body_tolerance
+            is_leg_straight = abs(180 - leg_angle) < self.leg_tolerance
+            is_arm_valid = self.arm_angle_min < arm_angle < self.arm_angle_max
             
             # 构建详细的反馈信息
             feedback = []
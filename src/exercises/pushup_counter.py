@@ -1,15 +1,27 @@
 from ..core.exercise_counter import ExerciseCounter
+from ..core.rep_metrics import RepMetricsTracker
 import numpy as np
 
 class PushupCounter(ExerciseCounter):
-    def __init__(self):
+    series_name = "elbow_angle"  # 逐帧记录两臂肘关节平均角度
+    
+    def __init__(self, up_angle=160, down_angle=90, visibility_threshold=0.5, min_visible_points=4,
+                 track_metrics=True):
         super().__init__("俯卧撑")
         self.stage = None
         self.counter = 0
         self.last_angle = None
         self.stable_count = 0
-        self.angle_threshold = 20
-        self.stable_threshold = 5
+        
+        # 判定参数
+        self.up_angle = up_angle  # 大于该角度视为手臂伸直
+        self.down_angle = down_angle  # 小于该角度视为手臂弯曲
+        self.visibility_threshold = visibility_threshold
+        self.min_visible_points = min_visible_points
+        
+        # 每次俯卧撑的幅度、节奏、深度和左右对称性
+        if track_metrics:
+            self.metrics = RepMetricsTracker()
         
     def is_valid_pose(self, landmarks):
         """检查是否是有效的俯卧撑姿势"""
@@ -24,10 +36,10 @@ class PushupCounter(ExerciseCounter):
         
         visible_points = 0
         for point in key_points:
-            if landmarks[point.value].visibility > 0.5:
+            if landmarks[point.value].visibility > self.visibility_threshold:
                 visible_points += 1
         
-        if visible_points < 4:
+        if visible_points < self.min_visible_points:
             return False
             
         return True
@@ -60,16 +72,28 @@ class PushupCounter(ExerciseCounter):
             right_angle = self.calculate_angle(right_shoulder, right_elbow, right_wrist)
             avg_angle = (left_angle + right_angle) / 2
             
+            # 更新动作质量指标
+            now = self.clock()
+            self.record_value(now, avg_angle)
+            if self.metrics:
+                if avg_angle > self.up_angle and self.stage != "down":
+                    self.metrics.at_top(now, avg_angle)
+                else:
+                    self.metrics.update(now, avg_angle, left_angle, right_angle)
+            
             # 状态判断
-            if avg_angle > 160:  # 手臂伸直
+            if avg_angle > self.up_angle:  # 手臂伸直
                 if self.stage == "down":
                     self.stage = "up"
                     self.counter += 1
+                    if self.metrics:
+                        self.metrics.complete(self.counter, now)
+                    self.record_rep(now)
                     return avg_angle, "完成一次俯卧撑"
                 self.stage = "up"
                 return avg_angle, "请下压"
                 
-            elif avg_angle < 90:  # 手臂弯曲
+            elif avg_angle < self.down_angle:  # 手臂弯曲
                 if self.stage != "down":
                     self.stage = "down"
                     return avg_angle, "请上推"
@@ -1,10 +1,13 @@
 from ..core.exercise_counter import ExerciseCounter
 import numpy as np
 from ..core.logger import logger
-import time
 
 class RopeCounter(ExerciseCounter):
-    def __init__(self):
+    series_name = "hip_height"  # 逐帧记录上半身关键点的平均高度（归一化坐标）
+    series_step = 0.0005
+    
+    def __init__(self, min_height_change=0.02, min_jump_interval=0.15,
+                 visibility_threshold=0.5):
         super().__init__("跳绳")
         self.stage = "down"
         self.counter = 0
@@ -15,15 +18,15 @@ class RopeCounter(ExerciseCounter):
         self.buffer_size = 3
         
         # 调整参数
-        self.min_height_change = 0.02
-        self.min_jump_interval = 0.15
+        self.min_height_change = min_height_change
+        self.min_jump_interval = min_jump_interval
         
         # 状态控制
         self.last_jump_time = 0
         self.jump_detected = False
         
         # 添加可见性阈值
-        self.visibility_threshold = 0.5
+        self.visibility_threshold = visibility_threshold
         
     def get_positions(self, landmarks):
         """获取关键位置信息"""
@@ -41,7 +44,7 @@ class RopeCounter(ExerciseCounter):
         
         return {
             'avg_height': avg_height,
-            'timestamp': time.time()
+            'timestamp': self.clock()
         }
         
     def detect_jump(self, current_pos):
@@ -109,6 +112,7 @@ class RopeCounter(ExerciseCounter):
             
             # 获取当前位置信息
             current_pos = self.get_positions(landmarks)
+            self.record_value(current_pos['timestamp'], current_pos['avg_height'])
             
             # 添加到缓冲区
             self.position_buffer.append(current_pos)
@@ -121,6 +125,7 @@ class RopeCounter(ExerciseCounter):
                 is_jump = self.detect_jump(current_pos)
                 if is_jump:
                     self.counter += 1
+                    self.record_rep(current_pos['timestamp'])
             
             # 更新上一帧位置
             self.last_positions = current_pos
@@ -1,8 +1,12 @@
 from ..core.exercise_counter import ExerciseCounter
+from ..core.rep_metrics import RepMetricsTracker
 import numpy as np
 
 class SquatCounter(ExerciseCounter):
-    def __init__(self):
+    series_name = "knee_angle"  # 逐帧记录两腿膝关节平均角度
+    
+    def __init__(self, stand_angle=160, squat_angle=90, stable_angle=15,
+                 visibility_threshold=0.3, max_hip_z_diff=0.3, track_metrics=True):
         super().__init__("深蹲")
         self.stage = "up"  # 初始状态设为站立
         self.counter = 0
@@ -10,6 +14,17 @@ class SquatCounter(ExerciseCounter):
         self.stable_count = 0
         self.debug = True  # 开启调试信息
         
+        # 判定参数
+        self.stand_angle = stand_angle  # 大于该角度视为站立
+        self.squat_angle = squat_angle  # 小于该角度视为蹲下
+        self.stable_angle = stable_angle  # 防抖动的角度变化阈值
+        self.visibility_threshold = visibility_threshold
+        self.max_hip_z_diff = max_hip_z_diff
+        
+        # 每次深蹲的幅度、节奏、深度和左右对称性
+        if track_metrics:
+            self.metrics = RepMetricsTracker()
+        
     def is_valid_pose(self, landmarks):
         """检查是否是有效的深蹲姿势"""
         # 检查关键点的可见性
@@ -24,7 +39,7 @@ class SquatCounter(ExerciseCounter):
         
         # 检查关键点可见性（降低阈值）
         for point in key_points:
-            if landmarks[point.value].visibility < 0.3:  # 降低可见性要求
+            if landmarks[point.value].visibility < self.visibility_threshold:
                 return False
                 
         # 检查是否正面朝向（放宽要求）
@@ -32,7 +47,7 @@ class SquatCounter(ExerciseCounter):
         right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
         hip_z_diff = abs(left_hip.z - right_hip.z)
         
-        if hip_z_diff > 0.3:  # 放宽z坐标差异的限制
+        if hip_z_diff > self.max_hip_z_diff:
             return False
             
         return True
@@ -75,20 +90,32 @@ class SquatCounter(ExerciseCounter):
             # 添加防抖动逻辑（降低要求）
             if self.last_angle is not None:
                 angle_diff = abs(angle - self.last_angle)
-                if angle_diff < 15:  # 进一步放宽角度变化阈值
+                if angle_diff < self.stable_angle:
                     self.stable_count += 1
                 else:
                     self.stable_count = 0
             
             self.last_angle = angle
             
+            # 更新动作质量指标
+            now = self.clock()
+            self.record_value(now, angle)
+            if self.metrics:
+                if angle > self.stand_angle and self.stage != "down":
+                    self.metrics.at_top(now, angle)
+                else:
+                    self.metrics.update(now, angle, left_angle, right_angle)
+            
             # 调试信息
             debug_info = f"角度: {angle:.1f}° | 状态: {self.stage} | 稳定计数: {self.stable_count}"
             
             # 状态判断和计数逻辑
-            if angle > 160:  # 站立姿势
+            if angle > self.stand_angle:  # 站立姿势
                 if self.stage == "down":  # 如果之前是蹲下状态
                     self.counter += 1  # 完成一次深蹲
+                    if self.metrics:
+                        self.metrics.complete(self.counter, now)
+                    self.record_rep(now)
                     self.stage = "up"
                     self.stable_count = 0
                     return angle, f"深蹲完成！计数：{self.counter} ({debug_info})"
@@ -96,7 +123,7 @@ class SquatCounter(ExerciseCounter):
                 self.stage = "up"
                 return angle, f"请下蹲 ({debug_info})"
                 
-            elif angle < 90:  # 蹲下姿势
+            elif angle < self.squat_angle:  # 蹲下姿势
                 if self.stage == "up":  # 如果之前是站立状态
                     self.stage = "down"
                     self.stable_count = 0
@@ -1,17 +1,33 @@
 import customtkinter as ctk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import sqlite3
+from PIL import ImageTk
+from ..core.database import db_manager
+from ..core.chart_painter import configure_matplotlib
+from .chart_worker import ChartWorker
 from datetime import datetime, timedelta
-import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 轮询后台渲染结果的间隔（毫秒），约一帧
+POLL_INTERVAL = 16
+# 窗口尺寸变化后等待多久再按新尺寸重绘（毫秒）
+RESIZE_DELAY = 150
+# 时间范围选项对应的天数，None 表示全部历史
+TIME_RANGE_DAYS = {
+    "最近7天": 7,
+    "最近30天": 30,
+    "最近90天": 90,
+    "最近1年": 365,
+    "全部": None
+}
+# 图表区域尚未布局时使用的尺寸
+DEFAULT_CHART_SIZE = (1000, 600)
+
 class AnalysisFrame(ctk.CTkFrame):
-    def __init__(self, parent, return_callback):
+    def __init__(self, parent, return_callback, user_id):
         super().__init__(parent)
         self.return_callback = return_callback
+        self.user_id = user_id
         self.setup_ui()
         
     def setup_ui(self):
@@ -60,7 +76,7 @@ class AnalysisFrame(ctk.CTkFrame):
         ).pack(side="left", padx=5)
         
         self.time_var = ctk.StringVar(value="最近7天")
-        time_options = ["最近7天", "最近30天", "最近90天"]
+        time_options = list(TIME_RANGE_DAYS)
         
         time_menu = ctk.CTkOptionMenu(
             control_frame,
@@ -88,268 +104,95 @@ class AnalysisFrame(ctk.CTkFrame):
         exercise_menu.pack(side="left", padx=5)
         
         # 设置matplotlib中文字体
-        plt.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
-        plt.rcParams['axes.unicode_minus'] = False     # 用来正常显示负号
+        configure_matplotlib()
         
-        # 图表显示区域
+        # 图表显示区域：查询、汇总和渲染都在后台线程完成，这里只显示渲染好的图像
         self.chart_frame = ctk.CTkFrame(self)
         self.chart_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        # 图像按区域尺寸渲染，不让图像反过来撑大区域
+        self.chart_frame.pack_propagate(False)
+        
+        self.chart_label = ctk.CTkLabel(self.chart_frame, text="")
+        self.chart_label.pack(fill="both", expand=True)
         
-        # 定义全局颜色方案
-        self.color_scheme = {
-            "深蹲": "#FF6B6B",    # 红色
-            "俯卧撑": "#4ECDC4",  # 青色
-            "平板支撑": "#45B7D1", # 蓝色
-            "跳绳": "#FFB347",    # 橙色
-            "总计": "#98D8AA",    # 绿色
-            "平均": "#4A90E2"     # 蓝色
-        }
+        # 轻量的加载提示，保留上一张图表直到新图表就绪
+        self.loading_label = ctk.CTkLabel(
+            self.chart_frame,
+            text="加载中...",
+            text_color="#666666"
+        )
+        
+        self.chart_worker = ChartWorker(db_manager)
+        self.poll_job = None
+        self.resize_job = None
+        self.chart_size = None
+        self.chart_frame.bind("<Configure>", self.chart_resized)
         
         # 初始显示图表
         self.update_chart()
         
     def update_chart(self, _=None):
-        # 清空现有图表
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-            
-        # 获取数据
-        data = self.get_chart_data()
-        
-        if not data:  # 如果没有数据
-            self.show_no_data_message()
+        # 提交到后台线程，取代尚未完成的请求，界面不等待
+        width, height = self.get_chart_size()
+        self.chart_worker.submit(
+            self.chart_var.get(),
+            self.user_id,
+            self.get_start_date(),
+            self.exercise_var.get(),
+            width,
+            height
+        )
+        self.loading_label.place(relx=1.0, rely=0.0, anchor="ne", x=-10, y=10)
+        if self.poll_job is None:
+            self.poll_job = self.after(POLL_INTERVAL, self.poll_chart)
+        
+    def poll_chart(self):
+        """轮询后台渲染结果，只显示最新请求的图表"""
+        self.poll_job = None
+        result = self.chart_worker.take_result()
+        if result is None:
+            if self.chart_worker.pending:
+                self.poll_job = self.after(POLL_INTERVAL, self.poll_chart)
             return
         
-        # 创建图表
-        fig, ax = plt.subplots(figsize=(10, 6))
-        fig.patch.set_facecolor('#2b2b2b')
-        ax.set_facecolor('#2b2b2b')
-        
-        # 设置样式
-        ax.spines['bottom'].set_color('#666666')
-        ax.spines['top'].set_color('#666666') 
-        ax.spines['right'].set_color('#666666')
-        ax.spines['left'].set_color('#666666')
-        ax.tick_params(colors='#666666')
-        ax.yaxis.label.set_color('#666666')
-        ax.xaxis.label.set_color('#666666')
-        ax.title.set_color('#666666')
-        
-        # 根据图表类型绘制
-        if self.chart_var.get() == "趋势图":
-            self.draw_trend_chart(ax, data)
-        elif self.chart_var.get() == "统计图":
-            self.draw_stats_chart(ax, data)
-        else:
-            self.draw_comparison_chart(ax, data)
-            
-        # 调整布局
-        plt.tight_layout()
-        
-        # 显示图表
-        canvas = FigureCanvasTkAgg(fig, self.chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-        
-    def get_chart_data(self):
-        conn = sqlite3.connect('exercise_data.db')
-        cursor = conn.cursor()
-        
-        # 确定时间范围
-        days = 7
-        if self.time_var.get() == "最近30天":
-            days = 30
-        elif self.time_var.get() == "最近90天":
-            days = 90
-            
-        start_date = datetime.now() - timedelta(days=days)
-        
-        # 构建查询条件
-        where_clause = ["timestamp >= ?"]
-        params = [start_date.isoformat()]
-        
-        # 添加运动类型筛选
-        if self.exercise_var.get() != "全部":
-            where_clause.append("exercise_type = ?")
-            params.append(self.exercise_var.get())
-        
-        # 查询数据
-        query = f"""
-            SELECT exercise_type, timestamp, count_or_duration 
-            FROM exercise_records 
-            WHERE {' AND '.join(where_clause)}
-            ORDER BY timestamp
-        """
-        
-        cursor.execute(query, params)
-        data = cursor.fetchall()
-        conn.close()
-        
-        return data
-        
-    def draw_trend_chart(self, ax, data):
-        try:
-            # 按运动类型和日期分组数据
-            exercise_data = {}
-            for exercise, timestamp, value in data:
-                try:
-                    date = datetime.fromisoformat(timestamp).date()
-                    if exercise not in exercise_data:
-                        exercise_data[exercise] = {}
-                    if date not in exercise_data[exercise]:
-                        exercise_data[exercise][date] = []
-                    exercise_data[exercise][date].append(value)
-                except Exception as e:
-                    logger.error(f"日期处理错误: {str(e)}")
-                    continue
-            
-            if not exercise_data:  # 如果没有有效数据
-                return
-            
-            # 获取整体的日期范围
-            all_dates = set()
-            for dates_data in exercise_data.values():
-                all_dates.update(dates_data.keys())
-            if not all_dates:  # 如果没有有效日期
-                return
-            
-            date_range = sorted(all_dates)
-            
-            # 绘制每种运动的趋势线
-            for exercise, dates_data in exercise_data.items():
-                try:
-                    # 对每天的数据进行聚合
-                    aggregated_data = {
-                        date: {
-                            'total': sum(values),
-                            'count': len(values),
-                            'avg': sum(values) / len(values)
-                        }
-                        for date, values in dates_data.items()
-                    }
-                    
-                    # 排序日期
-                    sorted_dates = sorted(dates_data.keys())
-                    
-                    # 根据运动类型选择合适的数据表示
-                    if exercise == "平板支撑":
-                        # 平板支撑使用当天最长时间
-                        values = [max(dates_data[date]) for date in sorted_dates]
-                        ylabel = "时长(秒)"
-                    else:
-                        # 其他运动使用当天总次数
-                        values = [aggregated_data[date]['total'] for date in sorted_dates]
-                        ylabel = "次数"
-                    
-                    if values:  # 确保有数据再绘制
-                        # 使用移动平均平滑曲线
-                        if len(values) > 3:
-                            values = np.convolve(values, np.ones(3)/3, mode='valid')
-                            plot_dates = sorted_dates[1:-1]  # 相应调整日期
-                        else:
-                            plot_dates = sorted_dates
-                        
-                        ax.plot(plot_dates, values,
-                               label=exercise,
-                               color=self.color_scheme[exercise],
-                               marker='o',
-                               linewidth=2,
-                               markersize=6)
-                
-                except Exception as e:
-                    logger.error(f"绘制{exercise}趋势线错误: {str(e)}")
-                    continue
-            
-            # 设置图表属性
-            ax.set_title("运动趋势分析")
-            ax.set_xlabel("日期")
-            ax.set_ylabel(ylabel)
-            ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-            ax.grid(True, color='#666666', alpha=0.3)
-            
-            # 设置合适的日期范围
-            if date_range:
-                ax.set_xlim(min(date_range), max(date_range))
-            
-            # 优化日期显示
-            ax.xaxis.set_major_locator(plt.AutoLocator())
-            ax.xaxis.set_major_formatter(plt.DateFormatter('%Y-%m-%d'))
-            plt.xticks(rotation=45)
-            
-        except Exception as e:
-            logger.error(f"绘制趋势图错误: {str(e)}")
-        
-    def draw_stats_chart(self, ax, data):
-        # 统计每种运动的总次数/时长和平均值
-        stats = {}
-        for exercise, _, value in data:
-            if exercise not in stats:
-                stats[exercise] = {"total": 0, "count": 0}
-            stats[exercise]["total"] += value
-            stats[exercise]["count"] += 1
-        
-        exercises = list(stats.keys())
-        totals = [stats[ex]["total"] for ex in exercises]
-        averages = [stats[ex]["total"]/stats[ex]["count"] for ex in exercises]
-        
-        x = np.arange(len(exercises))
-        width = 0.35
-        
-        # 创建双柱状图
-        ax.bar(x - width/2, totals, width, label='总计', color='#FF6B6B')
-        ax.bar(x + width/2, averages, width, label='平均', color='#4ECDC4')
-        
-        ax.set_title("运动统计分析")
-        ax.set_xticks(x)
-        ax.set_xticklabels(exercises)
-        ax.legend()
-        
-        # 添加数值标签
-        for i, v in enumerate(totals):
-            ax.text(i - width/2, v, str(int(v)), ha='center', va='bottom')
-        for i, v in enumerate(averages):
-            ax.text(i + width/2, v, f"{v:.1f}", ha='center', va='bottom')
-        
-    def draw_comparison_chart(self, ax, data):
-        # 按周统计数据
-        weekly_stats = {}
-        for exercise, timestamp, value in data:
-            date = datetime.fromisoformat(timestamp).date()
-            week_start = date - timedelta(days=date.weekday())
-            if week_start not in weekly_stats:
-                weekly_stats[week_start] = {}
-            if exercise not in weekly_stats[week_start]:
-                weekly_stats[week_start][exercise] = 0
-            weekly_stats[week_start][exercise] += value
-        
-        # 准备数据
-        weeks = sorted(weekly_stats.keys())
-        exercises = sorted(set([ex for w in weekly_stats.values() for ex in w.keys()]))
-        
-        # 创建堆叠柱状图
-        bottom = np.zeros(len(weeks))
-        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']
-        
-        for exercise, color in zip(exercises, colors):
-            values = [weekly_stats[w].get(exercise, 0) for w in weeks]
-            ax.bar(weeks, values, bottom=bottom, label=exercise, color=color)
-            bottom += values
-        
-        ax.set_title("每周运动对比")
-        ax.set_xlabel("周次")
-        ax.set_ylabel("运动量")
-        ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-        
-        # 自动旋转日期标签
-        plt.xticks(rotation=45)
+        self.loading_label.place_forget()
+        if result.error:
+            self.chart_label.configure(image="", text=f"图表生成失败: {result.error}")
+            self.chart_label.image = None
+            return
+        photo = ImageTk.PhotoImage(image=result.image)
+        self.chart_label.configure(image=photo, text="")
+        self.chart_label.image = photo
         
-    def show_no_data_message(self):
-        """显示无数据提示"""
-        msg_frame = ctk.CTkFrame(self.chart_frame)
-        msg_frame.pack(expand=True)
+    def chart_resized(self, event):
+        size = (event.width, event.height)
+        if size == self.chart_size:
+            return
+        self.chart_size = size
+        # 拖动窗口时只按最终尺寸重绘一次
+        if self.resize_job is not None:
+            self.after_cancel(self.resize_job)
+        self.resize_job = self.after(RESIZE_DELAY, self.resize_done)
+        
+    def resize_done(self):
+        self.resize_job = None
+        self.update_chart()
         
-        ctk.CTkLabel(
-            msg_frame,
-            text="暂无数据",
-            font=ctk.CTkFont(size=24)
-        ).pack(pady=50) 
\ No newline at end of file
+    def get_chart_size(self):
+        if self.chart_size is None or min(self.chart_size) <= 1:
+            return DEFAULT_CHART_SIZE
+        return self.chart_size
+        
+    def destroy(self):
+        for job in (self.poll_job, self.resize_job):
+            if job is not None:
+                self.after_cancel(job)
+        self.chart_worker.close()
+        super().destroy()
+        
+    def get_start_date(self):
+        # 确定时间范围，“全部”不限起始日期
+        days = TIME_RANGE_DAYS.get(self.time_var.get(), 7)
+        if days is None:
+            return None
+        return datetime.now() - timedelta(days=days)
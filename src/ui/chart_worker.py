@@ -0,0 +1,128 @@
+import threading
+import time
+import logging
+from collections import namedtuple
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+from ..core import chart_data
+from ..core.chart_painter import ChartPainter
+
+logger = logging.getLogger(__name__)
+
+ChartRequest = namedtuple("ChartRequest", ["generation", "chart_type", "user_id", "start_date",
+                                           "exercise_type", "width", "height"])
+# image 为渲染好的 PIL 图像，失败时为 None 并在 error 中给出原因
+ChartResult = namedtuple("ChartResult", ["generation", "image", "error", "elapsed"])
+
+
+class ChartWorker:
+    """在后台线程中查询、汇总并离屏渲染数据分析图表
+
+    每次提交都会得到递增的代号，只保留最新的请求：尚未开始的旧请求直接被覆盖，
+    进行中的请求在查询、汇总后检查代号，已被取代则放弃而不再渲染。
+    Figure 只由后台线程访问，界面线程只取走最新代号的渲染结果。
+    """
+
+    def __init__(self, db, dpi=100):
+        self.db = db
+        self.dpi = dpi
+        self.superseded = 0
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._request = None
+        self._result = None
+        self._done = 0
+        self._closed = False
+        self.thread = threading.Thread(target=self._run, name="chart-worker", daemon=True)
+        self.thread.start()
+
+    def submit(self, chart_type, user_id, start_date, exercise_type, width, height):
+        """提交新的图表请求并取代之前的请求，返回其代号"""
+        with self._cond:
+            self._generation += 1
+            if self._request is not None:
+                self.superseded += 1
+            self._request = ChartRequest(self._generation, chart_type, user_id, start_date,
+                                         exercise_type, max(width, 1), max(height, 1))
+            self._cond.notify()
+            return self._generation
+
+    @property
+    def pending(self):
+        """最新请求是否尚未完成"""
+        with self._cond:
+            return self._done != self._generation
+
+    def take_result(self):
+        """取走最新请求的结果，尚未完成时返回None"""
+        with self._cond:
+            result = self._result
+            if result is None or result.generation != self._generation:
+                return None
+            self._result = None
+            return result
+
+    def close(self, timeout=2.0):
+        with self._cond:
+            self._closed = True
+            self._request = None
+            self._cond.notify()
+        self.thread.join(timeout)
+
+    def _stale(self, request):
+        with self._cond:
+            return self._closed or request.generation != self._generation
+
+    def _run(self):
+        painter = ChartPainter()
+        canvas = FigureCanvasAgg(painter.figure)
+        try:
+            while True:
+                with self._cond:
+                    while self._request is None and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        break
+                    request, self._request = self._request, None
+
+                start = time.perf_counter()
+                try:
+                    image = self._render(request, painter, canvas)
+                    error = None
+                except Exception as e:
+                    logger.error(f"生成图表失败: {str(e)}")
+                    image, error = None, str(e)
+                    # 出错后清空坐标轴，下次从头重画
+                    painter.paint_no_data()
+
+                with self._cond:
+                    if (image is None and error is None) or request.generation != self._generation:
+                        self.superseded += 1
+                        continue
+                    self._done = request.generation
+                    self._result = ChartResult(request.generation, image, error, time.perf_counter() - start)
+        finally:
+            painter.figure.clear()
+            self.db.release_connection()
+
+    def _render(self, request, painter, canvas):
+        """查询并渲染一张图表，请求已被取代时返回None"""
+        rows = self.db.get_daily_rollups(request.user_id, request.start_date, request.exercise_type)
+        if self._stale(request):
+            return None
+
+        figure = painter.figure
+        size = (request.width / self.dpi, request.height / self.dpi)
+        if tuple(figure.get_size_inches()) != size:
+            figure.set_dpi(self.dpi)
+            figure.set_size_inches(size)
+        painter.paint(request.chart_type, chart_data.to_columns(rows))
+        if self._stale(request):
+            return None
+
+        canvas.draw()
+        width, height = canvas.get_width_height()
+        # 复制一份，画布缓冲区会被下一次渲染覆盖
+        return Image.frombuffer("RGBA", (width, height), canvas.buffer_rgba(), "raw", "RGBA", 0, 1).copy()
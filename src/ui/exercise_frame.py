@@ -11,18 +11,20 @@ from ..core.pose_detector import PoseDetector
 from ..exercises.pushup_counter import PushupCounter
 from ..exercises.plank_counter import PlankCounter
 import customtkinter as ctk
-from ..core.database import db_manager
+from ..core.record_writer import record_writer
 import logging
 import os
 import numpy as np
 import time
+from config.app_config import COUNTER_CONFIG
 
 logger = logging.getLogger(__name__)
 
 class ExerciseFrame(ctk.CTkFrame):
-    def __init__(self, parent, exercise_name, return_callback):
+    def __init__(self, parent, exercise_name, return_callback, user_id):
         super().__init__(parent)
         self.exercise_name = exercise_name
+        self.user_id = user_id  # 记录所属的会员
         self.return_callback = return_callback
         self.window = parent
         
@@ -84,6 +86,11 @@ class ExerciseFrame(ctk.CTkFrame):
             self.cap.release()
             self.cap = None
         
+        # 释放姿势检测后端
+        if self.pose_detector:
+            self.pose_detector.close()
+            self.pose_detector = None
+        
         # 清理语音系统
         if self.speech_queue:
             # 清空队列
@@ -142,11 +149,16 @@ class ExerciseFrame(ctk.CTkFrame):
         if self.exercise_counter:
             if isinstance(self.exercise_counter, PlankCounter):
                 duration = self.exercise_counter.total_time
+                if self.exercise_counter.metrics:
+                    self.exercise_counter.metrics.flush()
                 if duration > 0:
-                    db_manager.save_exercise_record(
+                    record_writer.submit(
                         self.exercise_name, 
                         duration,
-                        duration  # 平板支撑的运动时长就是持续时间
+                        duration,  # 平板支撑的运动时长就是持续时间
+                        metric_events=self.exercise_counter.get_metric_events(),
+                        series=self.exercise_counter.get_series(),
+                        user_id=self.user_id
                     )
                 end_message = f"运动结束，本次{self.exercise_name}，" + (
                     f"您坚持了{duration}秒" if duration > 0 
@@ -155,10 +167,13 @@ class ExerciseFrame(ctk.CTkFrame):
             else:
                 count = self.exercise_counter.counter
                 if count > 0:  # 只有完成有效运动才记录时长
-                    db_manager.save_exercise_record(
+                    record_writer.submit(
                         self.exercise_name, 
                         count,
-                        exercise_time
+                        exercise_time,
+                        metric_events=self.exercise_counter.get_metric_events(),
+                        series=self.exercise_counter.get_series(),
+                        user_id=self.user_id
                     )
                 end_message = f"运动结束，本次{self.exercise_name}，" + (
                     f"您完成了{count}个" if count > 0 
@@ -264,17 +279,17 @@ class ExerciseFrame(ctk.CTkFrame):
     def start_exercise(self):
         """开始新的运动"""
         if self.exercise_name == "深蹲":
-            self.exercise_counter = SquatCounter()
+            self.exercise_counter = SquatCounter(**COUNTER_CONFIG["深蹲"])
             self.speak(f"开始{self.exercise_name}训练，请站在距离摄像头2米左右的位置，正面朝向摄像头，确保下半身在画面中")
         elif self.exercise_name == "俯卧撑":
-            self.exercise_counter = PushupCounter()
+            self.exercise_counter = PushupCounter(**COUNTER_CONFIG["俯卧撑"])
             self.speak("开始俯卧撑训练，请将摄像头放置在侧面位置，确保全身在画面中")
         elif self.exercise_name == "平板支撑":
-            self.exercise_counter = PlankCounter()
+            self.exercise_counter = PlankCounter(**COUNTER_CONFIG["平板支撑"])
             self.speak("开始平板支撑训练，请将摄像头放置在侧面位置，确保全身在画面中")
         elif self.exercise_name == "跳绳":
             from ..exercises.rope_counter import RopeCounter
-            self.exercise_counter = RopeCounter()
+            self.exercise_counter = RopeCounter(**COUNTER_CONFIG["跳绳"])
             self.speak(f"开始{self.exercise_name}训练，请站在距离摄像头3米左右的位置，正面朝向摄像头，确保全身在画面中")
             
     def toggle_exercise(self):
@@ -373,7 +388,7 @@ class ExerciseFrame(ctk.CTkFrame):
                 processed_frame = self.pose_detector.draw_landmarks(processed_frame, results)
                 
                 # 运动计数
-                if results.pose_landmarks:
+                if results and results.pose_landmarks:
                     if not self.person_detected:
                         self.person_detected = True
                         self.speak("已检测到人体，请开始运动")
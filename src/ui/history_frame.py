@@ -1,11 +1,25 @@
 import customtkinter as ctk
-from datetime import datetime
-import sqlite3
+from datetime import date, datetime
+from ..core.database import db_manager, day_to_date, local_day, time_range_start
+from ..core.exporter import ExportJob, detect_format
+from ..core.history import HistoryPager, SnapshotJob, SnapshotPager
+
+# 每行记录占的像素高度（含间距）
+ROW_HEIGHT = 44
+ROW_GAP = 6
+# 可见区域上下各多准备的行数
+OVERSCAN = 4
+# 鼠标滚轮每格滚动的行数
+WHEEL_ROWS = 3
+# 搜索输入停顿多久（毫秒）后筛选，以及等待后台快照的轮询间隔
+FILTER_DELAY = 250
+POLL_INTERVAL = 50
 
 class HistoryFrame(ctk.CTkFrame):
-    def __init__(self, parent, return_callback):
+    def __init__(self, parent, return_callback, user_id):
         super().__init__(parent)
         self.return_callback = return_callback
+        self.user_id = user_id
         self.setup_ui()
         self.load_history()
         
@@ -28,13 +42,18 @@ class HistoryFrame(ctk.CTkFrame):
         ).pack(side="left", padx=20)
         
         # 添加导出按钮
-        export_button = ctk.CTkButton(
+        self.export_button = ctk.CTkButton(
             nav_frame,
             text="导出数据",
             command=self.export_data,
             width=100
         )
-        export_button.pack(side="right", padx=10)
+        self.export_button.pack(side="right", padx=10)
+        
+        # 导出进度
+        self.export_label = ctk.CTkLabel(nav_frame, text="")
+        self.export_label.pack(side="right", padx=10)
+        self.export_job = None
         
         # 筛选区域
         filter_frame = ctk.CTkFrame(self)
@@ -74,93 +93,256 @@ class HistoryFrame(ctk.CTkFrame):
         )
         type_menu.pack(side="left", padx=5)
         
-        # 历史记录列表
-        self.history_frame = ctk.CTkScrollableFrame(self)
-        self.history_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        # 记录总数
+        self.count_label = ctk.CTkLabel(filter_frame, text="")
+        self.count_label.pack(side="right", padx=10)
+        
+        # 搜索区域：关键字和日期范围，输入停顿后才筛选
+        search_frame = ctk.CTkFrame(self)
+        search_frame.pack(fill="x", padx=20, pady=(0, 10))
+        
+        ctk.CTkLabel(search_frame, text="搜索:").pack(side="left", padx=5)
+        self.search_entry = ctk.CTkEntry(search_frame, placeholder_text="备注或运动类型", width=200)
+        self.search_entry.pack(side="left", padx=5)
+        
+        ctk.CTkLabel(search_frame, text="日期:").pack(side="left", padx=5)
+        self.from_entry = ctk.CTkEntry(search_frame, placeholder_text="YYYY-MM-DD", width=110)
+        self.from_entry.pack(side="left", padx=5)
+        ctk.CTkLabel(search_frame, text="至").pack(side="left")
+        self.to_entry = ctk.CTkEntry(search_frame, placeholder_text="YYYY-MM-DD", width=110)
+        self.to_entry.pack(side="left", padx=5)
+        self.date_text_color = self.from_entry.cget("text_color")
+        
+        for entry in (self.search_entry, self.from_entry, self.to_entry):
+            entry.bind("<KeyRelease>", self.search_changed)
+        self.filter_job = None
+        self.snapshot = None
+        self.snapshot_job = None
+        
+        # 历史记录列表：只为可见的行和少量缓冲行创建控件，滚动时复用
+        list_frame = ctk.CTkFrame(self)
+        list_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        
+        self.scrollbar = ctk.CTkScrollbar(list_frame, command=self.scroll_command)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.viewport = ctk.CTkFrame(list_frame, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.viewport.bind("<Configure>", self.viewport_resized)
+        self.bind_wheel(self.viewport)
+        
+        self.empty_label = ctk.CTkLabel(self.viewport, text="暂无记录", font=ctk.CTkFont(size=18))
+        
+        self.row_fonts = (ctk.CTkFont(size=14), ctk.CTkFont(size=14, weight="bold"))
+        self.rows = []
+        self.offset = 0
+        self.viewport_height = 0
+        self.pager = None
         
     def load_history(self):
-        # 清空现有内容
-        for widget in self.history_frame.winfo_children():
-            widget.destroy()
-            
-        # 从数据库加载数据
-        conn = sqlite3.connect('exercise_data.db')
-        cursor = conn.cursor()
-        
-        # 构建查询条件
-        where_clause = []
-        params = []
-        
-        if self.time_var.get() != "全部":
-            if self.time_var.get() == "今天":
-                where_clause.append("date(timestamp) = date('now')")
-            elif self.time_var.get() == "本周":
-                where_clause.append("date(timestamp) >= date('now', 'weekday 0', '-7 days')")
-            elif self.time_var.get() == "本月":
-                where_clause.append("date(timestamp) >= date('now', 'start of month')")
-                
-        if self.type_var.get() != "全部":
-            where_clause.append("exercise_type = ?")
-            params.append(self.type_var.get())
-            
-        query = "SELECT * FROM exercise_records"
-        if where_clause:
-            query += " WHERE " + " AND ".join(where_clause)
-        query += " ORDER BY timestamp DESC"
-        
-        cursor.execute(query, params)
-        records = cursor.fetchall()
-        
-        # 显示记录
-        for record in records:
-            self.create_history_item(record)
-            
-        conn.close()
-        
-    def create_history_item(self, record):
-        # 创建记录项容器
-        item = ctk.CTkFrame(self.history_frame)
-        item.pack(fill="x", pady=5)
+        """打开历史记录：丢弃旧的检索快照后按当前条件筛选"""
+        self.snapshot = None
+        self.apply_filter()
         
-        # 时间
-        time_str = datetime.fromisoformat(record[1]).strftime("%Y-%m-%d %H:%M")
-        ctk.CTkLabel(
-            item,
-            text=time_str,
-            font=ctk.CTkFont(size=14)
-        ).pack(side="left", padx=10)
+    def apply_filter(self):
+        """按筛选条件替换数据源并原地刷新可见行，不重建行控件
         
-        # 运动类型
-        ctk.CTkLabel(
-            item,
-            text=record[2],
-            font=ctk.CTkFont(size=14, weight="bold")
-        ).pack(side="left", padx=10)
+        只按时间和运动类型筛选时走索引查询；有关键字时在内存快照中筛选，
+        快照第一次用到时在后台建立。
+        """
+        self.filter_job = None
+        date_range = self.get_date_range()
+        if date_range is None:
+            return
+        start_day, end_day = date_range
+        exercise_type = self.type_var.get()
+        text = self.search_entry.get().strip()
+        
+        if not text:
+            self.show_pager(HistoryPager(db_manager, self.user_id, start_day, end_day, exercise_type))
+        elif self.snapshot is not None:
+            positions = self.snapshot.select(start_day, end_day, exercise_type, text)
+            self.show_pager(SnapshotPager(db_manager, self.snapshot, positions))
+        else:
+            self.count_label.configure(text="搜索中...")
+            if self.snapshot_job is None:
+                self.snapshot_job = SnapshotJob(db_manager, self.user_id).start()
+                self.poll_snapshot()
+        
+    def poll_snapshot(self):
+        """等待后台快照建立完成后重新筛选"""
+        job = self.snapshot_job
+        if not self.winfo_exists():
+            return
+        if not job.finished:
+            self.after(POLL_INTERVAL, self.poll_snapshot)
+            return
+        
+        self.snapshot_job = None
+        if job.error:
+            self.count_label.configure(text="")
+            self.show_message(f"搜索失败: {str(job.error)}", "error")
+            return
+        self.snapshot = job.result
+        self.apply_filter()
+        
+    def get_date_range(self):
+        """时间范围菜单与日期输入框的交集 (起始日序号, 结束日序号)，日期格式错误时返回None"""
+        from_valid, from_day = self.parse_date_entry(self.from_entry)
+        to_valid, to_day = self.parse_date_entry(self.to_entry)
+        if not (from_valid and to_valid):
+            return None
+        start_day = time_range_start(self.time_var.get())
+        if from_day is not None:
+            start_day = from_day if start_day is None else max(start_day, from_day)
+        return start_day, to_day
+        
+    def parse_date_entry(self, entry):
+        """日期输入框的 (格式是否正确, 日序号)，为空时日序号为None，格式错误时标红"""
+        value = entry.get().strip()
+        try:
+            day = local_day(date.fromisoformat(value)) if value else None
+        except ValueError:
+            entry.configure(text_color="#FF6B6B")
+            return False, None
+        entry.configure(text_color=self.date_text_color)
+        return True, day
+        
+    def show_pager(self, pager):
+        self.pager = pager
+        self.offset = 0
+        for row in self.rows:
+            row.index = None
+        self.count_label.configure(text=f"共 {len(self.pager)} 条")
+        if len(self.pager):
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.place(relx=0.5, rely=0.3, anchor="center")
+        self.render_rows()
         
+    def viewport_resized(self, event):
+        """窗口高度变化时补足行控件"""
+        if event.height == self.viewport_height:
+            return
+        self.viewport_height = event.height
+        needed = event.height // ROW_HEIGHT + 2 + 2 * OVERSCAN
+        while len(self.rows) < needed:
+            self.rows.append(self.create_history_item())
+        # 行数变化后行号与控件的对应关系改变，全部重新填充
+        for row in self.rows:
+            row.index = None
+        self.render_rows()
+        
+    def create_history_item(self):
+        # 创建可复用的记录项容器
+        item = ctk.CTkFrame(self.viewport)
+        item.time_label = ctk.CTkLabel(item, text="", font=self.row_fonts[0])
+        item.time_label.pack(side="left", padx=10)
+        item.type_label = ctk.CTkLabel(item, text="", font=self.row_fonts[1])
+        item.type_label.pack(side="left", padx=10)
+        item.data_label = ctk.CTkLabel(item, text="")
+        item.data_label.pack(side="left", padx=10)
+        item.index = None
+        for widget in (item, item.time_label, item.type_label, item.data_label):
+            self.bind_wheel(widget)
+        return item
+        
+    def fill_history_item(self, item, record):
+        # 时间
+        item.time_label.configure(text=datetime.fromisoformat(record[1]).strftime("%Y-%m-%d %H:%M"))
+        # 运动类型
+        item.type_label.configure(text=record[2])
         # 运动数据
         if record[2] == "平板支撑":
             data_text = f"坚持时间: {record[3]}秒"
         else:
             data_text = f"完成次数: {record[3]}次"
-            
-        ctk.CTkLabel(
-            item,
-            text=data_text
-        ).pack(side="left", padx=10)
+        item.data_label.configure(text=data_text)
+        
+    def render_rows(self):
+        """把行控件摆放到当前滚动位置，只有行号变化的控件才更新文字"""
+        if self.pager is None or not self.rows:
+            return
+        total = len(self.pager)
+        self.offset = max(0, min(self.offset, total * ROW_HEIGHT - self.viewport_height))
+        first = max(0, self.offset // ROW_HEIGHT - OVERSCAN)
+        # 第 index 行固定使用第 index % 控件数 个控件，滚动一行只需更新一个控件
+        for index in range(first, first + len(self.rows)):
+            item = self.rows[index % len(self.rows)]
+            record = self.pager.get(index) if index < total else None
+            if record is None:
+                item.place_forget()
+                item.index = None
+                continue
+            if item.index != index:
+                self.fill_history_item(item, record)
+                item.index = index
+            item.place(x=0, y=index * ROW_HEIGHT - self.offset, relwidth=1.0, height=ROW_HEIGHT - ROW_GAP)
+        
+        content_height = max(total * ROW_HEIGHT, 1)
+        self.scrollbar.set(self.offset / content_height,
+                           min((self.offset + self.viewport_height) / content_height, 1.0))
+        
+    def scroll_to(self, offset):
+        self.offset = int(offset)
+        self.render_rows()
+        
+    def scroll_command(self, action, amount, unit=None):
+        """滚动条回调，参数与 Tk 的 yview 相同"""
+        if self.pager is None:
+            return
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.pager) * ROW_HEIGHT)
+        elif unit == "pages":
+            self.scroll_to(self.offset + float(amount) * self.viewport_height)
+        else:
+            self.scroll_to(self.offset + float(amount) * ROW_HEIGHT)
+        
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self.wheel_scrolled)
+        widget.bind("<Button-4>", self.wheel_scrolled)
+        widget.bind("<Button-5>", self.wheel_scrolled)
+        
+    def wheel_scrolled(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            step = -WHEEL_ROWS
+        else:
+            step = WHEEL_ROWS
+        self.scroll_to(self.offset + step * ROW_HEIGHT)
         
     def filter_changed(self, _):
-        self.load_history() 
+        # 菜单选择立即生效
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+        self.apply_filter()
+        
+    def search_changed(self, *_):
+        # 输入停顿后只筛选一次
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+        self.filter_job = self.after(FILTER_DELAY, self.apply_filter)
+        
+    def destroy(self):
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+        super().destroy()
         
     def export_data(self):
-        """导出运动数据为CSV文件"""
+        """按当前筛选条件在后台导出运动数据"""
         from tkinter import filedialog
-        import csv
         from datetime import datetime
         
+        if self.export_job and not self.export_job.finished:
+            return
+        
         # 选择保存位置
         filename = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV 文件", "*.csv")],
+            filetypes=[
+                ("CSV 文件", "*.csv"),
+                ("JSON Lines 文件", "*.jsonl"),
+                ("列式数据文件", "*.sxcol")
+            ],
             initialfile=f"运动记录_{datetime.now().strftime('%Y%m%d')}.csv"
         )
         
@@ -168,30 +350,48 @@ class HistoryFrame(ctk.CTkFrame):
             return
         
         try:
-            # 获取数据
-            conn = sqlite3.connect('exercise_data.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT timestamp, exercise_type, count_or_duration 
-                FROM exercise_records 
-                ORDER BY timestamp DESC
-            """)
-            records = cursor.fetchall()
-            conn.close()
-            
-            # 写入CSV文件
-            with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f)
-                writer.writerow(["时间", "运动类型", "次数/时长(秒)"])
-                for record in records:
-                    timestamp = datetime.fromisoformat(record[0]).strftime("%Y-%m-%d %H:%M:%S")
-                    writer.writerow([timestamp, record[1], record[2]])
-                
+            fmt = detect_format(filename)
+        except ValueError as e:
+            self.show_message(str(e), "error")
+            return
+        
+        date_range = self.get_date_range()
+        if date_range is None:
+            self.show_message("日期格式应为 YYYY-MM-DD", "error")
+            return
+        start_day, end_day = date_range
+        self.export_job = ExportJob(
+            db_manager,
+            filename,
+            fmt,
+            start_date=day_to_date(start_day) if start_day is not None else None,
+            end_date=day_to_date(end_day) if end_day is not None else None,
+            exercise_type=self.type_var.get(),
+            user_id=self.user_id
+        ).start()
+        self.export_button.configure(state="disabled")
+        self.poll_export()
+        
+    def poll_export(self):
+        """轮询后台导出进度"""
+        job = self.export_job
+        if not self.winfo_exists():
+            job.cancel()
+            return
+        
+        if not job.finished:
+            if job.total_rows:
+                self.export_label.configure(text=f"导出中 {job.done_rows / job.total_rows:.0%}")
+            self.after(200, self.poll_export)
+            return
+        
+        self.export_label.configure(text="")
+        self.export_button.configure(state="normal")
+        if job.error:
+            self.show_message(f"导出失败: {str(job.error)}", "error")
+        else:
             # 显示成功消息
-            self.show_message("数据导出成功！")
-            
-        except Exception as e:
-            self.show_message(f"导出失败: {str(e)}", "error")
+            self.show_message(f"数据导出成功！共 {job.result} 条")
         
     def show_message(self, message, level="info"):
         """显示提示消息"""
@@ -1,10 +1,17 @@
 import customtkinter as ctk
 from PIL import Image, ImageTk
 import os
+import threading
 from .exercise_frame import ExerciseFrame
 from .history_frame import HistoryFrame
 from .analysis_frame import AnalysisFrame
-import sqlite3
+from ..core.database import db_manager, DEFAULT_USER_ID
+from ..core.achievements import DURATION_EXERCISES, milestone_label
+from ..core.record_writer import record_writer
+
+# 会员下拉列表中保留的最近使用会员数和搜索结果数
+RECENT_MEMBERS = 8
+MEMBER_SEARCH_LIMIT = 20
 
 class MainWindow:
     def __init__(self):
@@ -17,10 +24,19 @@ class MainWindow:
         self.window.title("智能运动")
         self.window.geometry("1024x768")
         
+        # 当前会员，所有统计和记录都限定在该会员内
+        self.user_id = DEFAULT_USER_ID
+        self.recent_members = [(DEFAULT_USER_ID, db_manager.get_user_name(DEFAULT_USER_ID))]
+        
         # 初始化UI
         self.setup_ui()
         self.current_frame = None
         
+        # 后台写入完成后刷新统计信息
+        self.records_changed = threading.Event()
+        record_writer.add_listener(lambda _: self.records_changed.set())
+        self.window.after(500, self.poll_record_writer)
+        
     def setup_ui(self):
         # 创建主容器
         self.main_container = ctk.CTkFrame(self.window)
@@ -46,6 +62,35 @@ class MainWindow:
             font=ctk.CTkFont(size=32, weight="bold")
         ).pack(side="left", padx=20)
         
+        # 会员切换
+        member_frame = ctk.CTkFrame(title_frame, fg_color="transparent")
+        member_frame.pack(side="left", padx=10)
+        
+        ctk.CTkLabel(
+            member_frame,
+            text="会员:"
+        ).pack(side="left", padx=5)
+        
+        self.member_ids = dict((name, user_id) for user_id, name in self.recent_members)
+        self.member_box = ctk.CTkComboBox(
+            member_frame,
+            values=list(self.member_ids),
+            command=self.member_selected,
+            width=180
+        )
+        self.member_box.set(self.recent_members[0][1])
+        self.member_box.pack(side="left", padx=5)
+        # 输入时按名称前缀搜索，会员很多时下拉列表也只显示少量匹配项
+        self.member_box.bind("<KeyRelease>", self.search_members)
+        self.member_box.bind("<Return>", lambda _: self.member_selected(self.member_box.get()))
+        
+        ctk.CTkButton(
+            member_frame,
+            text="添加会员",
+            command=self.add_member,
+            width=80
+        ).pack(side="left", padx=5)
+        
         # 右侧按钮组
         buttons_frame = ctk.CTkFrame(title_frame)
         buttons_frame.pack(side="right", padx=20)
@@ -95,14 +140,19 @@ class MainWindow:
         grid_frame = ctk.CTkFrame(self.main_container)
         grid_frame.pack(fill="both", expand=True)
         
+        # 一次查询获取所有运动的统计信息
+        self.card_labels = {}
+        summaries = db_manager.get_exercise_summaries(self.user_id)
+        
         # 配置网格列
         grid_frame.grid_columnconfigure((0, 1), weight=1)
         
         for i, exercise in enumerate(exercises):
             row, col = divmod(i, 2)
-            self.create_exercise_card(grid_frame, exercise, row, col)
+            self.create_exercise_card(grid_frame, exercise, row, col,
+                                      summaries.get(exercise["name"], (0, 0)))
             
-    def create_exercise_card(self, parent, exercise, row, col):
+    def create_exercise_card(self, parent, exercise, row, col, summary):
         # 创建卡片容器
         card = ctk.CTkFrame(
             parent,
@@ -148,41 +198,34 @@ class MainWindow:
         )
         stats_frame.pack(fill="x", padx=20, pady=10)
         
-        # 从数据库获取统计信息
-        try:
-            conn = sqlite3.connect('exercise_data.db')
-            cursor = conn.cursor()
-            
-            # 今日次数（使用 count_or_duration 的总和）
-            cursor.execute("""
-                SELECT SUM(count_or_duration) FROM exercise_records 
-                WHERE exercise_type = ? AND date(timestamp) = date('now')
-            """, (exercise["name"],))
-            today_count = cursor.fetchone()[0] or 0
-            
-            # 累计次数（使用 count_or_duration 的总和）
-            cursor.execute("""
-                SELECT SUM(count_or_duration) FROM exercise_records 
-                WHERE exercise_type = ?
-            """, (exercise["name"],))
-            total_count = cursor.fetchone()[0] or 0
-            
-        finally:
-            if 'conn' in locals():
-                conn.close()
+        today_count, total_count = summary
         
         # 显示统计信息
-        ctk.CTkLabel(
+        today_label = ctk.CTkLabel(
             stats_frame,
             text=f"今日: {today_count}次",
             text_color="#ffffff"
-        ).pack(side="left", padx=10)
+        )
+        today_label.pack(side="left", padx=10)
         
-        ctk.CTkLabel(
+        total_label = ctk.CTkLabel(
             stats_frame,
             text=f"累计: {total_count}次",
             text_color="#ffffff"
-        ).pack(side="right", padx=10)
+        )
+        total_label.pack(side="right", padx=10)
+        
+        # 个人最佳
+        best_label = ctk.CTkLabel(
+            card,
+            text=self.format_best(exercise["name"]),
+            text_color="#ffffff",
+            font=ctk.CTkFont(size=14, weight="bold")
+        )
+        best_label.pack(padx=20)
+        
+        # 记录统计标签，便于返回主界面时更新
+        self.card_labels[exercise["name"]] = (today_label, total_label, best_label)
         
         # 开始按钮
         ctk.CTkButton(
@@ -200,7 +243,7 @@ class MainWindow:
         stats_frame.pack(fill="x", pady=(20, 0))
         
         # 修改统计信息标签
-        stats = ["今日次数", "今日时长", "累计时长"]
+        stats = ["今日次数", "今日时长", "累计时长", "连续天数"]
         self.stats_labels = {}
         
         for i, label in enumerate(stats):
@@ -220,6 +263,14 @@ class MainWindow:
             )
             self.stats_labels[label].pack()
         
+        # 最长连续天数和最近达成的里程碑
+        self.achievement_label = ctk.CTkLabel(
+            self.main_container,
+            text="",
+            font=ctk.CTkFont(size=14)
+        )
+        self.achievement_label.pack(fill="x", pady=(10, 0))
+        
         # 初始更新统计信息
         self.update_stats()
         
@@ -228,7 +279,7 @@ class MainWindow:
         self.main_container.pack_forget()
         
         # 创建并显示运动界面
-        self.current_frame = ExerciseFrame(self.window, exercise_name, self.show_main_frame)
+        self.current_frame = ExerciseFrame(self.window, exercise_name, self.show_main_frame, self.user_id)
         self.current_frame.pack(fill="both", expand=True)
         
     def show_main_frame(self):
@@ -255,7 +306,8 @@ class MainWindow:
         # 创建并显示历史记录界面
         self.current_frame = HistoryFrame(
             self.window, 
-            self.show_main_frame
+            self.show_main_frame,
+            self.user_id
         )
         self.current_frame.pack(fill="both", expand=True)
         
@@ -267,94 +319,99 @@ class MainWindow:
         # 创建并显示数据分析界面
         self.current_frame = AnalysisFrame(
             self.window, 
-            self.show_main_frame
+            self.show_main_frame,
+            self.user_id
         )
         self.current_frame.pack(fill="both", expand=True)
         
     def update_stats(self):
         """更新统计信息"""
-        conn = sqlite3.connect('exercise_data.db')
-        cursor = conn.cursor()
-        
-        # 获取今日运动次数
-        cursor.execute("""
-            SELECT COUNT(*) FROM exercise_records 
-            WHERE date(timestamp) = date('now')
-        """)
-        today_count = cursor.fetchone()[0]
-        
-        # 获取今日运动总时长（秒）
-        cursor.execute("""
-            SELECT SUM(exercise_time) FROM exercise_records 
-            WHERE date(timestamp) = date('now')
-        """)
-        today_seconds = cursor.fetchone()[0] or 0
-        
-        # 获取累计运动总时长（秒）
-        cursor.execute("""
-            SELECT SUM(exercise_time) FROM exercise_records
-        """)
-        total_seconds = cursor.fetchone()[0] or 0
+        # 今日运动次数和总时长（秒）
+        today_count, today_seconds = db_manager.get_today_summary(self.user_id)
+        
+        # 累计运动总时长（秒）
+        total_seconds = db_manager.get_total_exercise_time(self.user_id)
         
         # 转换为分钟（向上取整）
         today_minutes = (today_seconds + 59) // 60  # 向上取整
         total_minutes = (total_seconds + 59) // 60  # 向上取整
         
+        # 连续天数和里程碑由成就表预先维护，按会员直接读取
+        achievements = db_manager.get_achievements(self.user_id)
+        
         # 更新显示
         self.stats_labels["今日次数"].configure(text=f"{today_count}次")
         self.stats_labels["今日时长"].configure(text=f"{today_minutes}分钟")
         self.stats_labels["累计时长"].configure(text=f"{total_minutes}分钟")
+        self.stats_labels["连续天数"].configure(text=f"{achievements.current_streak}天")
         
-        conn.close() 
+        text = f"最长连续 {achievements.longest_streak} 天"
+        if achievements.milestones:
+            text += f" · 最新成就: {milestone_label(achievements.milestones[0][0])}"
+        self.achievement_label.configure(text=text)
+        
+    def poll_record_writer(self):
+        """在UI线程中检查是否有新写入的记录"""
+        if self.records_changed.is_set():
+            self.records_changed.clear()
+            self.update_stats()
+            self.update_exercise_cards()
+        self.window.after(500, self.poll_record_writer)
         
     def update_exercise_cards(self):
         """更新所有运动卡片的统计信息"""
-        # 获取所有运动卡片的统计标签
-        for widget in self.main_container.winfo_children():
-            if isinstance(widget, ctk.CTkFrame):  # 找到包含运动卡片的frame
-                for card in widget.winfo_children():
-                    if isinstance(card, ctk.CTkFrame):  # 找到运动卡片
-                        # 查找运动名称标签
-                        exercise_name = None
-                        for child in card.winfo_children():
-                            if isinstance(child, ctk.CTkFrame) and not child.winfo_children()[0].cget("text").startswith(("今日", "累计")):
-                                for label in child.winfo_children():
-                                    if isinstance(label, ctk.CTkLabel) and not label.cget("text") in ["🏃", "💪", "🔥", "⭕"]:
-                                        exercise_name = label.cget("text")
-                                        break
-                                if exercise_name:
-                                    break
-                        
-                        if exercise_name:
-                            # 更新该运动的统计信息
-                            try:
-                                conn = sqlite3.connect('exercise_data.db')
-                                cursor = conn.cursor()
-                                
-                                # 今日次数
-                                cursor.execute("""
-                                    SELECT SUM(count_or_duration) FROM exercise_records 
-                                    WHERE exercise_type = ? AND date(timestamp) = date('now')
-                                """, (exercise_name,))
-                                today_count = cursor.fetchone()[0] or 0
-                                
-                                # 累计次数
-                                cursor.execute("""
-                                    SELECT SUM(count_or_duration) FROM exercise_records 
-                                    WHERE exercise_type = ?
-                                """, (exercise_name,))
-                                total_count = cursor.fetchone()[0] or 0
-                                
-                                # 更新显示
-                                for child in card.winfo_children():
-                                    if isinstance(child, ctk.CTkFrame) and child.winfo_children()[0].cget("text").startswith(("今日:", "累计:")):
-                                        labels = child.winfo_children()
-                                        for label in labels:
-                                            if label.cget("text").startswith("今日:"):
-                                                label.configure(text=f"今日: {today_count}次")
-                                            elif label.cget("text").startswith("累计:"):
-                                                label.configure(text=f"累计: {total_count}次")
-                                
-                            finally:
-                                if 'conn' in locals():
-                                    conn.close() 
\ No newline at end of file
+        summaries = db_manager.get_exercise_summaries(self.user_id)
+        for exercise_name, (today_label, total_label, best_label) in self.card_labels.items():
+            today_count, total_count = summaries.get(exercise_name, (0, 0))
+            today_label.configure(text=f"今日: {today_count}次")
+            total_label.configure(text=f"累计: {total_count}次")
+            best_label.configure(text=self.format_best(exercise_name))
+            
+    def format_best(self, exercise_name):
+        """运动卡片上的个人最佳"""
+        best = db_manager.get_achievements(self.user_id).bests.get(exercise_name)
+        if best is None:
+            return "最佳: -"
+        unit = "秒" if exercise_name in DURATION_EXERCISES else "次"
+        return f"最佳: {best[0]}{unit}"
+            
+    def search_members(self, event):
+        """按输入的名称前缀刷新下拉列表"""
+        if event.keysym in ("Return", "Up", "Down"):
+            return
+        prefix = self.member_box.get().strip()
+        if prefix:
+            members = db_manager.search_users(prefix, MEMBER_SEARCH_LIMIT)
+        else:
+            members = self.recent_members
+        self.member_ids = dict((name, user_id) for user_id, name in members)
+        self.member_box.configure(values=list(self.member_ids))
+        
+    def member_selected(self, name):
+        """切换到下拉列表中选择或输入的会员"""
+        name = name.strip()
+        user_id = self.member_ids.get(name) or db_manager.find_user(name)
+        if user_id is None:
+            # 未找到时恢复显示当前会员
+            self.member_box.set(db_manager.get_user_name(self.user_id))
+            return
+        self.switch_member(user_id, name)
+        
+    def add_member(self):
+        """添加新会员并切换过去"""
+        dialog = ctk.CTkInputDialog(text="请输入会员名称:", title="添加会员")
+        name = (dialog.get_input() or "").strip()
+        if name:
+            self.switch_member(db_manager.add_user(name), name)
+        
+    def switch_member(self, user_id, name):
+        """切换当前会员，主界面只需查询该会员的每日汇总"""
+        self.user_id = user_id
+        self.recent_members = [(user_id, name)] + [
+            member for member in self.recent_members if member[0] != user_id
+        ][:RECENT_MEMBERS - 1]
+        self.member_ids = dict((member_name, member_id) for member_id, member_name in self.recent_members)
+        self.member_box.configure(values=list(self.member_ids))
+        self.member_box.set(name)
+        self.update_stats()
+        self.update_exercise_cards()
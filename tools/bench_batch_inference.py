@@ -0,0 +1,35 @@
+"""批量推理吞吐量基准测试
+
+用不同的批大小处理同一段视频，输出帧/秒随批大小的变化。
+
+用法:
+    python -m tools.bench_batch_inference --video sample.mp4 --batch-sizes 1,2,4,8,16,32
+"""
+import argparse
+import time
+
+from src.core.offline_pose import iter_video_poses
+from src.core.pose_backends import create_backend
+from tools.process_archive import backend_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量推理吞吐量基准测试")
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--backend", default="onnx_batch")
+    parser.add_argument("--batch-sizes", default="1,2,4,8,16,32")
+    args = parser.parse_args()
+
+    for batch_size in [int(n) for n in args.batch_sizes.split(",")]:
+        backend = create_backend(backend_config(args.backend, batch_size))
+        frames = 0
+        start = time.perf_counter()
+        for _ in iter_video_poses(args.video, backend, batch_size):
+            frames += 1
+        elapsed = time.perf_counter() - start
+        backend.close()
+        print(f"批大小 {batch_size:3d}: {frames / elapsed:8.1f} 帧/秒 ({frames} 帧, {elapsed:.2f} 秒)")
+
+
+if __name__ == "__main__":
+    main()
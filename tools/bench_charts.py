@@ -0,0 +1,163 @@
+"""图表数据汇总基准测试
+
+比较数据分析界面原来的逐行字典分组与 src.core.chart_data 的向量化汇总，
+输入为模拟的每日汇总行 (运动类型, 日序号, 记录数, 总量, 最大值)。
+另测量先在SQL中按(日期, 运动类型)合并（DatabaseManager.get_daily_rollups 不限会员时的做法）
+再向量化汇总的耗时，此时进入Python的行数只与天数有关。
+
+用法:
+    python -m tools.bench_charts
+    python -m tools.bench_charts --rows 10000 100000 1000000 --days 90
+"""
+import argparse
+import os
+import random
+import tempfile
+import statistics
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from src.core import chart_data
+from src.core.database import DatabaseManager, day_to_date, local_day
+
+EXERCISES = ["深蹲", "俯卧撑", "平板支撑", "跳绳"]
+
+
+def make_rows(count, days, seed=0):
+    """生成 count 行每日汇总，日期分布在最近 days 天内（同一天同一运动可有多行，如多位会员）"""
+    rng = random.Random(seed)
+    today = local_day()
+    rows = []
+    for _ in range(count):
+        records = rng.randint(1, 4)
+        value = rng.randint(5, 60)
+        rows.append((rng.choice(EXERCISES), today - rng.randrange(days), records,
+                     value * records, value + rng.randint(0, 10)))
+    rows.sort(key=lambda row: row[1])
+    return rows
+
+
+def legacy_trend(data):
+    """原趋势图的分组方式：逐行转换日期，按运动和日期建立嵌套字典"""
+    exercise_data = {}
+    for exercise, day, _, total, maximum in data:
+        exercise_data.setdefault(exercise, {})[day_to_date(day)] = (total, maximum)
+    lines = []
+    for exercise, dates_data in exercise_data.items():
+        sorted_dates = sorted(dates_data.keys())
+        index = 1 if exercise == "平板支撑" else 0
+        values = [dates_data[date][index] for date in sorted_dates]
+        if len(values) > 3:
+            values = np.convolve(values, np.ones(3) / 3, mode='valid')
+            sorted_dates = sorted_dates[1:-1]
+        lines.append((exercise, sorted_dates, values))
+    return lines
+
+
+def legacy_stats(data):
+    stats = {}
+    for exercise, _, count, total, _ in data:
+        if exercise not in stats:
+            stats[exercise] = {"total": 0, "count": 0}
+        stats[exercise]["total"] += total
+        stats[exercise]["count"] += count
+    exercises = list(stats.keys())
+    return (exercises, [stats[ex]["total"] for ex in exercises],
+            [stats[ex]["total"] / stats[ex]["count"] for ex in exercises])
+
+
+def legacy_weekly(data):
+    weekly_stats = {}
+    for exercise, day, _, value, _ in data:
+        date = day_to_date(day)
+        week_start = date - timedelta(days=date.weekday())
+        weekly = weekly_stats.setdefault(week_start, {})
+        weekly[exercise] = weekly.get(exercise, 0) + value
+    weeks = sorted(weekly_stats.keys())
+    exercises = sorted(set(ex for w in weekly_stats.values() for ex in w.keys()))
+    return weeks, exercises, [[weekly_stats[w].get(ex, 0) for w in weeks] for ex in exercises]
+
+
+def legacy_all(rows):
+    return legacy_trend(rows), legacy_stats(rows), legacy_weekly(rows)
+
+
+def vectorised_all(rows):
+    columns = chart_data.to_columns(rows)
+    return (chart_data.trend_lines(columns), chart_data.exercise_stats(columns),
+            chart_data.weekly_totals(columns))
+
+
+def check_same(rows):
+    """每天每种运动只有一行时，两种实现的结果应一致"""
+    legacy_lines, (legacy_ex, legacy_totals, _), (legacy_weeks, legacy_wex, legacy_values) = legacy_all(rows)
+    lines, (exercises, totals, _), weekly = vectorised_all(rows)
+    by_name = {line.exercise: line for line in lines}
+    for exercise, dates, values in legacy_lines:
+        line = by_name[exercise]
+        assert [np.datetime64(d) for d in dates] == list(line.dates), exercise
+        assert np.allclose(values, line.values), exercise
+    assert dict(zip(legacy_ex, legacy_totals)) == dict(zip(exercises, totals.tolist()))
+    assert [np.datetime64(w) for w in legacy_weeks] == list(weekly.starts)
+    for exercise, values in zip(legacy_wex, legacy_values):
+        assert np.allclose(values, weekly.values[weekly.exercises.index(exercise)])
+
+
+def load_rollups(db, rows):
+    """把模拟行按会员编号写入每日汇总表"""
+    with db.transaction():
+        db.execute("DELETE FROM daily_rollups")
+        db.executemany("""
+            INSERT INTO daily_rollups (user_id, day, exercise_type, record_count, value_sum, value_max, time_sum)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+        """, ((i, day, exercise, count, total, maximum)
+              for i, (exercise, day, count, total, maximum) in enumerate(rows)))
+
+
+def measure(func, rows, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图表数据汇总基准测试")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # 先用每天每种运动一行的数据校验结果一致
+    today = local_day()
+    unique_rows = [(exercise, day, 1, 10 + day % 7, 10 + day % 5)
+                   for day in range(today - args.days, today + 1) for exercise in EXERCISES]
+    check_same(unique_rows)
+    print("结果校验通过")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = DatabaseManager(os.path.join(temp_dir, "bench_charts.db"), cache_size=0)
+        db.init_database()
+        start_date = day_to_date(today - args.days)
+
+        def sql_grouped(_):
+            return vectorised_all(db.get_daily_rollups(None, start_date))
+
+        for count in args.rows:
+            rows = make_rows(count, args.days)
+            load_rollups(db, rows)
+            legacy = measure(legacy_all, rows, args.repeat)
+            vectorised = measure(vectorised_all, rows, args.repeat)
+            grouped = measure(sql_grouped, rows, args.repeat)
+            print(f"{count:>9} 行  原实现 {legacy * 1000:9.1f}ms  向量化 {vectorised * 1000:8.1f}ms "
+                  f"({legacy / vectorised:4.1f}x)  SQL分组+向量化 {grouped * 1000:8.1f}ms "
+                  f"({legacy / grouped:4.1f}x)")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
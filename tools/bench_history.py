@@ -0,0 +1,154 @@
+"""历史记录界面基准测试
+
+为不同历史长度的会员各生成一批记录，测量历史记录界面打开（总数和第一屏）、
+拖动滚动条跳到任意位置和连续滚动的耗时，以及 tracemalloc 统计的内存峰值；
+再测量切换运动类型、输入日期范围和关键字搜索后刷新第一屏的耗时。
+加 --legacy 时同时测量旧界面一次读出全部记录的方式。
+
+用法:
+    python -m tools.bench_history
+    python -m tools.bench_history --sizes 1000 100000 1000000 --legacy
+    python -m tools.bench_history --db history_bench.db --reuse
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from src.core.database import DatabaseManager, local_day
+from src.core.history import HistoryPager, HistorySnapshot, SnapshotPager
+from tools.generate_test_data import reset_database, write_records
+
+EXERCISES = ("深蹲", "俯卧撑", "平板支撑", "跳绳")
+# 约5%的记录带备注
+NOTES = ("状态很好", "膝盖有点不适", "和朋友一起练", "晨练", "赶时间，少做了几组", "PB!")
+# 一屏的行数（含上下缓冲），与历史记录界面在常见窗口高度下相当
+SCREEN_ROWS = 24
+
+
+def member_rows(user_id, count, seed):
+    """从现在起向前逐条生成 count 条记录，平均间隔10分钟"""
+    rng = random.Random(seed)
+    timestamp = datetime.now()
+    for _ in range(count):
+        timestamp -= timedelta(seconds=rng.randint(60, 1140))
+        exercise = rng.choice(EXERCISES)
+        value = rng.randint(10, 60)
+        notes = rng.choice(NOTES) if rng.random() < 0.05 else ""
+        yield (timestamp.isoformat(), exercise, value, value, notes,
+               int(timestamp.timestamp()), local_day(timestamp), user_id)
+
+
+def create_member(db, count):
+    name = f"历史基准{count}"
+    db.execute("INSERT OR IGNORE INTO users (name, created_at) VALUES (?, ?)", (name, datetime.now().isoformat()))
+    user_id = db.fetch_value("SELECT id FROM users WHERE name = ?", (name,))
+    if not db.fetch_value("SELECT 1 FROM exercise_records WHERE user_id = ? LIMIT 1", (user_id,)):
+        write_records(db, member_rows(user_id, count, seed=count))
+    return user_id
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def measure_pager(db, user_id, rng, repeat):
+    def open_screen():
+        pager = HistoryPager(db, user_id)
+        for index in range(min(SCREEN_ROWS, len(pager))):
+            pager.get(index)
+        return pager
+
+    db.cache.clear()
+    tracemalloc.start()
+    pager, open_time = timed(open_screen)
+
+    # 拖动滚动条：跳到任意位置读取一屏
+    jumps = []
+    for _ in range(repeat):
+        first = rng.randrange(max(len(pager) - SCREEN_ROWS, 1))
+        jumps.append(timed(lambda: [pager.get(i) for i in range(first, first + SCREEN_ROWS)])[1])
+
+    # 从开头连续滚动 2000 行，每次一行
+    _, scroll_time = timed(lambda: [pager.get(i) for first in range(2000)
+                                    for i in range(first, first + SCREEN_ROWS)])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return open_time, statistics.median(jumps), max(jumps), scroll_time / 2000, peak
+
+
+def first_screen(pager):
+    return [pager.get(i) for i in range(min(SCREEN_ROWS, len(pager)))]
+
+
+def measure_filters(db, user_id):
+    """各种筛选条件下替换数据源并读出第一屏的耗时（毫秒）"""
+    db.cache.clear()
+    today = local_day()
+    timings = {
+        "类型": timed(lambda: first_screen(HistoryPager(db, user_id, exercise_type="平板支撑")))[1],
+        "日期范围": timed(lambda: first_screen(HistoryPager(db, user_id, today - 400, today - 300)))[1],
+    }
+    snapshot, timings["建立快照"] = timed(lambda: HistorySnapshot.load(db, user_id))
+    timings["关键字"] = timed(lambda: first_screen(
+        SnapshotPager(db, snapshot, snapshot.select(text="晨练"))))[1]
+    timings["关键字+类型+日期"] = timed(lambda: first_screen(
+        SnapshotPager(db, snapshot, snapshot.select(today - 400, today, "深蹲", "pb"))))[1]
+    return timings
+
+
+def measure_legacy(db, user_id):
+    db.cache.clear()
+    tracemalloc.start()
+    records, open_time = timed(lambda: db.get_history(user_id, "全部", "全部"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return open_time, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="历史记录界面基准测试")
+    parser.add_argument("--db", default="history_bench.db")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000],
+                        help="各会员的记录数")
+    parser.add_argument("--repeat", type=int, default=50, help="随机跳转的次数")
+    parser.add_argument("--legacy", action="store_true", help="同时测量一次读出全部记录")
+    parser.add_argument("--reuse", action="store_true", help="复用已有的基准数据库")
+    args = parser.parse_args()
+
+    if not args.reuse:
+        reset_database(args.db)
+    db = DatabaseManager(args.db)
+    db.init_database()
+    rng = random.Random(0)
+
+    for size in args.sizes:
+        start = time.perf_counter()
+        user_id = create_member(db, size)
+        if not args.reuse:
+            print(f"写入 {size} 条记录，耗时 {time.perf_counter() - start:.1f} 秒")
+
+    print(f"{'记录数':>10s} {'打开':>9s} {'跳转中位数':>10s} {'跳转最大':>9s} {'滚动一行':>9s} {'内存峰值':>9s}")
+    for size in args.sizes:
+        user_id = create_member(db, size)
+        open_time, jump_median, jump_max, scroll_time, peak = measure_pager(db, user_id, rng, args.repeat)
+        print(f"{size:>10d} {open_time:7.2f}ms {jump_median:8.2f}ms {jump_max:7.2f}ms "
+              f"{scroll_time:7.3f}ms {peak / 1024:7.0f}KB")
+        if args.legacy:
+            legacy_time, legacy_peak = measure_legacy(db, user_id)
+            print(f"{'旧方式':>10s} {legacy_time:7.2f}ms {'':>10s} {'':>9s} {'':>9s} {legacy_peak / 1024:7.0f}KB")
+
+    print("筛选后刷新第一屏（建立快照在后台线程中进行，每位会员只需一次）")
+    for size in args.sizes:
+        timings = measure_filters(db, create_member(db, size))
+        print(f"{size:>10d} " + "  ".join(f"{name} {value:.2f}ms" for name, value in timings.items()))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""统计查询基准测试
+
+在独立的基准数据库中生成指定规模的记录（见 tools.generate_test_data），
+测量主界面、历史记录和数据分析界面所用查询的耗时。
+
+用法:
+    python -m tools.bench_queries --rows 1000000
+    python -m tools.bench_queries --db benchmark_data.db --reuse
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from src.core.database import DatabaseManager
+from tools.generate_test_data import (create_members, generate_records, members_for_rows, reset_database,
+                                      write_records)
+
+
+def measure(label, func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    print(f"{label:24s} 中位数 {statistics.median(timings) * 1000:8.2f}ms  "
+          f"最大 {max(timings) * 1000:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统计查询基准测试")
+    parser.add_argument("--db", default="benchmark_data.db")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--reuse", action="store_true", help="复用已有的基准数据库")
+    args = parser.parse_args()
+
+    if not args.reuse:
+        reset_database(args.db)
+
+    db = DatabaseManager(args.db)
+    db.init_database()
+    if not args.reuse:
+        start = time.perf_counter()
+        user_ids = create_members(db, members_for_rows(args.rows, args.years))
+        rows = generate_records(user_ids, args.years, max_rows=args.rows)
+        inserted = write_records(db, rows)
+        db.execute("ANALYZE")
+        print(f"写入 {inserted} 条记录，耗时 {time.perf_counter() - start:.1f} 秒")
+
+    total = db.fetch_value("SELECT COUNT(*) FROM exercise_records", default=0)
+    members = db.fetch_value("SELECT COUNT(*) FROM users", default=0)
+    print(f"记录总数: {total}，会员数: {members}")
+
+    # 以记录最多的会员为准，代表最慢的情况
+    user_id = db.fetch_value("""
+        SELECT user_id FROM daily_rollups GROUP BY user_id ORDER BY SUM(record_count) DESC LIMIT 1
+    """)
+    user_ids = [row[0] for row in db.fetchall("SELECT id FROM users")]
+    rng = random.Random(0)
+
+    def switch_member():
+        # 切换会员时主界面刷新的全部查询
+        member = rng.choice(user_ids)
+        db.get_today_summary(member)
+        db.get_total_exercise_time(member)
+        db.get_exercise_summaries(member)
+
+    start_date = datetime.now() - timedelta(days=30)
+    measure("今日统计", lambda: db.get_today_summary(user_id), args.repeat)
+    measure("累计时长", lambda: db.get_total_exercise_time(user_id), args.repeat)
+    measure("运动卡片统计", lambda: db.get_exercise_summaries(user_id), args.repeat)
+    measure("切换会员(随机)", switch_member, args.repeat)
+    measure("历史记录(全部)", lambda: db.get_history(user_id), args.repeat)
+    measure("历史记录(本周/深蹲)", lambda: db.get_history(user_id, "本周", "深蹲"), args.repeat)
+    measure("图表数据(30天)", lambda: db.get_daily_rollups(user_id, start_date), args.repeat)
+
+    # 以上查询在重复执行时命中缓存；以下清空缓存后测量首次查询
+    def uncached(func):
+        def run():
+            db.cache.clear()
+            func()
+        return run
+
+    measure("切换会员(无缓存)", uncached(switch_member), args.repeat)
+    measure("图表数据(30天/无缓存)", uncached(lambda: db.get_daily_rollups(user_id, start_date)), args.repeat)
+    cache_stats = db.cache.snapshot()
+    print(f"缓存命中率 {cache_stats['hit_rate']:.1%}（命中 {cache_stats['hits']}，未命中 {cache_stats['misses']}）")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""动作质量指标开销基准测试
+
+分别在开启和关闭质量指标跟踪的情况下回放同一段合成关键点，
+比较计数器的单帧处理时间，确认指标计算不会降低实时帧率。
+
+用法:
+    python -m tools.bench_rep_metrics --frames 30000
+"""
+import argparse
+import time
+
+from tools.landmark_generator import STREAMS, SimulatedClock, create_counter
+
+
+def replay(exercise_name, frames, fps, track_metrics):
+    """回放一遍关键点，返回处理一帧的平均耗时（秒）和这一遍生成的指标事件数"""
+    counter = create_counter(exercise_name, track_metrics=track_metrics)
+    clock = SimulatedClock()
+    counter.clock = clock
+    events = 0
+    start = time.perf_counter()
+    for index, landmarks in enumerate(frames):
+        clock.now = index / fps
+        counter.process_pose(landmarks)
+        if getattr(counter, "is_finished", False):
+            events += len(counter.get_metric_events())
+            counter.reset()
+    elapsed = (time.perf_counter() - start) / len(frames)
+    return elapsed, events + len(counter.get_metric_events())
+
+
+def time_counter(exercise_name, frames, fps, track_metrics, repeat):
+    """返回 repeat 遍中处理一帧的最短平均耗时（秒）和一遍生成的指标事件数"""
+    timings = []
+    for _ in range(repeat):
+        elapsed, events = replay(exercise_name, frames, fps, track_metrics)
+        timings.append(elapsed)
+    # 每遍回放相同的关键点，事件数相同，只取一遍
+    return min(timings), events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="动作质量指标开销基准测试")
+    parser.add_argument("--frames", type=int, default=30000)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    frame_budget = 1 / args.fps
+    for exercise_name in ("深蹲", "俯卧撑", "平板支撑"):
+        stream = STREAMS[exercise_name](fps=args.fps, seed=0)
+        frames = [landmarks for _, landmarks in stream.frames(args.frames)]
+
+        base, _ = time_counter(exercise_name, frames, args.fps, False, args.repeat)
+        tracked, events = time_counter(exercise_name, frames, args.fps, True, args.repeat)
+        overhead = tracked - base
+
+        print(f"{exercise_name}: 关闭 {base * 1e6:.1f}us/帧  开启 {tracked * 1e6:.1f}us/帧  "
+              f"额外开销 {overhead * 1e6:.1f}us ({overhead / frame_budget:.3%} 帧预算)  "
+              f"指标事件 {events} 个")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""数据库维护命令
+
+用法:
+    python -m tools.db_admin migrate
+    python -m tools.db_admin rebuild-rollups
+    python -m tools.db_admin rebuild-achievements
+    python -m tools.db_admin stats
+    python -m tools.db_admin backup [--force]
+    python -m tools.db_admin export records.csv [--format csv] [--start 2024-01-01] [--end 2024-12-31] [--type 深蹲]
+                                                [--user 会员名称]
+    python -m tools.db_admin import history.csv [more.jsonl ...] [--batch-size 50000] [--user 会员名称]
+    python -m tools.db_admin users [--search 前缀]
+    python -m tools.db_admin delete 123 [124 ...]
+    python -m tools.db_admin sync [--endpoint http://127.0.0.1:8765/api/records] [--batch-size 500]
+"""
+import argparse
+import resource
+import time
+from datetime import date
+
+from src.core.database import DatabaseManager, DEFAULT_USER_ID
+from src.core.backup import create_backup_service
+from src.core.exporter import EXPORTERS, export_records
+from src.core.importer import import_records
+from src.core.sync_agent import SyncAgent, SyncError
+from config.app_config import SYNC_CONFIG
+
+
+def cmd_migrate(db, args):
+    db.init_database()
+    print(f"数据库版本: {db.fetch_value('PRAGMA user_version', default=0)}")
+
+
+def cmd_rebuild_rollups(db, args):
+    start = time.perf_counter()
+    db.rebuild_rollups()
+    rows = db.fetch_value("SELECT COUNT(*) FROM daily_rollups", default=0)
+    achievement_rows = db.fetch_value("SELECT COUNT(*) FROM member_achievements", default=0)
+    print(f"每日汇总已重建: {rows} 行，会员成就 {achievement_rows} 行，耗时 {time.perf_counter() - start:.2f} 秒")
+
+
+def cmd_rebuild_achievements(db, args):
+    start = time.perf_counter()
+    db.rebuild_achievements()
+    rows = db.fetch_value("SELECT COUNT(*) FROM member_achievements", default=0)
+    print(f"会员成就已重建: {rows} 行，耗时 {time.perf_counter() - start:.2f} 秒")
+
+
+def _user_id(db, name):
+    """根据 --user 参数确定会员，未指定时返回None"""
+    if not name:
+        return None
+    user_id = db.find_user(name)
+    if user_id is None:
+        raise SystemExit(f"会员不存在: {name}")
+    return user_id
+
+
+def cmd_stats(db, args):
+    records = db.fetch_value("SELECT COUNT(*) FROM exercise_records", default=0)
+    print(f"数据库版本: {db.fetch_value('PRAGMA user_version', default=0)}")
+    print(f"会员: {db.fetch_value('SELECT COUNT(*) FROM users', default=0)} 位")
+    print(f"运动记录: {records} 条")
+    print(f"每日汇总: {db.fetch_value('SELECT COUNT(*) FROM daily_rollups', default=0)} 行")
+
+
+def cmd_backup(db, args):
+    service = create_backup_service(db.db_path)
+    success, result = service.run_backup(force=args.force)
+    print(f"备份{'完成' if success else '失败'}: {result}")
+    for created, path in service.list_backups():
+        print(f"  {created:%Y-%m-%d %H:%M:%S}  {path}")
+
+
+def cmd_export(db, args):
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r已导出 {done}/{total} 条", end="", flush=True)
+
+    rows = export_records(
+        db, args.output, args.format,
+        start_date=date.fromisoformat(args.start) if args.start else None,
+        end_date=date.fromisoformat(args.end) if args.end else None,
+        exercise_type=args.type,
+        chunk_size=args.chunk_size,
+        progress=progress,
+        user_id=_user_id(db, args.user)
+    )
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\n导出 {rows} 条记录，耗时 {elapsed:.2f} 秒（{rows / max(elapsed, 1e-9):.0f} 行/秒），"
+          f"峰值内存 {peak_mb:.1f}MB")
+
+
+def cmd_import(db, args):
+    # 导入时指定的会员不存在则创建
+    user_id = db.add_user(args.user) if args.user else DEFAULT_USER_ID
+    for path in args.inputs:
+        def progress(read, inserted):
+            print(f"\r{path}: 已读取 {read} 行，写入 {inserted} 行", end="", flush=True)
+
+        result = import_records(db, path, args.format, batch_size=args.batch_size, progress=progress,
+                                user_id=user_id)
+        print(f"\r{path}: 读取 {result.read} 行，写入 {result.inserted} 行，"
+              f"重复 {result.duplicates} 行，无效 {result.rejected} 行，"
+              f"耗时 {result.elapsed:.2f} 秒（{result.read / max(result.elapsed, 1e-9):.0f} 行/秒）")
+
+
+def cmd_users(db, args):
+    for user_id, name in db.search_users(args.search, args.limit):
+        records = db.count_records(user_id=user_id)
+        print(f"{user_id:8d}  {name}  {records} 条记录")
+
+
+def cmd_delete(db, args):
+    deleted = db.delete_records(args.ids)
+    print(f"已删除 {deleted} 条记录")
+
+
+def cmd_sync(db, args):
+    agent = SyncAgent(db, args.endpoint or SYNC_CONFIG["endpoint"],
+                      kiosk_id=args.kiosk_id or SYNC_CONFIG["kiosk_id"],
+                      batch_size=args.batch_size, timeout=SYNC_CONFIG["timeout"],
+                      initial_backoff=SYNC_CONFIG["initial_backoff"])
+    print(f"待同步 {agent.pending_count()} 条记录，高水位 {agent.get_high_water_mark()}")
+    start = time.perf_counter()
+
+    def progress(done, last_id):
+        print(f"\r已推送 {done} 条，高水位 {last_id}", end="", flush=True)
+
+    failures = 0
+    while True:
+        pushed_before = agent.pushed
+        try:
+            agent.sync(progress=progress)
+            break
+        except SyncError as e:
+            # 有进展时重新计算连续失败次数
+            failures = 1 if agent.pushed > pushed_before else failures + 1
+            if failures >= args.retries:
+                print(f"\n同步失败: {str(e)}，已达到最多尝试次数")
+                break
+            wait = agent.backoff_delay(failures)
+            print(f"\n同步失败: {str(e)}，{wait:.1f} 秒后重试")
+            time.sleep(wait)
+    agent.close()
+    metrics = agent.get_metrics()
+    elapsed = time.perf_counter() - start
+    print(f"\n推送 {metrics['pushed']} 条记录，{metrics['batches']} 批，压缩后 {metrics['bytes_sent'] / 1024:.0f}KB，"
+          f"失败 {metrics['failures']} 次，耗时 {elapsed:.2f} 秒，剩余 {agent.pending_count()} 条")
+
+
+COMMANDS = {
+    "migrate": (cmd_migrate, "执行数据库结构迁移"),
+    "rebuild-rollups": (cmd_rebuild_rollups, "根据运动记录重建每日汇总表和会员成就"),
+    "rebuild-achievements": (cmd_rebuild_achievements, "根据每日汇总重建会员成就（个人最佳、连续天数、里程碑）"),
+    "stats": (cmd_stats, "显示数据库概况"),
+    "backup": (cmd_backup, "立即执行在线备份并按保留策略轮转"),
+    "export": (cmd_export, "流式导出运动记录（CSV/JSON Lines/列式格式）"),
+    "import": (cmd_import, "批量导入CSV/JSON/JSON Lines格式的历史记录"),
+    "users": (cmd_users, "按名称前缀列出会员"),
+    "delete": (cmd_delete, "删除指定ID的运动记录并更新每日汇总"),
+    "sync": (cmd_sync, "将未同步的运动记录推送到总部服务器"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据库维护")
+    parser.add_argument("--db", default="exercise_data.db")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (func, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text).set_defaults(func=func)
+    subparsers.choices["backup"].add_argument("--force", action="store_true",
+                                              help="数据库未变化时也执行备份")
+    export_parser = subparsers.choices["export"]
+    export_parser.add_argument("output", help="输出文件，格式可由扩展名推断")
+    export_parser.add_argument("--format", choices=sorted(EXPORTERS), help="导出格式")
+    export_parser.add_argument("--start", help="起始日期 YYYY-MM-DD")
+    export_parser.add_argument("--end", help="结束日期 YYYY-MM-DD（含）")
+    export_parser.add_argument("--type", default="全部", help="运动类型")
+    export_parser.add_argument("--chunk-size", type=int, default=5000)
+    export_parser.add_argument("--user", help="只导出该会员的记录（会员名称）")
+    import_parser = subparsers.choices["import"]
+    import_parser.add_argument("inputs", nargs="+", help="导入文件")
+    import_parser.add_argument("--format", choices=["csv", "json", "jsonl"], help="导入格式")
+    import_parser.add_argument("--batch-size", type=int, default=50000, help="每个事务写入的行数")
+    import_parser.add_argument("--user", help="记录所属的会员名称，文件中的会员列优先")
+    users_parser = subparsers.choices["users"]
+    users_parser.add_argument("--search", default="", help="会员名称前缀")
+    users_parser.add_argument("--limit", type=int, default=50)
+    subparsers.choices["delete"].add_argument("ids", nargs="+", type=int, help="运动记录ID")
+    sync_parser = subparsers.choices["sync"]
+    sync_parser.add_argument("--endpoint", help="同步地址，默认使用配置")
+    sync_parser.add_argument("--kiosk-id", help="本机标识，默认使用配置或主机名")
+    sync_parser.add_argument("--batch-size", type=int, default=SYNC_CONFIG["batch_size"])
+    sync_parser.add_argument("--retries", type=int, default=5, help="失败后的最多尝试次数")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    db.init_database()
+    try:
+        args.func(db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,241 @@
-import sqlite3
-from datetime import datetime, timedelta
+"""测试数据生成
+
+按会员模拟运动习惯生成历史记录：每个会员有各自的开始日期、训练频率、
+偏好的运动和时间段，周末训练更多，成绩随时间缓慢提高，部分会员会中途流失。
+记录通过批量事务写入，默认写入独立的基准数据库，不影响应用数据。
+
+用法:
+    python -m tools.generate_test_data --members 2000 --years 3
+    python -m tools.generate_test_data --rows 1000000 --db benchmark_data.db
+"""
+import argparse
+import math
+import os
 import random
+import time
+from datetime import date, datetime, timedelta
 
-def generate_test_data():
-    """生成测试数据"""
-    conn = sqlite3.connect('exercise_data.db')
-    cursor = conn.cursor()
-    
-    # 清空现有数据
-    cursor.execute("DELETE FROM exercise_records")
-    
-    # 生成过去90天的数据
-    exercises = ["深蹲", "俯卧撑", "平板支撑", "跳绳"]
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=90)
-    
-    current_date = start_date
-    while current_date <= end_date:
-        # 每天随机1-3次运动
-        daily_exercises = random.randint(1, 3)
-        
-        for _ in range(daily_exercises):
-            # 随机选择运动类型
-            exercise = random.choice(exercises)
-            
-            # 随机生成运动时间（早上6点到晚上10点）
-            hour = random.randint(6, 22)
-            minute = random.randint(0, 59)
-            timestamp = current_date.replace(hour=hour, minute=minute)
-            
-            # 根据运动类型生成合理的运动数据
-            if exercise == "平板支撑":
-                # 平板支撑时间：30秒到180秒
-                duration = random.randint(30, 180)
-                count = duration
-            elif exercise == "跳绳":
-                # 跳绳次数：50到200次
-                count = random.randint(50, 200)
-            else:
-                # 其他运动次数：5到20次
-                count = random.randint(5, 20)
-            
-            # 插入数据
-            cursor.execute("""
-                INSERT INTO exercise_records 
-                (timestamp, exercise_type, count_or_duration)
-                VALUES (?, ?, ?)
-            """, (timestamp.isoformat(), exercise, count))
-        
-        current_date += timedelta(days=1)
-    
-    # 生成今天的数据（确保有当天数据）
-    for exercise in exercises:
-        if random.random() < 0.7:  # 70%概率今天有该运动记录
-            hour = random.randint(6, datetime.now().hour)
-            minute = random.randint(0, 59)
-            timestamp = datetime.now().replace(hour=hour, minute=minute)
-            
-            if exercise == "平板支撑":
-                count = random.randint(30, 180)
-            elif exercise == "跳绳":
-                count = random.randint(50, 200)
+from src.core.database import DatabaseManager, DEFAULT_USER_ID, local_day
+
+EXERCISES = ["深蹲", "俯卧撑", "平板支撑", "跳绳"]
+
+# 每种运动的初始水平（次数或秒）、水平的个体差异和每个动作的耗时（秒）
+EXERCISE_PROFILES = {
+    "深蹲": {"base": 15, "spread": 0.5, "seconds_per_unit": 2.5},
+    "俯卧撑": {"base": 12, "spread": 0.6, "seconds_per_unit": 2.0},
+    "平板支撑": {"base": 60, "spread": 0.5, "seconds_per_unit": 1.0},
+    "跳绳": {"base": 150, "spread": 0.5, "seconds_per_unit": 0.5},
+}
+
+# 每周各天的训练概率系数（周一为0）
+WEEKDAY_FACTORS = [0.9, 0.85, 0.9, 0.85, 0.8, 1.3, 1.4]
+
+
+class Member:
+    """一个会员的训练习惯"""
+
+    def __init__(self, rng, first_day, last_day, regular=False):
+        span = (last_day - first_day).days
+        if regular:
+            # 固定会员：整个时间段内每天都可能训练
+            self.start, self.end = first_day, last_day
+            self.daily_rate = 1.5
+        else:
+            # 会员陆续加入，越晚加入的越多
+            self.start = first_day + timedelta(days=int(span * rng.random() ** 0.7))
+            # 约三成会员在一段时间后流失
+            if rng.random() < 0.3:
+                self.end = min(self.start + timedelta(days=int(rng.expovariate(1 / 120))), last_day)
             else:
-                count = random.randint(5, 20)
-                
-            cursor.execute("""
-                INSERT INTO exercise_records 
-                (timestamp, exercise_type, count_or_duration)
-                VALUES (?, ?, ?)
-            """, (timestamp.isoformat(), exercise, count))
-    
-    conn.commit()
-    conn.close()
-    
+                self.end = last_day
+            # 每天训练次数的期望，对数正态分布：多数人偶尔训练，少数人每天多次
+            self.daily_rate = min(rng.lognormvariate(math.log(0.5), 0.6), 4.0)
+        # 运动偏好
+        weights = [rng.gammavariate(1.0, 1.0) for _ in EXERCISES]
+        total = sum(weights)
+        self.weights = [w / total for w in weights]
+        # 个人水平和进步速度
+        self.skill = {
+            name: profile["base"] * rng.lognormvariate(0, profile["spread"])
+            for name, profile in EXERCISE_PROFILES.items()
+        }
+        self.progress = rng.uniform(0.0, 0.002)
+        # 偏好的训练时间：早上或晚上
+        self.preferred_hour = rng.choice([7.0, 12.5, 19.5, 20.5])
+
+
+def generate_records(user_ids, years=1.0, end_date=None, seed=0, max_rows=None, regular=False):
+    """按时间顺序逐个会员生成记录行，user_ids 为各会员的ID
+
+    每行为 (timestamp, exercise_type, count_or_duration, exercise_time, notes, ts_epoch, day, user_id)，
+    与 DatabaseManager.bulk_insert_rows 的格式一致。
+    """
+    rng = random.Random(seed)
+    last_day = end_date or date.today()
+    first_day = last_day - timedelta(days=int(years * 365))
+    now = datetime.now()
+    produced = 0
+
+    for user_id in user_ids:
+        member = Member(rng, first_day, last_day, regular)
+        day = member.start
+        while day <= member.end:
+            elapsed_days = (day - member.start).days
+            rate = member.daily_rate * WEEKDAY_FACTORS[day.weekday()]
+            sessions = _poisson(rng, rate)
+            for _ in range(sessions):
+                exercise = rng.choices(EXERCISES, member.weights)[0]
+                profile = EXERCISE_PROFILES[exercise]
+
+                hour = min(max(rng.gauss(member.preferred_hour, 1.5), 6.0), 23.5)
+                timestamp = datetime.combine(day, datetime.min.time()) + timedelta(
+                    seconds=int(hour * 3600) + rng.randint(0, 59))
+                if timestamp > now:
+                    continue
+
+                # 水平随训练天数缓慢提高，单次表现有波动
+                level = member.skill[exercise] * (1 + member.progress * elapsed_days)
+                value = max(1, int(rng.gauss(level, level * 0.2)))
+                if exercise == "平板支撑":
+                    exercise_time = value
+                else:
+                    exercise_time = max(1, int(value * profile["seconds_per_unit"] * rng.uniform(0.8, 1.3)))
+
+                yield (timestamp.isoformat(), exercise, value, exercise_time, "",
+                       int(timestamp.timestamp()), local_day(timestamp), user_id)
+                produced += 1
+                if max_rows and produced >= max_rows:
+                    return
+            day += timedelta(days=1)
+
+
+def _poisson(rng, rate):
+    """泊松分布抽样（rate 较小，使用乘法法）"""
+    threshold = math.exp(-rate)
+    count, product = 0, rng.random()
+    while product > threshold:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def write_records(db, rows, batch_size=50000, progress=None):
+    """分批写入记录行，返回实际写入的行数"""
+    inserted = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            batch.sort(key=lambda r: r[5])
+            inserted += db.bulk_insert_rows(batch)
+            batch.clear()
+            if progress:
+                progress(inserted)
+    if batch:
+        batch.sort(key=lambda r: r[5])
+        inserted += db.bulk_insert_rows(batch)
+        if progress:
+            progress(inserted)
+    return inserted
+
+
+def members_for_rows(rows, years):
+    """估算生成指定行数所需的会员数"""
+    # 每天平均约0.6次训练；七成会员平均在后40%的时间段内活跃，其余约120天后流失
+    per_member = max(years * 365 * 0.6 * 0.7 * 0.41 + 0.3 * 120 * 0.6, 1)
+    return max(1, int(rows / per_member * 1.2))
+
+
+def create_members(db, count):
+    """创建指定数量的会员，返回会员ID列表"""
+    created = datetime.now().isoformat()
+    names = [f"会员{i:05d}" for i in range(1, count + 1)]
+    with db.transaction():
+        db.executemany("INSERT OR IGNORE INTO users (name, created_at) VALUES (?, ?)",
+                       ((name, created) for name in names))
+    ids = dict(db.fetchall("SELECT name, id FROM users WHERE name >= '会员' AND name < '会员\U0010ffff'"))
+    return [ids[name] for name in names]
+
+
+def reset_database(path):
+    """删除已有的数据库文件"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _today_rows(rng):
+    """生成今天已过去时间内的记录，确保主界面有当天数据"""
+    now = datetime.now()
+    midnight = datetime.combine(now.date(), datetime.min.time())
+    for exercise in EXERCISES:
+        if rng.random() < 0.7:  # 70%概率今天有该运动记录
+            timestamp = midnight + timedelta(seconds=rng.randint(0, int((now - midnight).total_seconds())))
+            profile = EXERCISE_PROFILES[exercise]
+            value = max(1, int(rng.gauss(profile["base"], profile["base"] * 0.2)))
+            exercise_time = value if exercise == "平板支撑" else int(value * profile["seconds_per_unit"])
+            yield (timestamp.isoformat(), exercise, value, max(1, exercise_time), "",
+                   int(timestamp.timestamp()), local_day(timestamp), DEFAULT_USER_ID)
+
+
+def generate_test_data(db=None, days=90, seed=None):
+    """开发模式：清空应用数据库并为默认会员生成最近一段时间的记录"""
+    from src.core.database import db_manager, rebuild_daily_rollups
+
+    db = db or db_manager
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM rep_metrics")
+        conn.execute("DELETE FROM session_series")
+        conn.execute("DELETE FROM sessions")
+        conn.execute("DELETE FROM exercise_records")
+        conn.execute("DELETE FROM member_achievements")
+        rebuild_daily_rollups(conn)
+    db.cache.clear()
+
+    rows = list(generate_records([DEFAULT_USER_ID], years=days / 365, seed=seed, regular=True))
+    rows.extend(_today_rows(random.Random(seed)))
+    inserted = write_records(db, rows)
     print("测试数据生成完成！")
-    print("数据范围：", start_date.date(), "至", end_date.date())
+    print(f"共 {inserted} 条记录，数据范围：{date.today() - timedelta(days=days)} 至 {date.today()}")
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成基准测试数据")
+    parser.add_argument("--db", default="benchmark_data.db", help="基准数据库文件")
+    parser.add_argument("--members", type=int, help="会员数，未指定时根据 --rows 估算")
+    parser.add_argument("--years", type=float, default=3.0, help="历史数据的年数")
+    parser.add_argument("--rows", type=int, help="最多生成的记录数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=50000, help="每个事务写入的行数")
+    parser.add_argument("--append", action="store_true", help="追加到已有数据库而不是重新创建")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.db) == os.path.abspath("exercise_data.db"):
+        parser.error("请勿向应用数据库写入基准数据，请使用独立的数据库文件")
+    members = args.members or (members_for_rows(args.rows, args.years) if args.rows else 100)
+
+    if not args.append:
+        reset_database(args.db)
+    db = DatabaseManager(args.db)
+    db.init_database()
+
+    start = time.perf_counter()
+
+    def progress(inserted):
+        elapsed = time.perf_counter() - start
+        print(f"\r已写入 {inserted} 条（{inserted / max(elapsed, 1e-9):.0f} 行/秒）", end="", flush=True)
+
+    rows = generate_records(create_members(db, members), args.years, seed=args.seed, max_rows=args.rows)
+    inserted = write_records(db, rows, args.batch_size, progress)
+    db.execute("ANALYZE")
+    elapsed = time.perf_counter() - start
+
+    total = db.fetch_value("SELECT COUNT(*) FROM exercise_records", default=0)
+    print(f"\n{members} 位会员，{args.years:g} 年，写入 {inserted} 条记录，耗时 {elapsed:.1f} 秒")
+    print(f"数据库 {args.db} 共 {total} 条记录")
+    db.close()
+
 
 if __name__ == "__main__":
-    generate_test_data() 
\ No newline at end of file
+    main()
@@ -0,0 +1,452 @@
+"""合成姿势关键点生成器
+
+按运动类型生成与 MediaPipe pose_landmarks 形状一致的参数化关键点流，
+用于计数器的压力测试、模糊测试和吞吐量基准测试。
+
+用法:
+    python -m tools.landmark_generator --exercise 深蹲 --frames 1000000
+"""
+import argparse
+import math
+import random
+import sys
+import time
+
+# 与 MediaPipe PoseLandmark 编号一致
+NUM_LANDMARKS = 33
+NOSE = 0
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+LOWER_BODY = (LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE)
+UPPER_BODY = (LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST, RIGHT_WRIST)
+
+
+# 模拟时钟的起点（2023-11-14 的UTC时间戳）
+SIMULATED_EPOCH = 1700000000.0
+
+
+class SyntheticLandmark:
+    """与 MediaPipe NormalizedLandmark 接口相同的轻量关键点"""
+    __slots__ = ("x", "y", "z", "visibility")
+
+    def __init__(self, x=0.5, y=0.5, z=0.0, visibility=0.99):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = visibility
+
+
+class SimulatedClock:
+    """模拟时钟，替换计数器的 clock 使其按帧时间戳运行
+
+    now 为相对流开始的秒数，返回值加上非零的 epoch，与真实时钟一样不会出现时间为0。
+    """
+
+    def __init__(self, now=0.0, epoch=SIMULATED_EPOCH):
+        self.now = now
+        self.epoch = epoch
+
+    def __call__(self):
+        return self.epoch + self.now
+
+
+def hinge(joint, angle, distal_length, proximal_length, side=1):
+    """以关节为顶点构造给定夹角的两段肢体
+
+    远端肢体竖直向下，近端肢体按夹角旋转，返回 (远端点, 近端点)。
+    """
+    radians = math.radians(angle)
+    distal = (joint[0], joint[1] + distal_length)
+    proximal = (joint[0] + side * proximal_length * math.sin(radians),
+                joint[1] + proximal_length * math.cos(radians))
+    return distal, proximal
+
+
+class LandmarkStream:
+    """合成关键点流基类
+
+    子类实现 pose_at(t) 返回 {关键点编号: (x, y)}，基类负责噪声、
+    丢帧和可见性丢失。每帧只保留常量大小的状态，可以无限生成。
+    """
+    exercise_name = None
+
+    def __init__(self, fps=30, noise=0.003, dropout_rate=0.0,
+                 visibility_loss_rate=0.0, visibility_loss_duration=0.5, seed=None):
+        self.fps = fps
+        self.noise = noise
+        self.dropout_rate = dropout_rate  # 每帧未检测到人体的概率
+        self.visibility_loss_rate = visibility_loss_rate  # 每秒发生遮挡的概率
+        self.visibility_loss_duration = visibility_loss_duration
+        self.rng = random.Random(seed)
+        self.occluded_until = -1.0
+        self.occluded_points = ()
+        self.base = self._base_pose()
+
+    def _base_pose(self):
+        """站立姿势的默认关键点坐标"""
+        pose = [(0.5, 0.5)] * NUM_LANDMARKS
+        pose[NOSE] = (0.5, 0.15)
+        pose[LEFT_SHOULDER], pose[RIGHT_SHOULDER] = (0.58, 0.28), (0.42, 0.28)
+        pose[LEFT_ELBOW], pose[RIGHT_ELBOW] = (0.6, 0.4), (0.4, 0.4)
+        pose[LEFT_WRIST], pose[RIGHT_WRIST] = (0.6, 0.5), (0.4, 0.5)
+        pose[LEFT_HIP], pose[RIGHT_HIP] = (0.55, 0.52), (0.45, 0.52)
+        pose[LEFT_KNEE], pose[RIGHT_KNEE] = (0.55, 0.7), (0.45, 0.7)
+        pose[LEFT_ANKLE], pose[RIGHT_ANKLE] = (0.55, 0.88), (0.45, 0.88)
+        return pose
+
+    def pose_at(self, t):
+        raise NotImplementedError("子类必须实现pose_at方法")
+
+    def expected_value(self):
+        """截至当前帧的真实计数（平板支撑为秒数）"""
+        raise NotImplementedError("子类必须实现expected_value方法")
+
+    def _update_occlusion(self, t):
+        if t < self.occluded_until or self.visibility_loss_rate <= 0:
+            return
+        self.occluded_points = ()
+        if self.rng.random() < self.visibility_loss_rate / self.fps:
+            self.occluded_until = t + self.visibility_loss_duration
+            self.occluded_points = self.rng.choice((LOWER_BODY, UPPER_BODY))
+
+    def landmarks_at(self, t):
+        """生成t时刻的一帧关键点，丢帧时返回None"""
+        self._update_occlusion(t)
+        if self.dropout_rate and self.rng.random() < self.dropout_rate:
+            return None
+
+        points = self.pose_at(t)
+        gauss = self.rng.gauss
+        landmarks = []
+        for index, (x, y) in enumerate(self.base):
+            if index in points:
+                x, y = points[index]
+                if self.noise:
+                    x += gauss(0, self.noise)
+                    y += gauss(0, self.noise)
+            landmarks.append(SyntheticLandmark(x, y))
+        if t < self.occluded_until:
+            for index in self.occluded_points:
+                landmarks[index].visibility = 0.1
+        return landmarks
+
+    def frames(self, n_frames=None, duration=None):
+        """按帧率生成 (时间戳, 关键点) 序列，n_frames和duration都为空时无限生成"""
+        if n_frames is None and duration is not None:
+            n_frames = int(duration * self.fps)
+        index = 0
+        while n_frames is None or index < n_frames:
+            t = index / self.fps
+            yield t, self.landmarks_at(t)
+            index += 1
+
+
+class RepStream(LandmarkStream):
+    """周期性重复动作的关键点流，按次生成深度和节奏"""
+
+    def __init__(self, top_angle=175, depth_angle=75, depth_jitter=5,
+                 rep_duration=2.0, tempo_jitter=0.3, pause=0.5,
+                 partial_rate=0.0, partial_angle=120, **kwargs):
+        self.top_angle = top_angle
+        self.depth_angle = depth_angle
+        self.depth_jitter = depth_jitter
+        self.rep_duration = rep_duration
+        self.tempo_jitter = tempo_jitter
+        self.pause = pause
+        self.partial_rate = partial_rate  # 未达到深度的无效动作比例
+        self.partial_angle = partial_angle
+        self.completed_reps = 0
+        super().__init__(**kwargs)
+        self.rep_start = 0.0
+        self._next_rep()
+
+    def _next_rep(self):
+        self.rep_length = max(0.4, self.rep_duration + self.rng.uniform(-self.tempo_jitter, self.tempo_jitter))
+        self.rep_partial = self.rng.random() < self.partial_rate
+        if self.rep_partial:
+            self.rep_bottom = self.partial_angle
+        else:
+            self.rep_bottom = self.depth_angle + self.rng.uniform(-self.depth_jitter, self.depth_jitter)
+
+    def angle_at(self, t):
+        """t时刻的关节角度（余弦曲线，离心和向心各占半个周期）"""
+        while t >= self.rep_start + self.rep_length + self.pause:
+            if not self.rep_partial:
+                self.completed_reps += 1
+            self.rep_start += self.rep_length + self.pause
+            self._next_rep()
+        phase = (t - self.rep_start) / self.rep_length
+        if phase >= 1:
+            return self.top_angle
+        depth = self.top_angle - self.rep_bottom
+        return self.top_angle - depth * (1 - math.cos(2 * math.pi * phase)) / 2
+
+    def expected_value(self):
+        return self.completed_reps
+
+
+class SquatStream(RepStream):
+    """深蹲：正面视角，膝关节角度随深度曲线变化"""
+    exercise_name = "深蹲"
+
+    def pose_at(self, t):
+        angle = self.angle_at(t)
+        # 下蹲时髋部随膝角下降
+        drop = (self.top_angle - angle) / 400
+        points = {}
+        for side, hip, knee, ankle, x in ((1, LEFT_HIP, LEFT_KNEE, LEFT_ANKLE, 0.55),
+                                           (-1, RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE, 0.45)):
+            knee_point = (x, 0.7 + drop / 2)
+            ankle_point, hip_point = hinge(knee_point, angle, 0.18, 0.18, side)
+            points[knee], points[ankle], points[hip] = knee_point, ankle_point, hip_point
+        return points
+
+
+class PushupStream(RepStream):
+    """俯卧撑：肘关节角度随下压曲线变化"""
+    exercise_name = "俯卧撑"
+
+    def __init__(self, top_angle=170, depth_angle=70, **kwargs):
+        super().__init__(top_angle=top_angle, depth_angle=depth_angle, **kwargs)
+
+    def pose_at(self, t):
+        angle = self.angle_at(t)
+        points = {}
+        for side, shoulder, elbow, wrist, x in ((1, LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, 0.55),
+                                                 (-1, RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, 0.45)):
+            elbow_point = (x, 0.7)
+            wrist_point, shoulder_point = hinge(elbow_point, angle, 0.12, 0.12, side)
+            points[elbow], points[wrist], points[shoulder] = elbow_point, wrist_point, shoulder_point
+        return points
+
+
+class PlankStream(LandmarkStream):
+    """平板支撑：侧面视角，保持一段时间后出现塌腰等姿势破坏"""
+    exercise_name = "平板支撑"
+
+    def __init__(self, hold_duration=60.0, sway=2.0, break_angle=40.0,
+                 break_duration=1.0, rest_duration=5.0, **kwargs):
+        self.hold_duration = hold_duration
+        self.sway = sway  # 正常保持时身体角度的摆动幅度（度）
+        self.break_angle = break_angle  # 姿势破坏时的塌腰角度
+        self.break_duration = break_duration
+        self.rest_duration = rest_duration
+        self.hold_seconds = 0
+        self.completed_seconds = 0
+        super().__init__(**kwargs)
+        self.cycle_start = 0.0
+
+    def sag_at(self, t):
+        """t时刻的塌腰角度：保持期小幅摆动，随后逐渐塌腰并休息"""
+        cycle = self.hold_duration + self.break_duration + self.rest_duration
+        while t >= self.cycle_start + cycle:
+            self.cycle_start += cycle
+            self.completed_seconds += self.hold_seconds
+            self.hold_seconds = 0
+        phase = t - self.cycle_start
+        if phase < self.hold_duration:
+            self.hold_seconds = int(phase)
+            return self.sway * math.sin(2 * math.pi * t / 4)
+        if phase < self.hold_duration + self.break_duration:
+            return self.break_angle * (phase - self.hold_duration) / self.break_duration
+        return self.break_angle
+
+    def pose_at(self, t):
+        sag = math.radians(self.sag_at(t))
+        shoulder = (0.7, 0.5)
+        hip = (shoulder[0] - 0.3 * math.cos(sag), shoulder[1] + 0.3 * math.sin(sag))
+        ankle = (hip[0] - 0.3 * math.cos(sag / 2), hip[1] + 0.3 * math.sin(sag / 2))
+        elbow = (shoulder[0], shoulder[1] + 0.05)
+        return {
+            LEFT_SHOULDER: shoulder,
+            LEFT_HIP: hip,
+            LEFT_ANKLE: ankle,
+            LEFT_ELBOW: elbow,
+        }
+
+    def expected_value(self):
+        return self.completed_seconds + self.hold_seconds
+
+
+class RopeStream(LandmarkStream):
+    """跳绳：正面视角，全身随跳跃高度上下移动"""
+    exercise_name = "跳绳"
+
+    def __init__(self, jump_height=0.08, height_jitter=0.02, jump_period=0.5,
+                 airtime=0.3, **kwargs):
+        self.jump_height = jump_height
+        self.height_jitter = height_jitter
+        self.jump_period = jump_period
+        self.airtime = airtime
+        self.completed_jumps = 0
+        super().__init__(**kwargs)
+        self.jump_start = 0.0
+        self.current_height = self._next_height()
+
+    def _next_height(self):
+        return max(0.0, self.jump_height + self.rng.uniform(-self.height_jitter, self.height_jitter))
+
+    def height_at(self, t):
+        while t >= self.jump_start + self.jump_period:
+            self.completed_jumps += 1
+            self.jump_start += self.jump_period
+            self.current_height = self._next_height()
+        phase = (t - self.jump_start) / self.airtime
+        if phase >= 1:
+            return 0.0
+        return self.current_height * math.sin(math.pi * phase)
+
+    def pose_at(self, t):
+        lift = self.height_at(t)
+        points = {}
+        for index in (NOSE,) + UPPER_BODY + LOWER_BODY:
+            x, y = self.base[index]
+            points[index] = (x, y - lift)
+        return points
+
+    def expected_value(self):
+        return self.completed_jumps
+
+
+STREAMS = {
+    SquatStream.exercise_name: SquatStream,
+    PushupStream.exercise_name: PushupStream,
+    PlankStream.exercise_name: PlankStream,
+    RopeStream.exercise_name: RopeStream,
+}
+
+
+def create_counter(exercise_name, record=True, **params):
+    """创建对应运动的计数器，未指定的参数使用配置文件中的值
+
+    record 为False时不记录逐帧数值和质量指标，长时间运行时内存不随帧数增长。
+    """
+    from config.app_config import COUNTER_CONFIG
+    params = {**COUNTER_CONFIG.get(exercise_name, {}), **params}
+    if exercise_name == "深蹲":
+        from src.exercises.squat_counter import SquatCounter
+        counter = SquatCounter(**params)
+    elif exercise_name == "俯卧撑":
+        from src.exercises.pushup_counter import PushupCounter
+        counter = PushupCounter(**params)
+    elif exercise_name == "平板支撑":
+        from src.exercises.plank_counter import PlankCounter
+        counter = PlankCounter(**params)
+    elif exercise_name == "跳绳":
+        from src.exercises.rope_counter import RopeCounter
+        counter = RopeCounter(**params)
+    else:
+        raise ValueError(f"未知的运动类型: {exercise_name}")
+    if not record:
+        counter.stop_recording()
+    return counter
+
+
+class LatencyStats:
+    """固定内存的延迟统计（对数分桶直方图）"""
+    BUCKETS = 64
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * self.BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        # 以1微秒为起点，每桶按2^(1/4)倍增长
+        micros = max(seconds * 1e6, 1.0)
+        bucket = min(int(math.log2(micros) * 4), self.BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+    def percentile(self, p):
+        target = self.count * p / 100
+        seen = 0
+        for bucket, n in enumerate(self.histogram):
+            seen += n
+            if seen >= target:
+                return 2 ** ((bucket + 1) / 4) / 1e6
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+def run_stream(counter, stream, n_frames=None, duration=None, latency=None):
+    """将合成关键点流送入计数器，返回计数器的计数结果"""
+    clock = SimulatedClock()
+    counter.clock = clock
+    total = 0
+    for t, landmarks in stream.frames(n_frames, duration):
+        clock.now = t
+        start = time.perf_counter()
+        counter.process_pose(landmarks)
+        if latency is not None:
+            latency.add(time.perf_counter() - start)
+        # 平板支撑结束后累计时长并重新开始，便于长时间浸泡测试
+        if getattr(counter, "is_finished", False):
+            total += counter.total_time
+            counter.reset()
+    if hasattr(counter, "is_finished"):
+        return total + counter.calculate_time()
+    return counter.counter
+
+
+def peak_memory_mb():
+    """进程峰值内存（MB），不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS以字节为单位，Linux以KB为单位
+    return usage / 1024 / 1024 if sys.platform == "darwin" else usage / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成关键点流压力测试")
+    parser.add_argument("--exercise", default="深蹲", choices=list(STREAMS))
+    parser.add_argument("--frames", type=int, default=100000, help="生成帧数")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--noise", type=float, default=0.003)
+    parser.add_argument("--dropout", type=float, default=0.0, help="每帧丢失概率")
+    parser.add_argument("--occlusion", type=float, default=0.0, help="每秒遮挡概率")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    stream = STREAMS[args.exercise](
+        fps=args.fps,
+        noise=args.noise,
+        dropout_rate=args.dropout,
+        visibility_loss_rate=args.occlusion,
+        seed=args.seed
+    )
+    counter = create_counter(args.exercise, record=False)
+    latency = LatencyStats()
+
+    start = time.perf_counter()
+    result = run_stream(counter, stream, n_frames=args.frames, latency=latency)
+    elapsed = time.perf_counter() - start
+
+    print(f"运动类型: {args.exercise}")
+    print(f"模拟时长: {args.frames / args.fps / 3600:.2f} 小时 ({args.frames} 帧)")
+    print(f"计数结果: {result}  真实值: {stream.expected_value()}")
+    print(f"吞吐量: {args.frames / elapsed:.0f} 帧/秒")
+    print(f"单帧延迟: 平均 {latency.mean * 1e6:.1f}us  "
+          f"P99 {latency.percentile(99) * 1e6:.1f}us  最大 {latency.max * 1e6:.1f}us")
+    memory = peak_memory_mb()
+    if memory is not None:
+        print(f"峰值内存: {memory:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
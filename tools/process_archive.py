@@ -0,0 +1,85 @@
+"""归档视频离线处理
+
+无界面地对录制好的视频做姿势检测和计数，默认使用批量推理后端。
+
+用法:
+    python -m tools.process_archive videos/*.mp4 --exercise 深蹲
+    python -m tools.process_archive videos/*.mp4 --exercise 深蹲 --backend solutions
+"""
+import argparse
+import csv
+import glob
+import time
+
+from config.app_config import OFFLINE_POSE_CONFIG, POSE_CONFIG
+from src.core.offline_pose import iter_video_poses
+from src.core.pose_backends import create_backend
+from tools.landmark_generator import SimulatedClock, create_counter
+
+
+def backend_config(name, batch_size=None):
+    """根据后端名称组合配置，tasks 后端离线时使用 video 模式"""
+    if name == OFFLINE_POSE_CONFIG["backend"]:
+        config = dict(OFFLINE_POSE_CONFIG)
+    else:
+        config = {**POSE_CONFIG, "backend": name}
+        if name == "tasks":
+            config["running_mode"] = "video"
+    if batch_size:
+        config["batch_size"] = batch_size
+    return config
+
+
+def process_video(path, exercise_name, backend, batch_size=None):
+    """处理一段视频，返回 (计数结果, 帧数, 耗时)"""
+    counter = create_counter(exercise_name, record=False)
+    clock = SimulatedClock()
+    counter.clock = clock
+    frames = 0
+    total = 0
+    start = time.perf_counter()
+    for _, timestamp, results in iter_video_poses(path, backend, batch_size):
+        frames += 1
+        clock.now = timestamp
+        landmarks = results.pose_landmarks.landmark if results and results.pose_landmarks else None
+        counter.process_pose(landmarks)
+        if getattr(counter, "is_finished", False):
+            total += counter.total_time
+            counter.reset()
+    elapsed = time.perf_counter() - start
+    if hasattr(counter, "is_finished"):
+        return total + counter.calculate_time(), frames, elapsed
+    return counter.counter, frames, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="归档视频离线处理")
+    parser.add_argument("videos", nargs="+", help="视频文件（支持通配符）")
+    parser.add_argument("--exercise", required=True)
+    parser.add_argument("--backend", default=OFFLINE_POSE_CONFIG["backend"],
+                        choices=["onnx_batch", "solutions", "tasks"])
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--csv", default=None, help="将结果写入CSV")
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.videos for p in glob.glob(pattern)})
+    backend = create_backend(backend_config(args.backend, args.batch_size))
+    rows = []
+    try:
+        for path in paths:
+            result, frames, elapsed = process_video(path, args.exercise, backend, args.batch_size)
+            rows.append((path, result, frames, elapsed))
+            print(f"{path}: 计数 {result}  {frames} 帧  {frames / elapsed:.1f} 帧/秒")
+    finally:
+        backend.close()
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["文件", "运动类型", "计数/时长", "帧数", "耗时(秒)"])
+            for path, result, frames, elapsed in rows:
+                writer.writerow([path, args.exercise, result, frames, f"{elapsed:.2f}"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""批量生成会员运动周报
+
+主进程一次查询所有会员最近几周的每日汇总并按会员分组，
+再由进程池中的工作进程用 Agg/PDF 后端离屏绘制，不需要显示器。
+默认生成上一个完整自然周（周一至周日）的报告，只包含该周有记录的会员。
+
+用法:
+    python -m tools.render_reports --out reports/
+    python -m tools.render_reports --week 2024-06-12 --format pdf --workers 8
+    python -m tools.render_reports --db benchmark_data.db --limit 500
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from src.core.database import DatabaseManager, day_to_date, local_day, week_start_day
+from src.core.report import REPORT_FORMATS, REPORT_WEEKS, WeeklyReportRenderer, load_weekly_reports, report_filename
+
+# 工作进程内复用的渲染器和输出参数
+_renderer = None
+_options = None
+
+
+def _init_worker(week_start, out_dir, fmt):
+    global _renderer, _options
+    import matplotlib
+    matplotlib.use("Agg")
+    from src.core.chart_painter import configure_matplotlib
+    configure_matplotlib()
+    _renderer = WeeklyReportRenderer()
+    _options = (week_start, out_dir, fmt)
+
+
+def _render(report):
+    week_start, out_dir, fmt = _options
+    path = os.path.join(out_dir, report_filename(report, week_start, fmt))
+    return _renderer.render(report, week_start, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量生成会员运动周报")
+    parser.add_argument("--db", default="exercise_data.db")
+    parser.add_argument("--out", default="reports", help="输出目录")
+    parser.add_argument("--week", help="报告所在周的任意一天 YYYY-MM-DD，默认上一周")
+    parser.add_argument("--weeks", type=int, default=REPORT_WEEKS, help="对比图包含的周数")
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="png")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="工作进程数")
+    parser.add_argument("--limit", type=int, help="最多生成的报告数")
+    args = parser.parse_args()
+
+    if args.week:
+        week_start = week_start_day(local_day(date.fromisoformat(args.week)))
+    else:
+        week_start = week_start_day(local_day()) - 7
+    os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    db = DatabaseManager(args.db)
+    db.init_database()
+    try:
+        reports = load_weekly_reports(db, week_start, args.weeks)
+    finally:
+        db.close()
+    query_time = time.perf_counter() - start
+    if args.limit:
+        reports = reports[:args.limit]
+    print(f"报告周: {day_to_date(week_start)} 起  会员: {len(reports)} 位  查询耗时 {query_time:.2f} 秒")
+    if not reports:
+        return
+
+    render_start = time.perf_counter()
+    chunksize = max(1, len(reports) // (args.workers * 8))
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(week_start, args.out, args.format)) as executor:
+        for done, _ in enumerate(executor.map(_render, reports, chunksize=chunksize), 1):
+            if done % 100 == 0:
+                print(f"已生成 {done}/{len(reports)}")
+    render_time = time.perf_counter() - render_start
+    total_time = time.perf_counter() - start
+
+    print(f"生成 {len(reports)} 份报告到 {args.out}，渲染耗时 {render_time:.1f} 秒，总耗时 {total_time:.1f} 秒")
+    print(f"吞吐量: {len(reports) / total_time * 60:.0f} 份/分钟（{args.workers} 个进程）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""数据分析图表内存浸泡测试
+
+反复切换图表类型、时间范围和运动类型，每隔一段记录进程常驻内存（RSS）。
+默认在无界面环境下用 Agg 画布驱动与 AnalysisFrame 相同的 ChartPainter；
+--legacy 模拟原来每次切换都 plt.subplots 新建图表且不关闭的做法作为对照；
+--worker 通过 AnalysisFrame 使用的后台 ChartWorker 连续快速切换，统计提交耗时和被取代的请求；
+--tk 在有显示器时驱动真实的 AnalysisFrame。
+
+用法:
+    python -m tools.soak_charts --switches 1000
+    python -m tools.soak_charts --legacy --switches 300
+    python -m tools.soak_charts --worker --burst 5
+    python -m tools.soak_charts --tk --db benchmark_data.db
+"""
+import argparse
+import gc
+import itertools
+import os
+import resource
+import time
+from datetime import datetime, timedelta
+
+from src.core import chart_data
+from src.core.database import DatabaseManager
+from tools.generate_test_data import create_members, generate_records, write_records
+
+CHART_TYPES = ("趋势图", "统计图", "对比图")
+TIME_RANGES = {"最近7天": 7, "最近30天": 30, "最近90天": 90, "最近1年": 365, "全部": None}
+EXERCISE_TYPES = ("全部", "深蹲", "俯卧撑", "平板支撑", "跳绳")
+
+
+def current_rss_mb():
+    """当前常驻内存（MB），不支持 /proc 时退回峰值"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def start_date_for(time_range):
+    days = TIME_RANGES[time_range]
+    return datetime.now() - timedelta(days=days) if days is not None else None
+
+
+def selections():
+    """依次循环所有选项组合"""
+    return itertools.cycle(itertools.product(CHART_TYPES, TIME_RANGES, EXERCISE_TYPES))
+
+
+def prepare_database(path):
+    """打开基准数据库，不存在时生成一位会员90天的记录"""
+    db = DatabaseManager(path)
+    db.init_database()
+    if not db.fetch_value("SELECT COUNT(*) FROM exercise_records", default=0):
+        write_records(db, generate_records(create_members(db, 1), years=0.25, regular=True))
+    user_id = db.fetch_value("""
+        SELECT user_id FROM daily_rollups GROUP BY user_id ORDER BY SUM(record_count) DESC LIMIT 1
+    """)
+    return db, user_id
+
+
+def run_headless(db, user_id, switches, report, legacy=False):
+    """在 Agg 画布上执行切换，返回每 report 次切换后的 RSS"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from src.core.chart_painter import ChartPainter, configure_matplotlib
+
+    configure_matplotlib()
+    painter = ChartPainter()
+    canvas = FigureCanvasAgg(painter.figure)
+    samples = []
+    for i, (chart_type, time_range, exercise) in enumerate(itertools.islice(selections(), switches), 1):
+        start_date = start_date_for(time_range)
+        columns = chart_data.to_columns(db.get_daily_rollups(user_id, start_date, exercise))
+        if legacy:
+            # 原做法：每次新建 pyplot 图表，旧图表一直被 pyplot 持有
+            fig, ax = plt.subplots(figsize=(10, 6))
+            old = ChartPainter(fig)
+            old.paint(chart_type, columns)
+            FigureCanvasAgg(fig).draw()
+        else:
+            painter.paint(chart_type, columns)
+            canvas.draw()
+        if i % report == 0:
+            gc.collect()
+            samples.append((i, current_rss_mb()))
+    return samples
+
+
+def run_worker(db, user_id, switches, report, burst):
+    """每轮连续提交 burst 个选择，只等待最后一个完成，返回 RSS 采样和提交耗时"""
+    from src.core.chart_painter import configure_matplotlib
+    from src.ui.chart_worker import ChartWorker
+
+    configure_matplotlib()
+    worker = ChartWorker(db)
+    samples = []
+    submit_times = []
+    rendered = 0
+    choices = selections()
+    for i in range(1, switches + 1):
+        for chart_type, time_range, exercise in itertools.islice(choices, burst):
+            start_date = start_date_for(time_range)
+            start = time.perf_counter()
+            worker.submit(chart_type, user_id, start_date, exercise, 1000, 600)
+            submit_times.append(time.perf_counter() - start)
+        while worker.take_result() is None:
+            time.sleep(0.005)
+        rendered += 1
+        if i % report == 0:
+            gc.collect()
+            samples.append((i, current_rss_mb()))
+    worker.close()
+    submit_times.sort()
+    print(f"提交 {len(submit_times)} 次，最长 {submit_times[-1] * 1000:.2f} 毫秒，"
+          f"P99 {submit_times[int(len(submit_times) * 0.99)] * 1000:.2f} 毫秒；"
+          f"渲染 {rendered} 张，取代 {worker.superseded} 个请求")
+    return samples
+
+
+def run_tk(db_path, user_id, switches, report):
+    """驱动真实的 AnalysisFrame（需要显示器）"""
+    import customtkinter as ctk
+    from src.core.database import db_manager
+    from src.ui.analysis_frame import AnalysisFrame
+
+    db_manager.db_path = db_path
+    window = ctk.CTk()
+    frame = AnalysisFrame(window, window.quit, user_id)
+    frame.pack(fill="both", expand=True)
+    samples = []
+    for i, (chart_type, time_range, exercise) in enumerate(itertools.islice(selections(), switches), 1):
+        frame.chart_var.set(chart_type)
+        frame.time_var.set(time_range)
+        frame.exercise_var.set(exercise)
+        frame.update_chart()
+        # 图表在后台渲染，等待最新结果显示出来
+        while frame.chart_worker.pending or frame.poll_job is not None:
+            window.update()
+        if i % report == 0:
+            gc.collect()
+            samples.append((i, current_rss_mb()))
+    frame.destroy()
+    window.destroy()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据分析图表内存浸泡测试")
+    parser.add_argument("--db", default="benchmark_data.db")
+    parser.add_argument("--switches", type=int, default=1000, help="切换次数")
+    parser.add_argument("--report", type=int, default=100, help="每隔多少次记录一次内存")
+    parser.add_argument("--legacy", action="store_true", help="模拟原来每次新建图表的做法")
+    parser.add_argument("--worker", action="store_true", help="通过后台 ChartWorker 渲染")
+    parser.add_argument("--burst", type=int, default=5, help="--worker 时每轮连续提交的选择数")
+    parser.add_argument("--tk", action="store_true", help="驱动真实的 AnalysisFrame")
+    args = parser.parse_args()
+
+    db, user_id = prepare_database(args.db)
+    start = time.perf_counter()
+    baseline = current_rss_mb()
+    if args.tk:
+        db.close()
+        samples = run_tk(args.db, user_id, args.switches, args.report)
+    elif args.worker:
+        samples = run_worker(db, user_id, args.switches, args.report, args.burst)
+        db.close()
+    else:
+        samples = run_headless(db, user_id, args.switches, args.report, args.legacy)
+        db.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"启动时 RSS {baseline:.1f}MB")
+    for switches, rss in samples:
+        print(f"{switches:6d} 次切换  RSS {rss:7.1f}MB")
+    if len(samples) >= 2:
+        growth = samples[-1][1] - samples[0][1]
+        print(f"第 {samples[0][0]} 次到第 {samples[-1][0]} 次切换内存增长 {growth:+.1f}MB，"
+              f"平均每次切换 {elapsed / args.switches * 1000:.1f} 毫秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""同步服务器的本地替身
+
+接收 SyncAgent 推送的gzip压缩JSON批次，按(本机标识, 记录ID)幂等写入
+独立的SQLite数据库，用于在没有总部服务器时测试同步。支持HTTP/1.1
+持久连接，可按比例随机返回503以验证客户端的退避重试。
+
+用法:
+    python -m tools.sync_server --port 8765 --db central_data.db
+    python -m tools.sync_server --fail-rate 0.3
+"""
+import argparse
+import gzip
+import json
+import random
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS central_records (
+        kiosk_id TEXT NOT NULL,
+        record_id INTEGER NOT NULL,
+        member TEXT,
+        user_id INTEGER,
+        timestamp TEXT NOT NULL,
+        exercise_type TEXT NOT NULL,
+        count_or_duration INTEGER NOT NULL,
+        exercise_time INTEGER NOT NULL,
+        notes TEXT,
+        ts_epoch INTEGER NOT NULL,
+        PRIMARY KEY (kiosk_id, record_id)
+    ) WITHOUT ROWID
+'''
+
+UPSERT = '''
+    INSERT INTO central_records
+    (kiosk_id, record_id, member, user_id, timestamp, exercise_type, count_or_duration,
+     exercise_time, notes, ts_epoch)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(kiosk_id, record_id) DO UPDATE SET
+        member = excluded.member,
+        user_id = excluded.user_id,
+        timestamp = excluded.timestamp,
+        exercise_type = excluded.exercise_type,
+        count_or_duration = excluded.count_or_duration,
+        exercise_time = excluded.exercise_time,
+        notes = excluded.notes,
+        ts_epoch = excluded.ts_epoch
+'''
+
+
+class CentralStore:
+    """中心数据库，所有请求线程共用一个连接"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute(SCHEMA)
+        self.lock = threading.Lock()
+
+    def upsert(self, kiosk_id, records):
+        rows = [
+            (kiosk_id, r["id"], r.get("member"), r.get("user_id"), r["timestamp"], r["exercise_type"],
+             r["count_or_duration"], r["exercise_time"], r.get("notes") or "", r["ts_epoch"])
+            for r in records
+        ]
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(UPSERT, rows)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+        return len(rows)
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM central_records").fetchone()[0]
+
+
+class SyncHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 允许客户端复用连接
+    # 响应头和响应体分两次写出，关闭Nagle算法以免与客户端的延迟确认叠加产生约40ms的停顿
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if random.random() < self.server.fail_rate:
+            self._reply(503, {"error": "模拟的服务器故障"})
+            return
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            payload = json.loads(body)
+            accepted = self.server.store.upsert(payload["kiosk_id"], payload["records"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        self.server.requests += 1
+        self._reply(200, {"accepted": accepted})
+
+    def _reply(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(host="127.0.0.1", port=8765, db_path="central_data.db", fail_rate=0.0, verbose=False):
+    server = ThreadingHTTPServer((host, port), SyncHandler)
+    server.store = CentralStore(db_path)
+    server.fail_rate = fail_rate
+    server.verbose = verbose
+    server.requests = 0
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同步服务器本地替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default="central_data.db", help="中心数据库文件")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="随机返回503的比例")
+    parser.add_argument("--verbose", action="store_true", help="输出每个请求")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.db, args.fail_rate, args.verbose)
+    print(f"同步服务器运行于 http://{args.host}:{args.port}/，数据库 {args.db}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n共处理 {server.requests} 个请求，中心数据库 {server.store.count()} 条记录")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""计数器参数调优工具
+
+在带标注的关键点录制上对计数器参数做网格搜索或随机搜索，
+使用进程池并行评估，并按准确率输出每组参数的结果。
+
+录制文件为 JSON Lines 格式：第一行是标注
+{"exercise": "深蹲", "fps": 30, "expected": 12}，之后每行一帧，
+内容为 33 个 [x, y, z, visibility] 或 null（未检测到人体）。
+
+用法:
+    # 生成合成的标注录制
+    python -m tools.tune_counters record --exercise 深蹲 --count 8 --out recordings/
+    # 网格搜索
+    python -m tools.tune_counters search recordings/*.jsonl \\
+        --param stand_angle=150:170:5 --param squat_angle=80:110:10
+    # 随机搜索
+    python -m tools.tune_counters search recordings/*.jsonl \\
+        --param stand_angle=150:170 --param squat_angle=80:110 --random 200
+"""
+import argparse
+import csv
+import glob
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tools.landmark_generator import (
+    STREAMS, SimulatedClock, SyntheticLandmark, create_counter
+)
+
+# 工作进程内缓存的录制数据，避免每个任务重复序列化
+_recordings = None
+
+
+def write_recording(path, stream, duration):
+    """将合成关键点流写为带标注的录制文件"""
+    frames = []
+    for _, landmarks in stream.frames(duration=duration):
+        if landmarks is None:
+            frames.append(None)
+        else:
+            frames.append([[round(p.x, 5), round(p.y, 5), round(p.z, 5), round(p.visibility, 3)]
+                           for p in landmarks])
+    header = {
+        "exercise": stream.exercise_name,
+        "fps": stream.fps,
+        "expected": stream.expected_value(),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for frame in frames:
+            f.write(json.dumps(frame) + "\n")
+
+
+def read_recording(path):
+    """读取录制文件，返回 (标注, 帧列表)"""
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        frames = []
+        for line in f:
+            frame = json.loads(line)
+            if frame is not None:
+                frame = [SyntheticLandmark(*point) for point in frame]
+            frames.append(frame)
+    return header, frames
+
+
+def evaluate_recording(exercise_name, params, header, frames):
+    """用给定参数回放一段录制，返回计数结果"""
+    counter = create_counter(exercise_name, record=False, **params)
+    clock = SimulatedClock()
+    counter.clock = clock
+    fps = header.get("fps", 30)
+    total = 0
+    for index, landmarks in enumerate(frames):
+        clock.now = index / fps
+        counter.process_pose(landmarks)
+        if getattr(counter, "is_finished", False):
+            total += counter.total_time
+            counter.reset()
+    if hasattr(counter, "is_finished"):
+        return total + counter.calculate_time()
+    return counter.counter
+
+
+def _init_worker(paths):
+    global _recordings
+    _recordings = [read_recording(path) for path in paths]
+
+
+def _evaluate(task):
+    """工作进程：评估一组参数在全部录制上的表现"""
+    exercise_name, params = task
+    errors = []
+    exact = 0
+    accuracy = 0.0
+    for header, frames in _recordings:
+        if header["exercise"] != exercise_name:
+            continue
+        expected = header["expected"]
+        predicted = evaluate_recording(exercise_name, params, header, frames)
+        error = abs(predicted - expected)
+        errors.append(error)
+        exact += error == 0
+        accuracy += max(0.0, 1 - error / max(expected, 1))
+    n = len(errors)
+    return {
+        "params": params,
+        "recordings": n,
+        "accuracy": accuracy / n if n else 0.0,
+        "exact_rate": exact / n if n else 0.0,
+        "mae": sum(errors) / n if n else 0.0,
+    }
+
+
+def parse_param(spec):
+    """解析参数范围：name=start:stop[:step] 或 name=v1,v2,v3"""
+    name, _, values = spec.partition("=")
+    if "," in values:
+        return name, [float(v) for v in values.split(",")], None
+    parts = [float(v) for v in values.split(":")]
+    if len(parts) == 3:
+        start, stop, step = parts
+        count = int(round((stop - start) / step)) + 1
+        return name, [round(start + i * step, 6) for i in range(count)], None
+    if len(parts) == 2:
+        return name, None, (parts[0], parts[1])
+    return name, [parts[0]], None
+
+
+def build_candidates(param_specs, n_random=None, seed=None):
+    """生成待评估的参数组合"""
+    parsed = [parse_param(spec) for spec in param_specs]
+    names = [name for name, _, _ in parsed]
+    if n_random:
+        rng = random.Random(seed)
+        candidates = []
+        for _ in range(n_random):
+            params = {}
+            for name, values, bounds in parsed:
+                if values is not None:
+                    params[name] = rng.choice(values)
+                else:
+                    params[name] = round(rng.uniform(*bounds), 4)
+            candidates.append(params)
+        return candidates
+
+    grids = []
+    for name, values, bounds in parsed:
+        if values is None:
+            raise ValueError(f"网格搜索需要步长: {name}")
+        grids.append(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*grids)]
+
+
+def search(paths, exercise_name, candidates, workers=None):
+    """在进程池中评估全部参数组合，按准确率降序返回"""
+    tasks = [(exercise_name, params) for params in candidates]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(paths,)) as executor:
+        results = list(executor.map(_evaluate, tasks, chunksize=max(1, len(tasks) // 64)))
+    results.sort(key=lambda r: (-r["accuracy"], r["mae"]))
+    return results
+
+
+def cmd_record(args):
+    os.makedirs(args.out, exist_ok=True)
+    for i in range(args.count):
+        stream = STREAMS[args.exercise](
+            fps=args.fps,
+            dropout_rate=args.dropout,
+            visibility_loss_rate=args.occlusion,
+            seed=args.seed + i
+        )
+        path = os.path.join(args.out, f"{args.exercise}_{i:03d}.jsonl")
+        write_recording(path, stream, args.duration)
+        print(f"已生成 {path}")
+
+
+def cmd_search(args):
+    paths = sorted({p for pattern in args.recordings for p in glob.glob(pattern)})
+    if not paths:
+        print("未找到录制文件")
+        return
+    exercise_name = args.exercise or read_recording(paths[0])[0]["exercise"]
+    candidates = build_candidates(args.param, args.random, args.seed)
+    print(f"运动类型: {exercise_name}  录制: {len(paths)} 个  参数组合: {len(candidates)} 组")
+
+    start = time.perf_counter()
+    results = search(paths, exercise_name, candidates, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for result in results[:args.top]:
+        print(f"准确率 {result['accuracy']:.3f}  完全正确 {result['exact_rate']:.2%}  "
+              f"平均误差 {result['mae']:.2f}  参数 {result['params']}")
+    print(f"耗时 {elapsed:.1f} 秒 ({len(candidates) / elapsed:.1f} 组/秒)")
+
+    if args.csv:
+        names = sorted({name for r in results for name in r["params"]})
+        with open(args.csv, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(names + ["accuracy", "exact_rate", "mae", "recordings"])
+            for r in results:
+                writer.writerow([r["params"].get(name) for name in names] +
+                                [r["accuracy"], r["exact_rate"], r["mae"], r["recordings"]])
+        print(f"结果已写入 {args.csv}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="计数器参数调优")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record = subparsers.add_parser("record", help="生成合成标注录制")
+    record.add_argument("--exercise", default="深蹲", choices=list(STREAMS))
+    record.add_argument("--count", type=int, default=8)
+    record.add_argument("--duration", type=float, default=60.0, help="每段时长（秒）")
+    record.add_argument("--fps", type=int, default=30)
+    record.add_argument("--dropout", type=float, default=0.01)
+    record.add_argument("--occlusion", type=float, default=0.05)
+    record.add_argument("--seed", type=int, default=0)
+    record.add_argument("--out", default="recordings")
+    record.set_defaults(func=cmd_record)
+
+    search_parser = subparsers.add_parser("search", help="搜索最优参数")
+    search_parser.add_argument("recordings", nargs="+", help="录制文件（支持通配符）")
+    search_parser.add_argument("--exercise", default=None)
+    search_parser.add_argument("--param", action="append", default=[],
+                               help="参数范围，如 stand_angle=150:170:5 或 squat_angle=80,90,100")
+    search_parser.add_argument("--random", type=int, default=None, help="随机搜索的组合数")
+    search_parser.add_argument("--seed", type=int, default=None)
+    search_parser.add_argument("--workers", type=int, default=None)
+    search_parser.add_argument("--top", type=int, default=10)
+    search_parser.add_argument("--csv", default=None, help="将全部结果写入CSV")
+    search_parser.set_defaults(func=cmd_search)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()